@@ -1,10 +1,18 @@
 """
 AlloyEval: A benchmark for evaluating language models on Alloy formal specification tasks.
+
+Top-level names are imported on first access, so importing the package (or
+one of its modules, such as alloy_eval.evaluation) does not load the OpenAI
+stack.
 """
 
-from alloy_eval.evaluation import evaluate_functional_correctness
-from alloy_eval.openai.openai_tester import OpenAITester
-from alloy_eval.models import AlloyProblem, EvaluationResult
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from alloy_eval.evaluation import evaluate_functional_correctness
+    from alloy_eval.models import AlloyProblem, EvaluationResult
+    from alloy_eval.openai.openai_tester import OpenAITester
 
 __version__ = "0.1.0"
 __all__ = [
@@ -15,3 +23,23 @@ __all__ = [
     # OpenAI testing
     "OpenAITester",
 ]
+
+# Name -> module defining it
+_LAZY = {
+    "evaluate_functional_correctness": "alloy_eval.evaluation",
+    "AlloyProblem": "alloy_eval.models",
+    "EvaluationResult": "alloy_eval.models",
+    "OpenAITester": "alloy_eval.openai.openai_tester",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY])
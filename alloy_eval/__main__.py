@@ -0,0 +1,49 @@
+"""
+The alloy_eval command.
+
+Each subcommand runs one of the package's tools, imported only when chosen:
+
+    alloy_eval compare results/a.json results/b.json
+    alloy_eval analyze results.json
+    alloy_eval export results/*.json --store runs
+    alloy_eval breakdown runs --by model domain
+    alloy_eval index-problems data/*_problems.jsonl --only 'graph/*'
+    alloy_eval calibrate-timeouts data/*_problems.jsonl --alloy-path alloy
+"""
+
+import importlib
+import sys
+
+# Subcommand -> (module with a main(), description)
+COMMANDS = {
+    "compare": ("alloy_eval.compare", "Leaderboard and regressions across runs"),
+    "analyze": ("alloy_eval.analyze_results", "Analyze a results file"),
+    "export": ("alloy_eval.result_store", "Export results files to the run store"),
+    "breakdown": ("alloy_eval.run_analytics", "Break down stored runs"),
+    "index-problems": (
+        "alloy_eval.problem_store",
+        "Index problems files and list selected problems",
+    ),
+    "calibrate-timeouts": (
+        "alloy_eval.timeouts",
+        "Record solve times for adaptive timeouts",
+    ),
+}
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print("usage: alloy_eval <command> [options]\n\ncommands:")
+        for command, (_, description) in COMMANDS.items():
+            print(f"  {command:<20} {description}")
+        sys.exit(0 if sys.argv[1:2] in (["-h"], ["--help"]) else 2)
+
+    command = sys.argv[1]
+    module = importlib.import_module(COMMANDS[command][0])
+    # The tools parse sys.argv themselves
+    sys.argv = [f"alloy_eval {command}", *sys.argv[2:]]
+    module.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import re
+from typing import NamedTuple
+
+
+class Token(NamedTuple):
+    """A lexical token of Alloy source."""
+
+    kind: str  # "ident", "number" or "op"
+    text: str
+    line: int
+    column: int
+
+
+class LexError(Exception):
+    """Raised on characters that cannot start an Alloy token."""
+
+    def __init__(self, message: str, line: int, column: int):
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+
+# Longest operators first so that e.g. "<=>" is not split into "<=" and ">"
+OPERATORS = [
+    ">>>", "<=>", "<<", ">>", "=>", "=<", ">=", "<=", "!=", "->", "++", "<:", ":>", "||", "&&",
+    "{", "}", "(", ")", "[", "]", ",", ":", "|", ".", "~", "^", "*", "#",
+    "+", "-", "&", "=", "<", ">", "!", "@", ";", "'",
+]  # fmt: skip
+
+TOKEN_RE = re.compile(
+    r"(?P<space>\s+)"
+    r"|(?P<comment>//[^\n]*|--[^\n]*|/\*.*?\*/)"
+    r"|(?P<ident>[A-Za-z][A-Za-z0-9_'\"]*(?:/[A-Za-z][A-Za-z0-9_'\"]*)*)"
+    r"|(?P<number>\d+)"
+    r"|(?P<op>" + "|".join(re.escape(op) for op in OPERATORS) + r")",
+    re.DOTALL,
+)
+
+
+def tokenize(source: str) -> list[Token]:
+    """
+    Split Alloy source into tokens, dropping whitespace and comments.
+
+    Args:
+        source: The Alloy source text
+
+    Returns:
+        The list of tokens
+
+    Raises:
+        LexError: If the source contains a character Alloy does not accept
+    """
+    tokens = []
+    line, line_start, pos = 1, 0, 0
+    while pos < len(source):
+        match = TOKEN_RE.match(source, pos)
+        if match is None:
+            raise LexError(
+                f"Unexpected character {source[pos]!r}", line, pos - line_start + 1
+            )
+        kind = match.lastgroup
+        text = match.group()
+        if kind not in ("space", "comment"):
+            tokens.append(Token(kind, text, line, pos - line_start + 1))
+        newlines = text.count("\n")
+        if newlines:
+            line += newlines
+            line_start = pos + text.rindex("\n") + 1
+        pos = match.end()
+    return tokens
@@ -0,0 +1,170 @@
+"""
+Parsing of Alloy analyzer output into structured verdicts.
+
+Two output styles are understood, in any mix:
+
+- the command table of ``alloy exec``::
+
+      00. check undirected        0    UNSAT
+      01. run   show              1/1  SAT
+
+- the reporter log of the analyzer, which also carries solver statistics::
+
+      Executing "Check undirected for 4"
+         Solver=sat4j Bitwidth=4 MaxSeq=4 SkolemDepth=1 Symmetry=20 Mode=batch
+         1204 vars. 48 primary vars. 2783 clauses. 31ms.
+         No counterexample found. Assertion may be valid. 5ms.
+
+Errors are reported as, e.g., ``Syntax error in x.als at line 7 column 12:``
+followed by the analyzer's message.
+"""
+
+import re
+from typing import Any, NamedTuple
+
+from alloy_eval.models import CommandVerdict
+
+TABLE_LINE_RE = re.compile(
+    r"^\s*\d+\.\s+(check|run)\s+(\S+)\s.*?\b(UNSAT|SAT)\b(?:.*?(\d+)\s*ms)?",
+    re.MULTILINE,
+)
+EXECUTING_RE = re.compile(r'^Executing "(Check|Run) (\S+)', re.IGNORECASE)
+SOLVER_RE = re.compile(r"\bSolver=(\S+)")
+SIZE_RE = re.compile(
+    r"(\d+) vars\. (\d+) primary vars\. (\d+) clauses\. (\d+)ms\.", re.IGNORECASE
+)
+OUTCOME_RE = re.compile(
+    r"^(No counterexample found|Counterexample found|"
+    r"No instance found|Instance found)\b.*?(\d+)ms\.",
+    re.IGNORECASE,
+)
+ERROR_RE = re.compile(r"\b(Syntax|Type) error\b[^\n]*")
+POSITION_RE = re.compile(r"\bline (\d+) column (\d+)")
+
+# Error of a run abandoned because another solver answered first
+CANCELLED = "Cancelled"
+
+
+class AnalyzerOutput(NamedTuple):
+    """Everything an analyzer run reported."""
+
+    commands: list[CommandVerdict]
+    error: str | None = None  # e.g. "Syntax Error", or a failure description
+    message: str | None = None  # the analyzer's error message, if any
+    line: int | None = None
+    column: int | None = None
+
+    def check_verdicts(self) -> dict[str, bool]:
+        """Map each check command to whether it passed (no counterexample)."""
+        return {c.name: not c.satisfiable for c in self.commands if c.check}
+
+    def decisive(self) -> bool:
+        """Whether the run reached a verdict, rather than timing out or failing."""
+        if self.error is not None:
+            return self.error in ("Syntax Error", "Type Error")
+        return any(c.check for c in self.commands)
+
+    def verdict(self) -> tuple[bool, str | None]:
+        """
+        Overall verdict, as returned by check_alloy_solution.
+
+        Returns:
+            Tuple of (passed, error message or None)
+        """
+        if self.error is not None:
+            return False, self.error
+        checks = [c for c in self.commands if c.check]
+        if not checks:
+            return False, "Unknown error"
+        if any(c.satisfiable for c in checks):
+            return False, "Counterexample found"
+        return True, None
+
+
+def parse_alloy_output(text: str) -> AnalyzerOutput:
+    """
+    Parse the console output of an analyzer run.
+
+    Args:
+        text: The analyzer's output (stdout and stderr)
+
+    Returns:
+        The per-command verdicts, or the error that stopped the run
+    """
+    error = ERROR_RE.search(text)
+    if error is not None:
+        position = POSITION_RE.search(error.group())
+        message = text[error.end() :].strip() or error.group().partition(":")[2]
+        return AnalyzerOutput(
+            [],
+            f"{error.group(1)} Error",
+            message.strip() or None,
+            int(position.group(1)) if position else None,
+            int(position.group(2)) if position else None,
+        )
+
+    commands: dict[str, CommandVerdict] = {}
+    for kind, name, outcome, ms in TABLE_LINE_RE.findall(text):
+        commands[name] = CommandVerdict(
+            name=name,
+            check=kind == "check",
+            satisfiable=outcome == "SAT",
+            solve_ms=int(ms) if ms else None,
+        )
+
+    # The reporter log adds statistics, and verdicts the table may lack
+    stats: dict[str, Any] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if match := EXECUTING_RE.match(line):
+            stats = {"name": match.group(2), "check": match.group(1).lower() == "check"}
+        elif not stats:
+            continue
+        elif match := SOLVER_RE.search(line):
+            stats["solver"] = match.group(1)
+        elif match := SIZE_RE.match(line):
+            total, primary, clauses, ms = map(int, match.groups())
+            stats.update(
+                total_vars=total,
+                primary_vars=primary,
+                clauses=clauses,
+                translation_ms=ms,
+            )
+        elif match := OUTCOME_RE.match(line):
+            found = not match.group(1).lower().startswith("no ")
+            name = stats["name"]
+            known = commands.get(name)
+            commands[name] = CommandVerdict(
+                **{
+                    **(known.model_dump(exclude_none=True) if known else {}),
+                    **stats,
+                    "satisfiable": found,
+                    "solve_ms": int(match.group(2)),
+                }
+            )
+            stats = {}
+
+    return AnalyzerOutput(list(commands.values()))
+
+
+def parse_worker_response(response: dict[str, Any]) -> AnalyzerOutput:
+    """
+    Convert a pool worker response into an AnalyzerOutput.
+
+    Args:
+        response: The response of AlloyWorkerPool.run
+
+    Returns:
+        The per-command verdicts, or the error that stopped the run
+    """
+    if response["error"]:
+        return AnalyzerOutput(
+            [],
+            response["error"],
+            response.get("message"),
+            response.get("line"),
+            response.get("column"),
+        )
+    return AnalyzerOutput(
+        [CommandVerdict(**command) for command in response["commands"]]
+    )
@@ -0,0 +1,759 @@
+"""
+Pure-Python parser for the formula language of Alloy predicate bodies.
+
+The parser is used as a preflight check: it finds solutions the analyzer is
+certain to reject (unbalanced brackets, unknown names, expressions where a
+formula is expected, arity mismatches) without starting a JVM. It reports the
+same error categories as the analyzer ("Syntax Error" and "Type Error").
+
+The check is conservative. Constructs it does not model (temporal operators,
+module imports, ``@`` references, ...) make it give up, and the solution is
+left to the analyzer. Arity is only compared when it is known on both sides.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from alloy_eval.alloy_lexer import LexError, Token, tokenize
+from alloy_eval.models import AlloyProblem
+
+QUANTIFIERS = {"all", "some", "no", "lone", "one"}
+MULTIPLICITIES = {"some", "no", "lone", "one"}
+DECL_MULTIPLICITIES = {"some", "lone", "one", "set"}
+COMPARISONS = {"in", "=", "<", ">", "=<", ">="}
+LOGICAL_OPERATORS = {"and", "or", "implies", "iff", "else"}
+
+# Alloy keywords the parser does not model; seeing one makes it give up
+UNSUPPORTED = {
+    "always", "eventually", "after", "before", "historically", "once", "until",
+    "releases", "since", "triggered", "steps", "seq", "fun", "pred", "int",
+    "exactly", "disj", "enum", "var", "@", "'", ";", "<=", "<<", ">>",
+    ">>>",
+}  # fmt: skip
+KEYWORDS = (
+    QUANTIFIERS
+    | DECL_MULTIPLICITIES
+    | {"and", "or", "not", "implies", "iff", "else", "in", "let", "sum"}
+    | {"abstract", "extends", "sig", "fact", "assert", "check", "run", "open"}
+    | {"module", "as", "but", "for", "private", "none", "univ", "iden", "this"}
+    | UNSUPPORTED
+)
+
+# Names every module can use; their types are not modelled
+BUILTINS = {"plus", "minus", "mul", "div", "rem", "max", "min", "next", "prev"}
+
+# Characters that can never appear in Alloy source outside comments
+ILLEGAL_CHARACTERS = set("`?%\\")
+
+
+class Value(NamedTuple):
+    """The type of a parsed expression, as far as the parser tracks it."""
+
+    kind: str  # "formula", "expr", "int" or "any" (not tracked)
+    arity: int | None = None
+
+
+FORMULA = Value("formula")
+INT = Value("int")
+ANY = Value("any")
+
+
+def relation(arity: int | None) -> Value:
+    return Value("expr", arity)
+
+
+class PreflightError(Exception):
+    """An error the Alloy analyzer is certain to report for a solution."""
+
+    def __init__(self, category: str, message: str, line: int, column: int):
+        super().__init__(f"{message} (line {line}, column {column})")
+        self.category = category
+        self.line = line
+        self.column = column
+
+
+class Unsupported(Exception):
+    """Raised when the source uses a construct the parser does not model."""
+
+
+class Environment(NamedTuple):
+    """Names a predicate body can refer to."""
+
+    names: dict[str, Value]
+    closed: bool  # True if no other name can be in scope (no imports)
+
+
+class Node(NamedTuple):
+    """A node of the syntax tree, with the type the parser inferred for it."""
+
+    op: str  # the operator, e.g. "and", ".", "name", "quantifier"
+    value: Value
+    args: tuple = ()
+    token: Token | None = None
+
+
+class Parser:
+    """Recursive descent parser following Alloy's operator precedence."""
+
+    def __init__(self, tokens: list[Token], environment: Environment):
+        self.tokens = tokens
+        self.pos = 0
+        self.environment = environment
+        self.scopes: list[dict[str, Value]] = []
+        self.declared: set[str] = set()
+
+    # Token helpers
+
+    def peek(self, offset: int = 0) -> Token | None:
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def at(self, *texts: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.text in texts
+
+    def advance(self) -> Token:
+        token = self.peek()
+        if token is None:
+            self.fail("Syntax Error", "Unexpected end of predicate body")
+        self.pos += 1
+        if token.text in UNSUPPORTED:
+            raise Unsupported(token.text)
+        return token
+
+    def expect(self, text: str) -> Token:
+        if not self.at(text):
+            token = self.peek()
+            found = "end of predicate body" if token is None else repr(token.text)
+            self.fail("Syntax Error", f"Expected {text!r} but found {found}")
+        return self.advance()
+
+    def fail(self, category: str, message: str, token: Token | None = None) -> None:
+        token = token or self.peek() or (self.tokens[-1] if self.tokens else None)
+        line, column = (token.line, token.column) if token else (1, 1)
+        raise PreflightError(category, message, line, column)
+
+    def is_name(self, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return (
+            token is not None and token.kind == "ident" and token.text not in KEYWORDS
+        )
+
+    def decl_ahead(self) -> bool:
+        """Whether the next tokens start a declaration: ``[disj] x, y:``."""
+        offset = 1 if self.at("disj") else 0
+        if not self.is_name(offset):
+            return False
+        offset += 1
+        while self.at(",", offset=offset) and self.is_name(offset + 1):
+            offset += 2
+        return self.at(":", offset=offset)
+
+    # Type checks
+
+    def require_formula(self, node: Node) -> None:
+        if node.value.kind in ("expr", "int"):
+            self.fail("Type Error", "This must be a formula expression", node.token)
+
+    def require_expression(self, node: Node) -> None:
+        if node.value.kind == "formula":
+            self.fail("Type Error", "This must be a set or relation", node.token)
+
+    def same_arity(self, op: Token, left: Value, right: Value) -> Value:
+        """Result of an operator requiring operands of the same arity."""
+        if left.kind == "expr" and right.kind == "expr":
+            if None not in (left.arity, right.arity) and left.arity != right.arity:
+                self.fail(
+                    "Type Error",
+                    f"{op.text} can be used only between 2 expressions of the same arity",
+                    op,
+                )
+            return relation(left.arity if left.arity is not None else right.arity)
+        return ANY
+
+    def lookup(self, token: Token) -> Value:
+        name = token.text
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        if name in self.environment.names:
+            return self.environment.names[name]
+        if (
+            name in BUILTINS
+            or any(c in name for c in "/'\"")
+            or name in self.declared
+            or not self.environment.closed
+        ):
+            # Possibly valid, e.g. a variable used after its quantifier ended
+            raise Unsupported(name)
+        self.fail("Syntax Error", f'The name "{name}" cannot be found', token)
+
+    # Grammar, from the loosest binding level to the tightest
+
+    def body(self) -> list[Node]:
+        """Parse a predicate body: a sequence of formulas."""
+        # An unsupported operator left after an operand would otherwise end
+        # that formula early, and the operand could be reported as a type error
+        for token in self.tokens:
+            if token.text in UNSUPPORTED:
+                raise Unsupported(token.text)
+        formulas = []
+        while self.peek() is not None:
+            formulas.append(self.formula())
+            self.require_formula(formulas[-1])
+        return formulas
+
+    def logical(self, texts: tuple[str, ...], operand) -> Node:
+        """Parse a left-associative chain of a logical operator."""
+        left = operand()
+        while self.at(*texts):
+            op = self.advance()
+            right = operand()
+            self.require_formula(left)
+            self.require_formula(right)
+            left = Node(texts[0], FORMULA, (left, right), left.token)
+        return left
+
+    def formula(self) -> Node:
+        return self.logical(("or", "||"), self.iff)
+
+    def iff(self) -> Node:
+        return self.logical(("iff", "<=>"), self.implies)
+
+    def implies(self) -> Node:
+        condition = self.conjunction()
+        if not self.at("implies", "=>"):
+            return condition
+        self.advance()
+        self.require_formula(condition)
+        then = self.implies()
+        if not self.at("else"):
+            self.require_formula(then)
+            return Node("implies", FORMULA, (condition, then), condition.token)
+        self.advance()
+        otherwise = self.implies()
+        # A conditional expression if both branches are expressions
+        if then.value.kind == otherwise.value.kind == "formula":
+            value = FORMULA
+        elif then.value.kind == otherwise.value.kind == "expr":
+            value = self.same_arity(then.token, then.value, otherwise.value)
+        else:
+            value = ANY
+        return Node("else", value, (condition, then, otherwise), condition.token)
+
+    def conjunction(self) -> Node:
+        return self.logical(("and", "&&"), self.negation)
+
+    def negation(self) -> Node:
+        if self.at("not", "!"):
+            token = self.advance()
+            operand = self.negation()
+            self.require_formula(operand)
+            return Node("not", FORMULA, (operand,), token)
+        return self.comparison()
+
+    def comparison(self) -> Node:
+        left = self.multiplicity()
+
+        negated = self.at("not", "!") and self.at(*COMPARISONS, offset=1)
+        if not (negated or self.at(*COMPARISONS, "!=")):
+            return left
+        if negated:
+            self.advance()
+        op = self.advance()
+        right = self.multiplicity()
+
+        self.require_expression(left)
+        self.require_expression(right)
+        if op.text in ("in", "=", "!="):
+            self.same_arity(op, left.value, right.value)
+        node = Node(op.text, FORMULA, (left, right), left.token)
+        return Node("not", FORMULA, (node,), left.token) if negated else node
+
+    def multiplicity(self) -> Node:
+        if self.at(*MULTIPLICITIES) and not self.at_declaration():
+            token = self.advance()
+            operand = self.multiplicity()
+            self.require_expression(operand)
+            return Node(token.text, FORMULA, (operand,), token)
+        return self.union()
+
+    def at_declaration(self) -> bool:
+        """Whether a quantifier keyword is followed by declarations."""
+        self.pos += 1
+        try:
+            return self.decl_ahead()
+        finally:
+            self.pos -= 1
+
+    def same_arity_chain(self, texts: tuple[str, ...], operand) -> Node:
+        """Parse a left-associative chain of operators on same-arity operands."""
+        left = operand()
+        while self.at(*texts):
+            op = self.advance()
+            right = operand()
+            self.require_expression(left)
+            self.require_expression(right)
+            value = self.same_arity(op, left.value, right.value)
+            left = Node(op.text, value, (left, right), left.token)
+        return left
+
+    def union(self) -> Node:
+        return self.same_arity_chain(("+", "-"), self.cardinality)
+
+    def cardinality(self) -> Node:
+        if self.at("#"):
+            token = self.advance()
+            operand = self.cardinality()
+            self.require_expression(operand)
+            return Node("#", INT, (operand,), token)
+        return self.override()
+
+    def override(self) -> Node:
+        return self.same_arity_chain(("++",), self.intersection)
+
+    def intersection(self) -> Node:
+        return self.same_arity_chain(("&",), self.product)
+
+    def product(self) -> Node:
+        left = self.domain_restriction()
+        while self.at("->") or (
+            self.at(*DECL_MULTIPLICITIES) and self.at("->", offset=1)
+        ):
+            if not self.at("->"):
+                raise Unsupported("multiplicity arrow")
+            self.advance()
+            if self.at(*DECL_MULTIPLICITIES):
+                raise Unsupported("multiplicity arrow")
+            right = self.domain_restriction()
+            self.require_expression(left)
+            self.require_expression(right)
+            if left.value.kind == right.value.kind == "expr":
+                arities = (left.value.arity, right.value.arity)
+                value = relation(None if None in arities else sum(arities))
+            else:
+                value = ANY
+            left = Node("->", value, (left, right), left.token)
+        return left
+
+    def domain_restriction(self) -> Node:
+        left = self.range_restriction()
+        while self.at("<:"):
+            self.advance()
+            right = self.range_restriction()
+            self.require_expression(left)
+            self.require_expression(right)
+            value = right.value if right.value.kind == "expr" else ANY
+            left = Node("<:", value, (left, right), left.token)
+        return left
+
+    def range_restriction(self) -> Node:
+        left = self.box_join()
+        while self.at(":>"):
+            self.advance()
+            right = self.box_join()
+            self.require_expression(left)
+            self.require_expression(right)
+            value = left.value if left.value.kind == "expr" else ANY
+            left = Node(":>", value, (left, right), left.token)
+        return left
+
+    def box_join(self) -> Node:
+        left = self.join()
+        while self.at("["):
+            self.advance()
+            arguments = [self.formula()]
+            while self.at(","):
+                self.advance()
+                arguments.append(self.formula())
+            bracket = self.expect("]")
+            self.require_expression(left)
+            # e[a, b] is b.(a.e)
+            for argument in arguments:
+                value = self.joined(bracket, argument.value, left.value)
+                left = Node(".", value, (argument, left), left.token)
+        return left
+
+    def join(self) -> Node:
+        left = self.unary()
+        while self.at("."):
+            op = self.advance()
+            right = self.unary()
+            self.require_expression(left)
+            self.require_expression(right)
+            value = self.joined(op, left.value, right.value)
+            left = Node(".", value, (left, right), left.token)
+        return left
+
+    def joined(self, op: Token, left: Value, right: Value) -> Value:
+        """Result of the relational join left.right."""
+        if left.kind != "expr" or right.kind != "expr":
+            return ANY
+        if left.arity is None or right.arity is None:
+            return relation(None)
+        arity = left.arity + right.arity - 2
+        if arity < 1:
+            self.fail("Type Error", "The join of two sets is always empty", op)
+        return relation(arity)
+
+    def unary(self) -> Node:
+        if self.at("~", "^", "*"):
+            op = self.advance()
+            operand = self.unary()
+            self.require_expression(operand)
+            if operand.value.kind == "expr" and operand.value.arity not in (None, 2):
+                self.fail(
+                    "Type Error",
+                    f"{op.text} can be used only with a binary relation",
+                    op,
+                )
+            value = relation(2) if operand.value.kind == "expr" else ANY
+            return Node(op.text, value, (operand,), op)
+        return self.primary()
+
+    def primary(self) -> Node:
+        token = self.peek()
+        if token is None:
+            self.fail("Syntax Error", "Unexpected end of predicate body")
+
+        if token.kind == "number":
+            self.advance()
+            return Node("number", INT, (int(token.text),), token)
+        if token.text == "-" and self.peek(1) and self.peek(1).kind == "number":
+            self.advance()
+            number = self.advance()
+            return Node("number", INT, (-int(number.text),), token)
+        if token.text == "(":
+            self.advance()
+            node = self.formula()
+            self.expect(")")
+            return node._replace(token=token)
+        if token.text == "{":
+            return self.braces()
+        if token.text in QUANTIFIERS and self.at_declaration():
+            return self.quantified()
+        if token.text == "sum" and self.at_declaration():
+            return self.quantified()
+        if token.text == "let":
+            return self.let()
+        if token.text in ("none", "univ", "Int", "String"):
+            self.advance()
+            return Node(token.text, relation(1), (), token)
+        if token.text == "iden":
+            self.advance()
+            return Node("iden", relation(2), (), token)
+        if token.text == "this" and "this" in self.environment.names:
+            self.advance()
+            return Node("name", self.environment.names["this"], ("this",), token)
+        if self.is_name():
+            self.advance()
+            return Node("name", self.lookup(token), (token.text,), token)
+        if token.text in UNSUPPORTED or (
+            token.kind == "ident" and token.text not in LOGICAL_OPERATORS
+        ):
+            # A keyword in an unexpected place; leave the verdict to Alloy
+            raise Unsupported(token.text)
+        self.fail("Syntax Error", f"Unexpected {token.text!r}", token)
+
+    def braces(self) -> Node:
+        """Parse a block of formulas or a set comprehension."""
+        token = self.advance()
+        if self.decl_ahead():
+            declarations = self.declarations()
+            self.expect("|")
+            body = self.formula()
+            self.require_formula(body)
+            self.scopes.pop()
+            self.expect("}")
+            arity = sum(len(names) for names, _ in declarations)
+            return Node("comprehension", relation(arity), (declarations, body), token)
+        return Node("block", FORMULA, self.block_body(), token)
+
+    def block_body(self) -> tuple[Node, ...]:
+        """Parse formulas up to the closing brace of a block."""
+        formulas = []
+        while not self.at("}"):
+            formulas.append(self.formula())
+            self.require_formula(formulas[-1])
+        self.advance()
+        return tuple(formulas)
+
+    def quantified(self) -> Node:
+        quantifier = self.advance()
+        declarations = self.declarations()
+        if self.at("{") and quantifier.text != "sum":
+            body = Node("block", FORMULA, (), self.advance())
+            body = body._replace(args=self.block_body())
+        else:
+            self.expect("|")
+            body = self.formula()
+            if quantifier.text != "sum":
+                self.require_formula(body)
+        self.scopes.pop()
+        value = INT if quantifier.text == "sum" else FORMULA
+        return Node(
+            "quantifier", value, (quantifier.text, declarations, body), quantifier
+        )
+
+    def declarations(self) -> tuple[tuple[tuple[str, ...], Node], ...]:
+        """
+        Parse ``x, y: [mult] bound, ...`` and open a scope with the variables.
+
+        The caller pops the scope once the declarations go out of scope.
+        Returns (names, bound) pairs.
+        """
+        scope: dict[str, Value] = {}
+        declarations = []
+        self.scopes.append(scope)
+        while True:
+            if self.at("disj"):
+                raise Unsupported("disj")
+            if not self.is_name():
+                self.fail("Syntax Error", "Expected a variable name")
+            names = [self.advance().text]
+            while self.at(","):
+                self.advance()
+                if not self.is_name():
+                    self.fail("Syntax Error", "Expected a variable name")
+                names.append(self.advance().text)
+            self.expect(":")
+            if self.at(*DECL_MULTIPLICITIES):
+                if not self.at("one"):
+                    raise Unsupported("higher-order declaration")
+                self.advance()
+            # Later declarations see the earlier variables, but not these ones
+            self.scopes.pop()
+            bound = self.union()
+            self.scopes.append(scope)
+            self.require_expression(bound)
+            for name in names:
+                scope[name] = bound.value if bound.value.kind == "expr" else ANY
+                self.declared.add(name)
+            declarations.append((tuple(names), bound))
+            if not self.at(","):
+                return tuple(declarations)
+            self.advance()
+
+    def let(self) -> Node:
+        token = self.advance()
+        scope: dict[str, Value] = {}
+        bindings = []
+        while True:
+            if not self.is_name():
+                self.fail("Syntax Error", "Expected a name to bind")
+            name = self.advance().text
+            self.expect("=")
+            bindings.append((name, self.formula()))
+            scope[name] = bindings[-1][1].value
+            self.declared.add(name)
+            if not self.at(","):
+                break
+            self.advance()
+        self.scopes.append(scope)
+        if self.at("{"):
+            body = Node("block", FORMULA, (), self.advance())
+            body = body._replace(args=self.block_body())
+        else:
+            self.expect("|")
+            body = self.formula()
+        self.scopes.pop()
+        return Node("let", body.value, (tuple(bindings), body), token)
+
+
+def _range_arity(tokens: list[Token]) -> int | None:
+    """Arity of a simple field range such as ``set A`` or ``A -> lone B``."""
+    arity = 1
+    for token in tokens:
+        if token.text == "->":
+            arity += 1
+        elif token.text not in DECL_MULTIPLICITIES and not (
+            token.kind == "ident" and token.text not in KEYWORDS
+        ):
+            return None
+    return arity
+
+
+def _field_declarations(tokens: list[Token]) -> dict[str, Value]:
+    """Parse the field declarations between the braces of a sig."""
+    fields: dict[str, Value] = {}
+    names: list[str] = []
+    i = 0
+    while i < len(tokens):
+        text = tokens[i].text
+        if text in ("var", "disj", "private", ","):
+            i += 1
+        elif text == ":":
+            # The range extends to the next top-level "," followed by names
+            # and ":", or to the end
+            start = i + 1
+            depth = 0
+            j = start
+            while j < len(tokens):
+                if tokens[j].text in ("(", "[", "{"):
+                    depth += 1
+                elif tokens[j].text in (")", "]", "}"):
+                    depth -= 1
+                elif (
+                    depth == 0
+                    and tokens[j].text == ","
+                    and _starts_field(tokens, j + 1)
+                ):
+                    break
+                j += 1
+            arity = _range_arity(tokens[start:j])
+            for name in names:
+                fields[name] = relation(None if arity is None else arity + 1)
+            names = []
+            i = j
+        else:
+            names.append(text)
+            i += 1
+    return fields
+
+
+def _starts_field(tokens: list[Token], i: int) -> bool:
+    while i < len(tokens) and tokens[i].text in ("var", "disj", "private"):
+        i += 1
+    while (
+        i + 1 < len(tokens) and tokens[i].kind == "ident" and tokens[i + 1].text == ","
+    ):
+        i += 2
+    return (
+        i + 1 < len(tokens) and tokens[i].kind == "ident" and tokens[i + 1].text == ":"
+    )
+
+
+def _matching(tokens: list[Token], start: int) -> int:
+    """Index of the bracket closing the one at start (len(tokens) if none)."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i].text in ("(", "[", "{"):
+            depth += 1
+        elif tokens[i].text in (")", "]", "}"):
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(tokens)
+
+
+def parse_signatures(signatures: str) -> Environment:
+    """
+    Collect the sigs, fields and other names declared in a problem's signatures.
+
+    Args:
+        signatures: The Alloy source of the signatures
+
+    Returns:
+        The names with their arity, and whether the list is complete
+    """
+    try:
+        tokens = tokenize(signatures)
+    except LexError:
+        return Environment({}, closed=False)
+
+    names: dict[str, Value] = {}
+    closed = True
+    i = 0
+    while i < len(tokens):
+        text = tokens[i].text
+        if text == "open":
+            closed = False
+        elif text in ("sig", "enum"):
+            i += 1
+            while i < len(tokens) and tokens[i].text not in ("{", "extends", "in"):
+                if tokens[i].text != ",":
+                    names[tokens[i].text] = relation(1)
+                i += 1
+            while i < len(tokens) and tokens[i].text != "{":
+                i += 1
+            end = _matching(tokens, i)
+            if text == "enum":
+                for token in tokens[i + 1 : end]:
+                    if token.text != ",":
+                        names[token.text] = relation(1)
+            else:
+                names.update(_field_declarations(tokens[i + 1 : end]))
+            # Skip the appended fact block, if any
+            if end + 1 < len(tokens) and tokens[end + 1].text == "{":
+                end = _matching(tokens, end + 1)
+            i = end
+        elif text in ("pred", "fun", "assert", "fact"):
+            j = i + 1
+            if j + 2 < len(tokens) and tokens[j + 1].text == ".":
+                j += 2
+            if j < len(tokens) and tokens[j].kind == "ident":
+                names[tokens[j].text] = ANY
+        i += 1
+    return Environment(names, closed)
+
+
+@lru_cache(maxsize=None)
+def _problem_environment(
+    signatures: str, predicate_definition: str
+) -> Environment | None:
+    """The environment of a predicate body, or None if it cannot be determined."""
+    environment = parse_signatures(signatures)
+    try:
+        tokens = tokenize(predicate_definition)
+    except LexError:
+        return None
+    if len(tokens) < 3 or tokens[0].text != "pred" or tokens[-1].text != "{":
+        return None
+
+    names = dict(environment.names)
+    i = 1
+    if len(tokens) > 4 and tokens[2].text == ".":
+        names["this"] = relation(1)
+        i = 3
+    names[tokens[i].text] = ANY
+    parameters = tokens[i + 1 : -1]
+    if parameters:
+        if parameters[0].text not in ("[", "(") or len(parameters) < 3:
+            return None
+        parser = Parser(parameters[1:-1], Environment(names, environment.closed))
+        try:
+            parser.declarations()
+            names.update(parser.scopes[-1])
+        except (PreflightError, Unsupported):
+            return None
+        if parser.peek() is not None:
+            return None
+    return Environment(names, environment.closed)
+
+
+def preflight_check(problem: AlloyProblem, solution: str) -> PreflightError | None:
+    """
+    Look for an error the analyzer is certain to report for a solution.
+
+    Args:
+        problem: The Alloy problem
+        solution: The predicate body
+
+    Returns:
+        The error, or None if the solution may be valid
+    """
+    environment = _problem_environment(problem.signatures, problem.predicate_definition)
+    if environment is None:
+        return None
+
+    try:
+        tokens = tokenize(solution)
+    except LexError as e:
+        if solution[_offset(solution, e.line, e.column)] in ILLEGAL_CHARACTERS:
+            return PreflightError("Syntax Error", str(e), e.line, e.column)
+        return None
+
+    parser = Parser(tokens, environment)
+    try:
+        parser.body()
+    except PreflightError as e:
+        return e
+    except Unsupported:
+        return None
+    return None
+
+
+def _offset(source: str, line: int, column: int) -> int:
+    """Character offset of a 1-based line and column."""
+    lines = source.split("\n")
+    return sum(len(text) + 1 for text in lines[: line - 1]) + column - 1
@@ -0,0 +1,318 @@
+import importlib.util
+import json
+import queue
+import selectors
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from alloy_eval.alloy_output import CANCELLED, parse_worker_response
+from alloy_eval.tracing import traced
+
+# Seconds between checks for cancellation while waiting for a worker
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class WorkerError(Exception):
+    """Raised when a worker dies or stops answering."""
+
+
+class RequestCancelled(Exception):
+    """Raised when a request is cancelled before its response arrives."""
+
+
+class AlloyWorker:
+    """A single long-lived analyzer process speaking the JSON line protocol."""
+
+    def __init__(self, alloy_jar: str | Path, startup_timeout: float = 120.0):
+        """
+        Initialize and start the worker.
+
+        Args:
+            alloy_jar: Path to the Alloy jar
+            startup_timeout: Seconds to wait for the JVM to come up
+        """
+        self.alloy_jar = str(alloy_jar)
+        self.startup_timeout = startup_timeout
+        self.process: subprocess.Popen | None = None
+        self.last_used = 0.0
+        self.start()
+
+    @traced("alloy_worker_start")
+    def start(self) -> None:
+        """Launch the worker process and wait until it reports ready."""
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "alloy_eval.alloy_worker", self.alloy_jar],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._read(self.startup_timeout)
+        self.last_used = time.monotonic()
+
+    def stop(self) -> None:
+        """Terminate the worker process."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+
+    def restart(self) -> None:
+        """Replace a crashed or hung worker with a fresh process."""
+        self.stop()
+        self.start()
+
+    def is_alive(self) -> bool:
+        """Check whether the worker process is still running."""
+        return self.process is not None and self.process.poll() is None
+
+    def request(
+        self,
+        payload: dict[str, Any],
+        timeout: float,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        """
+        Send one request and wait for its response.
+
+        Args:
+            payload: The request object
+            timeout: Seconds to wait for the response
+            cancel: Optional event that abandons the wait when set
+
+        Returns:
+            The decoded response object
+        """
+        if not self.is_alive():
+            raise WorkerError("Worker is not running")
+        try:
+            self.process.stdin.write(json.dumps(payload) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WorkerError(f"Worker pipe closed: {e}") from e
+        response = self._read(timeout, cancel)
+        self.last_used = time.monotonic()
+        return response
+
+    def drain(self, timeout: float) -> None:
+        """
+        Wait for and discard the response of an abandoned request.
+
+        Args:
+            timeout: Seconds to wait for the response
+        """
+        self._read(timeout)
+        self.last_used = time.monotonic()
+
+    def ping(self, timeout: float = 5.0) -> bool:
+        """Health check: return True if the worker answers a ping in time."""
+        try:
+            return bool(self.request({"op": "ping"}, timeout).get("ok"))
+        except (WorkerError, TimeoutError):
+            return False
+
+    def _read(
+        self, timeout: float, cancel: threading.Event | None = None
+    ) -> dict[str, Any]:
+        """Read one response line, raising TimeoutError if none arrives."""
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stdout, selectors.EVENT_READ)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Worker did not answer in time")
+                if cancel is not None:
+                    remaining = min(remaining, CANCEL_POLL_INTERVAL)
+                if selector.select(remaining):
+                    break
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled()
+        line = self.process.stdout.readline()
+        if not line:
+            raise WorkerError("Worker exited unexpectedly")
+        return json.loads(line)
+
+
+class AlloyWorkerPool:
+    """
+    Pool of persistent Alloy analyzer workers.
+
+    Each worker keeps a warm JVM with Alloy loaded, so a check only pays for
+    parsing and solving instead of a full JVM cold start. Workers that crash,
+    hang past the check timeout or fail a health check are restarted. A
+    cancelled run leaves its worker solving: the worker rejoins the pool once
+    its response has been drained, and is only restarted if that response
+    does not arrive within the run's timeout.
+    """
+
+    def __init__(
+        self,
+        alloy_jar: str | Path,
+        size: int = 4,
+        health_check_interval: float = 60.0,
+    ):
+        """
+        Initialize the pool and start its workers.
+
+        Args:
+            alloy_jar: Path to the Alloy jar
+            size: Number of worker processes
+            health_check_interval: Ping workers idle for longer than this many seconds
+                before handing them out
+        """
+        if importlib.util.find_spec("jpype") is None:
+            raise ImportError(
+                "The Alloy worker pool requires JPype: pip install 'alloy_eval[pool]'"
+            )
+        self.alloy_jar = str(alloy_jar)
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.workers = [AlloyWorker(self.alloy_jar) for _ in range(size)]
+        self._closed = False
+        self._idle: queue.Queue[AlloyWorker] = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+    @property
+    def version(self) -> str:
+        """Identify the Alloy jar the workers run, for cache keys."""
+        stat = Path(self.alloy_jar).stat()
+        return f"{Path(self.alloy_jar).name}:{stat.st_size}:{stat.st_mtime}"
+
+    def __enter__(self) -> "AlloyWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop all workers."""
+        self._closed = True
+        for worker in self.workers:
+            worker.stop()
+
+    @staticmethod
+    def _restart(worker: AlloyWorker) -> str | None:
+        """
+        Restart a worker.
+
+        A worker that does not come up is left stopped, and stays in the
+        pool: the next run handed it tries to start it again.
+
+        Returns:
+            None, or the error that kept the worker from starting
+        """
+        try:
+            worker.restart()
+        except (TimeoutError, WorkerError, OSError, ValueError) as e:
+            worker.stop()
+            return f"Worker restart failed: {e}"
+        return None
+
+    def _acquire(self) -> AlloyWorker:
+        """
+        Take an idle worker, making sure it is healthy.
+
+        Raises:
+            WorkerError: If an unhealthy worker cannot be restarted; it is
+                put back in the pool
+        """
+        worker = self._idle.get()
+        idle_for = time.monotonic() - worker.last_used
+        if not worker.is_alive() or (
+            idle_for > self.health_check_interval and not worker.ping()
+        ):
+            error = self._restart(worker)
+            if error is not None:
+                self._idle.put(worker)
+                raise WorkerError(error)
+        return worker
+
+    def _drain(self, worker: AlloyWorker, timeout: float) -> None:
+        """Return a worker busy with a cancelled run once it has answered."""
+        try:
+            worker.drain(timeout)
+        except (TimeoutError, WorkerError):
+            if not self._closed:
+                self._restart(worker)
+        finally:
+            self._idle.put(worker)
+
+    def run(
+        self,
+        content: str,
+        timeout: int = 30,
+        solver: str | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run every command of an Alloy module on a pooled worker.
+
+        Args:
+            content: The Alloy source to analyze
+            timeout: Seconds before the run is abandoned and the worker restarted
+            solver: Id of the SAT solver to use (default: the analyzer's)
+            cancel: Optional event that abandons the run when set; the worker
+                rejoins the pool once it has finished the run
+
+        Returns:
+            The worker response; failures are reported in its "error" key
+        """
+        try:
+            worker = self._acquire()
+        except WorkerError as e:
+            return {"commands": [], "error": f"Error: {e}"}
+        payload = {"op": "check", "content": content}
+        if solver is not None:
+            payload["solver"] = solver
+        start = time.monotonic()
+        release = True
+        try:
+            if cancel is not None and cancel.is_set():
+                return {"commands": [], "error": CANCELLED}
+            response = worker.request(payload, timeout, cancel)
+        except RequestCancelled:
+            # Restarting would cost a JVM start for every losing solver of a
+            # race; let the worker finish the run in the background instead
+            release = False
+            remaining = max(timeout - (time.monotonic() - start), 0.0)
+            threading.Thread(
+                target=self._drain, args=(worker, remaining), daemon=True
+            ).start()
+            return {"commands": [], "error": CANCELLED}
+        except TimeoutError:
+            # A worker that fails to restart is retried by the next run
+            self._restart(worker)
+            return {"commands": [], "error": "Timeout: Alloy check took too long"}
+        except WorkerError as e:
+            error = self._restart(worker)
+            message = f"{e}; {error}" if error is not None else str(e)
+            return {"commands": [], "error": f"Error: {message}"}
+        finally:
+            if release:
+                self._idle.put(worker)
+
+        if not response.get("ok"):
+            return {"commands": [], "error": f"Error: {response.get('error')}"}
+        return response
+
+    def check(self, content: str, timeout: int = 30) -> tuple[bool, str | None]:
+        """
+        Check an Alloy module on a pooled worker.
+
+        Args:
+            content: The Alloy source to analyze
+            timeout: Seconds before the check is abandoned and the worker restarted
+
+        Returns:
+            Tuple of (passed, error message or None), as check_alloy_solution
+        """
+        return parse_worker_response(self.run(content, timeout)).verdict()
@@ -0,0 +1,137 @@
+"""
+Long-lived Alloy analyzer worker.
+
+The worker loads the Alloy jar into a single JVM (through JPype) and then
+answers requests read from stdin, one JSON object per line:
+
+    {"op": "ping"}
+    {"op": "check", "content": "<.als source>", "solver": "sat4j"}
+
+The optional ``solver`` is the id of one of the SAT solvers bundled with
+Alloy (e.g. "sat4j", "minisat(jni)"); the analyzer's default is used without it.
+
+Every request gets exactly one JSON line back on stdout. A ``{"ready": true}``
+line is written once the JVM is up so the pool knows the worker can be used.
+"""
+
+import json
+import sys
+import time
+from typing import Any
+
+
+class AlloyAPI:
+    """Thin wrapper around the Alloy Java API."""
+
+    def __init__(self, alloy_jar: str):
+        """
+        Start the JVM and resolve the Alloy classes.
+
+        Args:
+            alloy_jar: Path to the Alloy distribution jar
+        """
+        import jpype
+        import jpype.imports  # noqa: F401
+
+        jpype.startJVM(classpath=[alloy_jar], convertStrings=True)
+
+        self.A4Reporter = jpype.JClass("edu.mit.csail.sdg.alloy4.A4Reporter")
+        self.CompUtil = jpype.JClass("edu.mit.csail.sdg.parser.CompUtil")
+        self.A4Options = jpype.JClass("edu.mit.csail.sdg.translator.A4Options")
+        self.solvers = {
+            str(solver.id()): solver for solver in self.A4Options.SatSolver.values()
+        }
+        self.TranslateAlloyToKodkod = jpype.JClass(
+            "edu.mit.csail.sdg.translator.TranslateAlloyToKodkod"
+        )
+        self.ErrorSyntax = jpype.JClass("edu.mit.csail.sdg.alloy4.ErrorSyntax")
+        self.ErrorType = jpype.JClass("edu.mit.csail.sdg.alloy4.ErrorType")
+        self.Err = jpype.JClass("edu.mit.csail.sdg.alloy4.Err")
+
+    def check(self, content: str, solver: str | None = None) -> dict[str, Any]:
+        """
+        Parse and execute every command in an Alloy module.
+
+        Args:
+            content: The Alloy source to analyze
+            solver: Id of the SAT solver to use (default: the analyzer's)
+
+        Returns:
+            A response dictionary with the per-command outcomes or the error
+        """
+        if solver is not None and solver not in self.solvers:
+            return {"ok": False, "error": f"Unknown solver {solver!r}"}
+        reporter = self.A4Reporter.NOP
+        try:
+            world = self.CompUtil.parseEverything_fromString(reporter, content)
+            options = self.A4Options()
+            if solver is not None:
+                options.solver = self.solvers[solver]
+            commands = []
+            for command in world.getAllCommands():
+                start = time.perf_counter()
+                solution = self.TranslateAlloyToKodkod.execute_command(
+                    reporter, world.getAllReachableSigs(), command, options
+                )
+                commands.append(
+                    {
+                        "name": str(command.label),
+                        "check": bool(command.check),
+                        "satisfiable": bool(solution.satisfiable()),
+                        "solver": str(options.solver.id()),
+                        # The API does not time translation separately
+                        "solve_ms": round((time.perf_counter() - start) * 1000),
+                    }
+                )
+            return {"ok": True, "commands": commands, "error": None}
+        except self.ErrorSyntax as e:
+            return self._error("Syntax Error", e)
+        except self.ErrorType as e:
+            return self._error("Type Error", e)
+        except self.Err as e:
+            return self._error(f"Error: {e}", e)
+
+    @staticmethod
+    def _error(category: str, e: Any) -> dict[str, Any]:
+        """Response for an analyzer error, with its position when known."""
+        known = e.pos is not None and e.pos.y > 0
+        return {
+            "ok": True,
+            "commands": [],
+            "error": category,
+            "message": str(e.msg),
+            "line": int(e.pos.y) if known else None,
+            "column": int(e.pos.x) if known else None,
+        }
+
+
+def serve(alloy_jar: str) -> None:
+    """Answer requests from stdin until it is closed."""
+    api = AlloyAPI(alloy_jar)
+    print(json.dumps({"ready": True}), flush=True)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        op = request.get("op")
+        if op == "ping":
+            response = {"ok": True}
+        elif op == "check":
+            response = api.check(request["content"], request.get("solver"))
+        else:
+            response = {"ok": False, "error": f"Unknown op: {op}"}
+        print(json.dumps(response), flush=True)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Persistent Alloy analyzer worker")
+    parser.add_argument("alloy_jar", help="Path to the Alloy jar")
+    args = parser.parse_args()
+    serve(args.alloy_jar)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
+"""
+Analyze Alloy evaluation results.
+
+Results are streamed (see ResultsReader) and aggregated as they are read, so
+memory use does not grow with the number of results and multi-GB files are
+analyzed in one linear pass.
+
+Usage:
+    python -m alloy_eval.analyze_results results.json
+"""
+
+import heapq
+import itertools
 import json
 from collections import defaultdict
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import track
 
+from alloy_eval.metrics import (
+    DEFAULT_KS,
+    PassCounts,
+    display_pass_at_k,
+    pass_at_k_table,
+)
+from alloy_eval.results_reader import ResultsReader
+
 console = Console()
 
 
@@ -33,54 +54,209 @@ def get_error_type(error_message: str | None) -> str:
         return "Other Failure"
 
 
-def analyze_results(results: dict[str, Any]) -> None:
-    """Analyze and display results in a visual format."""
-    # Display header
-    console.print(
-        Panel.fit(
-            f"[bold blue]Results Analysis[/bold blue]\n"
-            f"Model: [green]{results['model']}[/green]"
-        )
+def solver_time(result: dict[str, Any]) -> int:
+    """Analyzer milliseconds spent on a result (translation and solving)."""
+    return sum(
+        (command.get("translation_ms") or 0) + (command.get("solve_ms") or 0)
+        for command in result.get("commands") or []
     )
 
-    # Group results by predicate type
-    predicate_results = defaultdict(
-        lambda: {
-            "total": 0,
-            "success": 0,
-            "counterexample": 0,
-            "other_failure": 0,
-            "error_types": defaultdict(int),
-        }
-    )
 
-    # Process each result
-    for result in track(results["results"], description="Analyzing results"):
-        task_id = result["task_id"]
-        pred_type = get_predicate_type(task_id)
-        passed = result.get("passed", False)
-        error_message = result.get("error_message", None)
-        error = result.get("error", None)
+class SolverBudget:
+    """Keeps the solutions that took the analyzer the longest, one result at a time."""
+
+    def __init__(self, top: int = 10):
+        """
+        Initialize the budget.
+
+        Args:
+            top: Number of solutions to keep
+        """
+        self.top = top
+        self.total = 0
+        # Min-heap of (time, -arrival, row), so ties keep file order
+        self._heap: list[tuple[int, int, tuple[str, int, int]]] = []
+        self._arrivals = itertools.count()
+
+    def add(self, result: dict[str, Any]) -> None:
+        """Account for one result dictionary."""
+        elapsed = solver_time(result)
+        if elapsed <= 0:
+            return
+        self.total += elapsed
+        commands = result["commands"]
+        entry = (
+            elapsed,
+            -next(self._arrivals),
+            (
+                result["task_id"],
+                sum(c.get("primary_vars") or 0 for c in commands),
+                sum(c.get("clauses") or 0 for c in commands),
+            ),
+        )
+        if len(self._heap) < self.top:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def display(self) -> None:
+        """Show the kept solutions, longest first."""
+        if not self._heap:
+            return
+
+        table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            title=f"[bold]Solver Budget[/bold] ({self.total/1000:.1f}s analyzer time)",
+        )
+        table.add_column("Task")
+        table.add_column("Time (ms)")
+        table.add_column("Share")
+        table.add_column("Primary Vars")
+        table.add_column("Clauses")
+        for elapsed, _, (task_id, primary_vars, clauses) in sorted(
+            self._heap, reverse=True
+        ):
+            table.add_row(
+                task_id,
+                str(elapsed),
+                f"{elapsed/self.total*100:.1f}%",
+                str(primary_vars or "-"),
+                str(clauses or "-"),
+            )
+        console.print(table)
+        console.print()
+
+
+def display_solver_budget(results: Iterable[dict[str, Any]], top: int = 10) -> None:
+    """Show the solutions that took the analyzer the longest."""
+    budget = SolverBudget(top)
+    for result in results:
+        budget.add(result)
+    budget.display()
+
+
+class ResultsSummary:
+    """
+    Aggregates of a stream of results.
+
+    Holds per-predicate-type counters, per-problem pass counts and the top
+    solutions by analyzer time, never the results themselves.
+    """
+
+    def __init__(self, domain: str | None = None, top: int = 10):
+        """
+        Initialize the summary.
+
+        Args:
+            domain: Domain of results whose task_id does not name one
+            top: Number of solutions kept for the solver budget
+        """
+        self.predicate_results = defaultdict(
+            lambda: {
+                "total": 0,
+                "success": 0,
+                "counterexample": 0,
+                "other_failure": 0,
+                "error_types": defaultdict(int),
+            }
+        )
+        self.passes = PassCounts(domain)
+        self.budget = SolverBudget(top)
+
+    def add(self, result: dict[str, Any]) -> None:
+        """Aggregate one result dictionary."""
+        self.passes.add(result)
+        self.budget.add(result)
 
         # Skip entries with no solution
-        if error == "No solution generated":
-            continue
+        if result.get("error", None) == "No solution generated":
+            return
 
         # Update counters for this predicate type
-        predicate_results[pred_type]["total"] += 1
+        stats = self.predicate_results[get_predicate_type(result["task_id"])]
+        stats["total"] += 1
 
-        if passed:
-            predicate_results[pred_type]["success"] += 1
+        if result.get("passed", False):
+            stats["success"] += 1
         else:
-            error_type = get_error_type(error_message)
-            if error_type == "CounterExample":
-                predicate_results[pred_type]["counterexample"] += 1
+            error_message = result.get("error_message", None)
+            if get_error_type(error_message) == "CounterExample":
+                stats["counterexample"] += 1
             else:
-                predicate_results[pred_type]["other_failure"] += 1
+                stats["other_failure"] += 1
 
             # Track specific error types
             if error_message:
-                predicate_results[pred_type]["error_types"][error_message] += 1
+                stats["error_types"][error_message] += 1
+
+
+def summarize(
+    results: Iterable[dict[str, Any]], domain: str | None = None
+) -> ResultsSummary:
+    """
+    Aggregate results in a single pass.
+
+    Args:
+        results: Result dictionaries, e.g. a ResultsReader
+        domain: Domain of results whose task_id does not name one
+
+    Returns:
+        The summary of the results
+    """
+    summary = ResultsSummary(domain)
+    for result in track(results, description="Analyzing results"):
+        summary.add(result)
+    return summary
+
+
+def display_pass_at_k_tables(
+    passes: PassCounts,
+    ks: list[int] | tuple[int, ...] = DEFAULT_KS,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+) -> None:
+    """
+    Show pass@k with bootstrap confidence intervals per domain and per predicate.
+
+    Args:
+        passes: Pass counts of the results
+        ks: Numbers of attempts to estimate pass@k for
+        resamples: Number of bootstrap resamples
+        confidence: Coverage of the intervals
+    """
+    counts = passes.frame()
+    if counts.empty:
+        return
+    options = {"resamples": resamples, "confidence": confidence}
+    display_pass_at_k(
+        pass_at_k_table(counts, ks, **options),
+        ks,
+        f"pass@k by Domain ({confidence:.0%} CI)",
+    )
+    display_pass_at_k(
+        pass_at_k_table(counts, ks, by=("domain", "predicate"), **options),
+        ks,
+        f"pass@k by Predicate ({confidence:.0%} CI)",
+    )
+    console.print()
+
+
+def analyze_results(results: dict[str, Any]) -> None:
+    """Analyze and display loaded results in a visual format."""
+    display_summary(summarize(results["results"]), results["model"])
+
+
+def display_summary(summary: ResultsSummary, model: str | None) -> None:
+    """Display aggregated results in a visual format."""
+    # Display header
+    console.print(
+        Panel.fit(
+            f"[bold blue]Results Analysis[/bold blue]\n"
+            f"Model: [green]{model}[/green]"
+        )
+    )
+    predicate_results = summary.predicate_results
 
     # Create a table for all statistics
     table = Table(
@@ -132,6 +308,8 @@ def analyze_results(results: dict[str, Any]) -> None:
         console.print(error_table)
         console.print()
 
+    summary.budget.display()
+
     # Display overall summary
     total_results = sum(stats["total"] for stats in predicate_results.values())
     total_success = sum(stats["success"] for stats in predicate_results.values())
@@ -158,12 +336,44 @@ def main() -> None:
     import argparse
 
     parser = argparse.ArgumentParser(description="Analyze Alloy evaluation results")
-    parser.add_argument("results_file", type=str, help="Path to results.json file")
+    parser.add_argument(
+        "results_file",
+        type=str,
+        help="Path to a results .json file, or a .jsonl results/checkpoint file",
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_KS),
+        help="Numbers of attempts to report pass@k for",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=1000,
+        help="Bootstrap resamples of the pass@k confidence intervals",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Coverage of the pass@k confidence intervals",
+    )
+    parser.add_argument(
+        "--domain",
+        help="Domain of the results (default: the one recorded in the results file)",
+    )
     args = parser.parse_args()
 
     try:
-        results = load_results(args.results_file)
-        analyze_results(results)
+        reader = ResultsReader(args.results_file)
+        summary = summarize(reader)
+        summary.passes.domain = args.domain or reader.header.get("domain")
+        display_summary(summary, reader.header.get("model"))
+        display_pass_at_k_tables(
+            summary.passes, args.k, args.resamples, args.confidence
+        )
     except Exception as e:
         console.print(f"[red]Error analyzing results: {e}[/red]")
 
@@ -0,0 +1,428 @@
+"""
+Batched evaluation: check many solutions in a single analyzer run.
+
+Solutions that share the same signatures are emitted into one Alloy module,
+each as a uniquely renamed predicate with its own check command. The
+per-command verdicts of that single run are mapped back to the solutions. A
+syntax or type error in one solution fails the whole module, so failed
+batches are bisected until the offending solutions are checked on their own.
+A batch never gets longer than one unbatched check would; one that times out
+is rechecked solution by solution, each with its own timeout.
+
+Batches can hold the solutions of one problem, or, through evaluate_scheduled,
+every pending solution of every problem sharing a signature set (typically a
+whole domain file in data/).
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from alloy_eval.alloy_parser import PreflightError, preflight_check
+from alloy_eval.cache import VerdictCache
+from alloy_eval.alloy_output import AnalyzerOutput
+from alloy_eval.evaluation import (
+    DEFAULT_TIMEOUT,
+    ESCALATION_SCOPES,
+    alloy_version,
+    analyze_with_portfolio,
+    build_alloy_content,
+    build_result,
+    check_scope,
+    escalation_scopes,
+    native_verdict,
+    with_scope,
+    write_debug_file,
+)
+from alloy_eval.models import AlloyProblem, EvaluationResult
+from alloy_eval.parallel import map_ordered
+from alloy_eval.portfolio import problem_key
+
+if TYPE_CHECKING:
+    from alloy_eval.alloy_pool import AlloyWorkerPool
+    from alloy_eval.portfolio import SolverPortfolio
+    from alloy_eval.timeouts import TimeoutPolicy
+
+
+# Failed batches at most this large are rechecked entry by entry
+MIN_BISECT_SIZE = 4
+
+
+class BatchEntry(NamedTuple):
+    """A solution to check as part of a batch."""
+
+    problem: AlloyProblem
+    solution: str
+    task_id: str
+
+
+def predicate_name(problem: AlloyProblem) -> str:
+    """Extract the predicate name from a problem's predicate definition."""
+    match = re.search(r"\bpred\s+(\w+)", problem.predicate_definition)
+    if match is None:
+        raise ValueError(f"No predicate name in {problem.predicate_definition!r}")
+    return match.group(1)
+
+
+def rename_identifier(text: str, old: str, new: str) -> str:
+    """Replace whole-word occurrences of an identifier."""
+    return re.sub(rf"\b{re.escape(old)}\b", new, text)
+
+
+def build_batch_content(entries: list[BatchEntry]) -> tuple[str, list[str]]:
+    """
+    Assemble one Alloy module checking every entry.
+
+    All entries must share the same signatures.
+
+    Args:
+        entries: The solutions to check
+
+    Returns:
+        Tuple of (module content, check command name for each entry)
+    """
+    signatures = entries[0].problem.signatures
+    names = []
+    parts = [
+        "/* Batch: " + ", ".join(entry.task_id for entry in entries) + " */",
+        signatures,
+    ]
+    for k, entry in enumerate(entries):
+        if entry.problem.signatures != signatures:
+            raise ValueError("All entries of a batch must share their signatures")
+        original = predicate_name(entry.problem)
+        name = f"{original}__{k}"
+        names.append(name)
+        definition = rename_identifier(
+            entry.problem.predicate_definition, original, name
+        )
+        check = rename_identifier(entry.problem.check, original, name)
+        parts.append(f"{definition}\t{entry.solution}\n}}\n\n{check}")
+    return "\n\n".join(parts), names
+
+
+def run_batch(
+    entries: list[BatchEntry],
+    alloy_path: str,
+    pool: "AlloyWorkerPool | None" = None,
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+) -> list[AnalyzerOutput]:
+    """
+    Check a batch of solutions, bisecting on module-wide failures.
+
+    Args:
+        entries: The solutions to check (sharing signatures)
+        alloy_path: Path to Alloy analyzer executable
+        pool: Optional pool of persistent Alloy workers
+        portfolio: Optional solver portfolio to race SAT solvers on each run
+        timeouts: Optional policy giving each entry its learned timeout, and
+            recording the solve times of single-entry runs
+
+    Returns:
+        The analyzer output for each entry, holding only the entry's own
+        command (under the problem's predicate name) or the error it caused
+    """
+    content, names = build_batch_content(entries)
+    budgets = [
+        (
+            timeouts.timeout_for(problem_key(entry.problem), pool is not None)
+            if timeouts is not None
+            else DEFAULT_TIMEOUT
+        )
+        for entry in entries
+    ]
+    # A hanging solution then holds the batch for one default timeout at
+    # most, before its entries are checked on their own
+    timeout = budgets[0] if len(entries) == 1 else min(sum(budgets), DEFAULT_TIMEOUT)
+    start = time.perf_counter()
+    output = analyze_with_portfolio(
+        content,
+        alloy_path,
+        problem_key(*(entry.problem for entry in entries)),
+        portfolio,
+        timeout,
+        pool,
+    )
+    if timeouts is not None and len(entries) == 1:
+        # The duration of a run of several solutions is no solve time of any
+        # one problem, so only single-entry runs are recorded
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timeouts.observe(
+            problem_key(entries[0].problem), pool is not None, elapsed_ms, output
+        )
+
+    if output.error is None:
+        commands = {command.name: command for command in output.commands}
+        return [
+            AnalyzerOutput(
+                [
+                    commands[name].model_copy(
+                        update={"name": predicate_name(entry.problem)}
+                    )
+                ]
+                if name in commands
+                else []
+            )
+            for entry, name in zip(entries, names)
+        ]
+    if len(entries) == 1:
+        return [_relocate_error(output, entries[0], content)]
+
+    # Halves of a batch that timed out could time out again at every level;
+    # checking each solution once finds the slow ones in a single pass
+    if output.error.startswith("Timeout"):
+        return [
+            output
+            for entry in entries
+            for output in run_batch([entry], alloy_path, pool, portfolio, timeouts)
+        ]
+
+    # One bad solution fails the whole module: retry small batches one
+    # solution at a time, and split larger ones in halves
+    if len(entries) <= MIN_BISECT_SIZE:
+        return [
+            output
+            for entry in entries
+            for output in run_batch([entry], alloy_path, pool, portfolio, timeouts)
+        ]
+    middle = len(entries) // 2
+    return run_batch(
+        entries[:middle], alloy_path, pool, portfolio, timeouts
+    ) + run_batch(entries[middle:], alloy_path, pool, portfolio, timeouts)
+
+
+def _solution_line(content: str, definition: str, solution: str) -> int:
+    """Line of content on which a solution following its definition starts."""
+    start = content.index(f"{definition}\t{solution}") + len(definition)
+    return content.count("\n", 0, start) + 1
+
+
+def _relocate_error(
+    output: AnalyzerOutput, entry: BatchEntry, content: str
+) -> AnalyzerOutput:
+    """
+    Move an error position from a one-entry batch module to the same place in
+    the entry's own .als file (as written to the debug directory).
+    """
+    if output.line is None:
+        return output
+    name = predicate_name(entry.problem)
+    batch_start = _solution_line(
+        content,
+        rename_identifier(entry.problem.predicate_definition, name, f"{name}__0"),
+        entry.solution,
+    )
+    if output.line < batch_start:
+        return output
+    own_start = _solution_line(
+        build_alloy_content(entry.problem, entry.solution),
+        entry.problem.predicate_definition,
+        entry.solution,
+    )
+    return output._replace(line=output.line + own_start - batch_start)
+
+
+def evaluate_batch(
+    entries: list[BatchEntry],
+    alloy_path: str,
+    debug_dir: Path | None = None,
+    pool: "AlloyWorkerPool | None" = None,
+    cache: VerdictCache | None = None,
+    preflight: bool = True,
+    backend: str = "alloy",
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+    escalate: bool = False,
+) -> list[EvaluationResult]:
+    """
+    Evaluate solutions sharing the same signatures with a single analyzer run.
+
+    Solutions rejected by the preflight parser are left out of the batch, so
+    they never cause a bisection. So are solutions decided by the native
+    backend.
+
+    Args:
+        entries: The solutions to check
+        alloy_path: Path to Alloy analyzer executable
+        debug_dir: Optional directory to save a debug file per solution
+        pool: Optional pool of persistent Alloy workers
+        cache: Optional verdict cache, shared with unbatched evaluation
+        preflight: Reject malformed solutions without running the analyzer
+        backend: "alloy" to always run the analyzer, or "native" to try the
+                 NumPy bounded evaluator first
+        portfolio: Optional solver portfolio to race SAT solvers on each run
+        timeouts: Optional policy giving each entry its learned timeout
+        escalate: Look for counterexamples at reduced scopes first
+
+    Returns:
+        An EvaluationResult for each entry, in order
+    """
+    contents = [build_alloy_content(e.problem, e.solution) for e in entries]
+    rejections: list[PreflightError | None] = [
+        preflight_check(e.problem, e.solution) if preflight else None for e in entries
+    ]
+    verdicts: list[tuple[bool, str | None] | None] = [
+        (
+            (False, rejected.category)
+            if rejected is not None
+            else native_verdict(e.problem, e.solution, backend)
+        )
+        for e, rejected in zip(entries, rejections)
+    ]
+
+    if cache is not None:
+        version = pool.version if pool is not None else alloy_version(alloy_path)
+        verdicts = [
+            verdict or cache.get_verdict(content, version, DEFAULT_TIMEOUT)
+            for verdict, content in zip(verdicts, contents)
+        ]
+
+    outputs: list[AnalyzerOutput | None] = [None] * len(entries)
+    scopes: list[int | None] = [None] * len(entries)
+    pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+    analyzed = pending
+    if escalate:
+        for scope in ESCALATION_SCOPES:
+            reduced = [
+                i for i in pending if scope in escalation_scopes(entries[i].problem)
+            ]
+            if not reduced:
+                continue
+            fresh = run_batch(
+                [
+                    entries[i]._replace(problem=with_scope(entries[i].problem, scope))
+                    for i in reduced
+                ],
+                alloy_path,
+                pool,
+                portfolio,
+                timeouts,
+            )
+            for i, output in zip(reduced, fresh):
+                if output.decisive() and not output.verdict()[0]:
+                    outputs[i] = output
+                    scopes[i] = scope
+            pending = [i for i in pending if outputs[i] is None]
+    if pending:
+        fresh = run_batch(
+            [entries[i] for i in pending], alloy_path, pool, portfolio, timeouts
+        )
+        for i, output in zip(pending, fresh):
+            outputs[i] = output
+            if escalate:
+                scopes[i] = check_scope(entries[i].problem)
+    for i in analyzed:
+        passed, error = outputs[i].verdict()
+        verdicts[i] = (passed, error)
+        # Batched runs do not get the timeout of the cache key, so only
+        # verdicts that hold under any time limit are stored
+        if cache is not None and outputs[i].decisive():
+            cache.put_verdict(contents[i], version, DEFAULT_TIMEOUT, passed, error)
+
+    results = []
+    for entry, content, rejected, (passed, error), output, scope in zip(
+        entries, contents, rejections, verdicts, outputs, scopes
+    ):
+        debug_file = (
+            write_debug_file(debug_dir, entry.task_id, content) if debug_dir else None
+        )
+        results.append(
+            build_result(
+                entry.task_id,
+                entry.solution,
+                passed,
+                error,
+                rejected,
+                output,
+                debug_file,
+                scope,
+            )
+        )
+    return results
+
+
+def group_by_signatures(entries: list[BatchEntry], batch_size: int) -> list[list[int]]:
+    """
+    Split entries into batches of entries sharing identical signatures.
+
+    Args:
+        entries: The solutions to check
+        batch_size: Maximum number of entries per batch
+
+    Returns:
+        Batches as lists of entry indices
+    """
+    groups: dict[str, list[int]] = {}
+    for i, entry in enumerate(entries):
+        groups.setdefault(entry.problem.signatures, []).append(i)
+    return [
+        indices[start : start + batch_size]
+        for indices in groups.values()
+        for start in range(0, len(indices), batch_size)
+    ]
+
+
+def evaluate_scheduled(
+    entries: list[BatchEntry],
+    alloy_path: str,
+    batch_size: int = 50,
+    debug_dir: Path | None = None,
+    pool: "AlloyWorkerPool | None" = None,
+    cache: VerdictCache | None = None,
+    workers: int = 1,
+    preflight: bool = True,
+    backend: str = "alloy",
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+    escalate: bool = False,
+) -> list[EvaluationResult]:
+    """
+    Evaluate solutions of many problems with as few analyzer runs as possible.
+
+    Entries are grouped by signatures and each group is checked in batches of
+    up to batch_size solutions.
+
+    Args:
+        entries: The solutions to check, from any number of problems
+        alloy_path: Path to Alloy analyzer executable
+        batch_size: Maximum number of solutions per analyzer run
+        debug_dir: Optional directory to save a debug file per solution
+        pool: Optional pool of persistent Alloy workers
+        cache: Optional verdict cache
+        workers: Number of batches to check concurrently
+        preflight: Reject malformed solutions without running the analyzer
+        backend: "alloy" to always run the analyzer, or "native" to try the
+                 NumPy bounded evaluator first
+        portfolio: Optional solver portfolio to race SAT solvers on each run
+        timeouts: Optional policy giving each entry its learned timeout
+        escalate: Look for counterexamples at reduced scopes first
+
+    Returns:
+        An EvaluationResult for each entry, in input order
+    """
+    batches = group_by_signatures(entries, batch_size)
+    batch_results = map_ordered(
+        lambda indices: evaluate_batch(
+            [entries[i] for i in indices],
+            alloy_path,
+            debug_dir,
+            pool,
+            cache,
+            preflight,
+            backend,
+            portfolio,
+            timeouts,
+            escalate,
+        ),
+        batches,
+        workers=workers,
+        description="Checking batches",
+    )
+
+    results: list[EvaluationResult | None] = [None] * len(entries)
+    for indices, evaluated in zip(batches, batch_results):
+        for i, result in zip(indices, evaluated):
+            results[i] = result
+    return results
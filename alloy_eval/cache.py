@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Recency updates of cache hits kept in memory before they are written
+TOUCH_FLUSH_EVERY = 256
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory ($ALLOY_EVAL_CACHE_DIR or ~/.cache/alloy_eval)."""
+    return Path(
+        os.getenv("ALLOY_EVAL_CACHE_DIR", Path.home() / ".cache" / "alloy_eval")
+    )
+
+
+def hash_key(*parts: Any) -> str:
+    """Build a stable SHA-256 key from the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SqliteCache:
+    """
+    Persistent key/value cache stored in a SQLite file.
+
+    Values are stored as JSON. The cache holds at most ``max_entries`` rows;
+    when it grows past that, the least recently used entries are evicted.
+    Hits only commit once TOUCH_FLUSH_EVERY of them are pending (or on the
+    next put or close), so lookups do not wait for disk syncs. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 100_000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: Path to the SQLite file
+            max_entries: Maximum number of entries kept
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        # Access times of hits not yet written, and the number of rows
+        self._touched: dict[str, float] = {}
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+
+    def _select(self, key: str) -> Any | None:
+        row = self._conn.execute(
+            "SELECT value FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(access, key) for key, access in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _peek(self, key: str) -> Any | None:
+        """Look up a key without counting it as a hit or miss."""
+        with self._lock:
+            return self._select(key)
+
+    def get(self, key: str) -> Any | None:
+        """
+        Look up a key, counting the hit or miss.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The stored value, or None if the key is not cached
+        """
+        with self._lock:
+            value = self._select(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_FLUSH_EVERY:
+                self._flush_touches()
+                self._conn.commit()
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Args:
+            key: The cache key
+            value: A JSON-serializable value
+        """
+        with self._lock:
+            self._flush_touches()
+            self._touched.pop(key, None)
+            row = (json.dumps(value), time.time(), key)
+            if self._conn.execute(
+                "UPDATE entries SET value = ?, last_access = ? WHERE key = ?", row
+            ).rowcount:
+                self._conn.commit()
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (value, last_access, key) VALUES (?, ?, ?)",
+                row,
+            )
+            self._count += 1
+            if self._count > self.max_entries:
+                # Other processes may have added rows too: evict by the true count
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (max(count - self.max_entries, 0),),
+                )
+                self._count = min(count, self.max_entries)
+            self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters of this cache's lookups in this session."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hits/lookups*100:.2f}%" if lookups else "n/a",
+        }
+
+    def close(self) -> None:
+        """Write pending recency updates and close the underlying database."""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class VerdictCache(SqliteCache):
+    """
+    Cache of Alloy verdicts keyed by the assembled .als content.
+
+    The key also covers the analyzer version and the timeout, so upgrading
+    Alloy or changing the time budget never reuses stale verdicts. Only
+    deterministic outcomes are stored; timeouts and crashes are always rerun.
+    """
+
+    CACHEABLE_ERRORS = {None, "Counterexample found", "Syntax Error", "Type Error"}
+
+    def __init__(self, path: str | Path | None = None, max_entries: int = 100_000):
+        """
+        Open the verdict cache.
+
+        Args:
+            path: Path to the SQLite file (defaults to verdicts.sqlite in the cache dir)
+            max_entries: Maximum number of verdicts kept
+        """
+        super().__init__(path or default_cache_dir() / "verdicts.sqlite", max_entries)
+
+    def get_verdict(
+        self, content: str, alloy_version: str, timeout: int
+    ) -> tuple[bool, str | None] | None:
+        """Return the cached (passed, error) verdict for an .als file, if any."""
+        value = self.get(hash_key(content, alloy_version, timeout))
+        if value is None:
+            return None
+        return value["passed"], value["error"]
+
+    def put_verdict(
+        self,
+        content: str,
+        alloy_version: str,
+        timeout: int,
+        passed: bool,
+        error: str | None,
+    ) -> None:
+        """Store a verdict if it is deterministic."""
+        if error not in self.CACHEABLE_ERRORS:
+            return
+        self.put(
+            hash_key(content, alloy_version, timeout),
+            {"passed": passed, "error": error},
+        )
+
+
+class SolverHistory(SqliteCache):
+    """
+    Per-problem record of how each SAT solver performed.
+
+    For every problem key, keeps the number of portfolio races, and for each
+    solver its number of wins, runs and total solve time of those runs.
+    """
+
+    def __init__(self, path: str | Path | None = None, max_entries: int = 100_000):
+        """
+        Open the solver history.
+
+        Args:
+            path: Path to the SQLite file (defaults to solvers.sqlite in the cache dir)
+            max_entries: Maximum number of problems kept
+        """
+        super().__init__(path or default_cache_dir() / "solvers.sqlite", max_entries)
+        self._update_lock = threading.Lock()
+
+    def record(self, key: str, solver: str, elapsed_ms: float, race: bool) -> None:
+        """
+        Record a decisive run of a solver.
+
+        Args:
+            key: The problem key
+            solver: The solver that answered
+            elapsed_ms: Time it took to answer
+            race: Whether it won a race, rather than running alone
+        """
+        with self._update_lock:
+            history = self._peek(key) or {"races": 0, "solvers": {}}
+            stats = history["solvers"].setdefault(
+                solver, {"wins": 0, "runs": 0, "total_ms": 0.0}
+            )
+            stats["runs"] += 1
+            stats["total_ms"] += elapsed_ms
+            if race:
+                history["races"] += 1
+                stats["wins"] += 1
+            self.put(key, history)
+
+    def fastest(self, key: str, solvers: list[str], min_races: int) -> str | None:
+        """
+        Pick the historically fastest of the given solvers for a problem.
+
+        Args:
+            key: The problem key
+            solvers: The candidate solvers
+            min_races: Races the problem needs before a pick is trusted
+
+        Returns:
+            The solver that won the most races (the lowest mean time breaking
+            ties), or None while the problem has fewer than min_races races
+        """
+        history = self.get(key)
+        if history is None or history["races"] < min_races:
+            return None
+        candidates = [
+            (stats["wins"], -stats["total_ms"] / stats["runs"], solver)
+            for solver, stats in history["solvers"].items()
+            if solver in solvers and stats["wins"]
+        ]
+        return max(candidates)[2] if candidates else None
+
+
+class TimingHistory(SqliteCache):
+    """
+    Per-problem record of how long decisive analyzer runs took.
+
+    Keeps the most recent ``max_samples`` durations of each problem key.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_entries: int = 100_000,
+        max_samples: int = 200,
+    ):
+        """
+        Open the timing history.
+
+        Args:
+            path: Path to the SQLite file (defaults to timings.sqlite in the cache dir)
+            max_entries: Maximum number of problems kept
+            max_samples: Durations kept per problem
+        """
+        super().__init__(path or default_cache_dir() / "timings.sqlite", max_entries)
+        self.max_samples = max_samples
+        self._update_lock = threading.Lock()
+
+    def record(self, key: str, elapsed_ms: float) -> None:
+        """Add the duration of a decisive run of a problem."""
+        with self._update_lock:
+            samples = self._peek(key) or []
+            samples.append(round(elapsed_ms, 1))
+            self.put(key, samples[-self.max_samples :])
+
+    def samples(self, key: str) -> list[float]:
+        """Return the recorded durations of a problem, in milliseconds."""
+        return self.get(key) or []
@@ -2,14 +2,33 @@ import argparse
 import json
 from pathlib import Path
 
-from alloy_eval.evaluation import evaluate_functional_correctness
+from alloy_eval.alloy_pool import AlloyWorkerPool
+from alloy_eval.cache import (
+    SolverHistory,
+    TimingHistory,
+    VerdictCache,
+    default_cache_dir,
+)
+from alloy_eval.evaluation import BACKENDS, evaluate_functional_correctness
 from alloy_eval.data_utils import read_jsonl
+from alloy_eval.portfolio import DEFAULT_SOLVERS, SolverPortfolio
+from alloy_eval.timeouts import TimeoutPolicy
 
 
 def evaluate_samples(
     samples_path: str | Path,
     alloy_path: str | Path,
     problems_file: str | Path | None = None,
+    pool: AlloyWorkerPool | None = None,
+    workers: int = 1,
+    cache: VerdictCache | None = None,
+    preflight: bool = True,
+    backend: str = "alloy",
+    portfolio: SolverPortfolio | None = None,
+    timeouts: TimeoutPolicy | None = None,
+    escalate: bool = False,
+    only: list[str] | None = None,
+    exclude: list[str] | None = None,
 ) -> dict:
     """
     Evaluate a collection of samples from a JSONL file.
@@ -18,6 +37,17 @@ def evaluate_samples(
         samples_path: Path to JSONL file containing samples
         alloy_path: Path to Alloy analyzer executable
         problems_file: Optional path to problems file
+        pool: Optional pool of persistent Alloy workers to run the checks on
+        workers: Number of Alloy checks to run concurrently
+        cache: Optional verdict cache to skip already-checked solutions
+        preflight: Reject malformed solutions without running the analyzer
+        backend: "alloy" to always run the analyzer, or "native" to try the
+                 NumPy bounded evaluator first
+        portfolio: Optional solver portfolio to race SAT solvers on each check
+        timeouts: Optional policy giving each check a learned timeout
+        escalate: Look for counterexamples at reduced scopes first
+        only: Patterns of the problems to evaluate, e.g. "graph/*" (default: all)
+        exclude: Patterns of problems to leave out
 
     Returns:
         Dictionary with results and metrics in standardized format
@@ -26,17 +56,27 @@ def evaluate_samples(
     results = []
 
     for sample in samples:
-        result = evaluate_functional_correctness(
+        sample_results = evaluate_functional_correctness(
             solution=sample["completion"],
             alloy_path=alloy_path,
             problems_file=problems_file,
+            pool=pool,
+            workers=workers,
+            cache=cache,
+            preflight=preflight,
+            backend=backend,
+            portfolio=portfolio,
+            timeouts=timeouts,
+            escalate=escalate,
+            only=only,
+            exclude=exclude,
         )
-        results.append(result)
+        results.extend(r.model_dump() for r in sample_results)
 
     # Calculate metrics
-    passed = sum(1 for r in results if r.passed)
+    passed = sum(1 for r in results if r["passed"])
     total = len(results)
-    success_rate = f"{passed/total*100:.2f}%"
+    success_rate = f"{passed/total*100:.2f}%" if total else "n/a"
 
     # Create standardized output format
     return {
@@ -58,15 +98,157 @@ def main() -> None:
         "--alloy-path", required=True, help="Path to Alloy analyzer executable"
     )
     parser.add_argument("--problems-file", help="Path to problems file (JSON or JSONL)")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        help="Evaluate only problems matching these patterns (e.g. 'graph/*')",
+    )
+    parser.add_argument(
+        "--exclude", nargs="+", help="Leave out problems matching these patterns"
+    )
+    parser.add_argument(
+        "--alloy-jar",
+        help="Path to the Alloy jar; enables a pool of persistent analyzer workers",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="Number of persistent Alloy workers (with --alloy-jar)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of Alloy checks to run concurrently",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="Send every solution to Alloy, even ones the Python parser rejects",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="alloy",
+        help="native: decide small-scope problems with NumPy, falling back to "
+        "Alloy when undecided (requires the 'native' extra)",
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Race several SAT solvers on each Alloy check and keep the first "
+        "answer; problems with a known fastest solver run only that one",
+    )
+    parser.add_argument(
+        "--solvers",
+        nargs="+",
+        default=list(DEFAULT_SOLVERS),
+        help="Ids of the Alloy SAT solvers to race (with --portfolio)",
+    )
+    parser.add_argument(
+        "--no-solver-history",
+        action="store_true",
+        help="Race on every check instead of using the recorded fastest solvers",
+    )
+    parser.add_argument(
+        "--adaptive-timeouts",
+        action="store_true",
+        help="Time out each Alloy check after a multiple of its problem's p99 "
+        "solve time in earlier runs (see python -m alloy_eval.timeouts)",
+    )
+    parser.add_argument(
+        "--timeout-multiplier",
+        type=float,
+        default=3.0,
+        help="Adaptive timeout as a multiple of the p99 solve time",
+    )
+    parser.add_argument(
+        "--timeout-cap",
+        type=float,
+        default=120.0,
+        help="Longest adaptive timeout, in seconds",
+    )
+    parser.add_argument(
+        "--escalate-scopes",
+        action="store_true",
+        help="Look for counterexamples at scopes 2 and 3 before running each "
+        "check at its own scope",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run Alloy instead of reusing cached verdicts",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(default_cache_dir()),
+        help="Directory of the verdict cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Maximum number of cached verdicts",
+    )
 
     args = parser.parse_args()
 
-    samples_path = Path(args.samples_file)
-    results = evaluate_samples(
-        samples_path=samples_path,
-        alloy_path=args.alloy_path,
-        problems_file=args.problems_file,
+    pool = AlloyWorkerPool(args.alloy_jar, args.pool_size) if args.alloy_jar else None
+    cache = (
+        None
+        if args.no_cache
+        else VerdictCache(Path(args.cache_dir) / "verdicts.sqlite", args.cache_size)
+    )
+
+    solver_history = (
+        SolverHistory(Path(args.cache_dir) / "solvers.sqlite")
+        if args.portfolio and not args.no_solver_history
+        else None
+    )
+    portfolio = (
+        SolverPortfolio(args.solvers, solver_history) if args.portfolio else None
     )
+    timing_history = (
+        TimingHistory(Path(args.cache_dir) / "timings.sqlite")
+        if args.adaptive_timeouts
+        else None
+    )
+    timeouts = (
+        TimeoutPolicy(timing_history, args.timeout_multiplier, args.timeout_cap)
+        if timing_history is not None
+        else None
+    )
+
+    samples_path = Path(args.samples_file)
+    try:
+        results = evaluate_samples(
+            samples_path=samples_path,
+            alloy_path=args.alloy_path,
+            problems_file=args.problems_file,
+            pool=pool,
+            workers=args.workers,
+            cache=cache,
+            preflight=not args.no_preflight,
+            backend=args.backend,
+            portfolio=portfolio,
+            timeouts=timeouts,
+            escalate=args.escalate_scopes,
+            only=args.only,
+            exclude=args.exclude,
+        )
+    finally:
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            print(f"Verdict cache: {cache.stats()}")
+            cache.close()
+        if portfolio is not None:
+            print(f"Solver portfolio: {portfolio.stats()}")
+        if solver_history is not None:
+            solver_history.close()
+        if timing_history is not None:
+            timing_history.close()
 
     # Write detailed results
     results_file = Path(str(samples_path) + "_results.json")
@@ -74,7 +256,7 @@ def main() -> None:
         json.dump(results, f, indent=2)
 
     # Print success rate from the report
-    print(f"Success rate: {results['report']['success_rate']:.2%}")
+    print(f"Success rate: {results['report']['success_rate']}")
 
 
 if __name__ == "__main__":
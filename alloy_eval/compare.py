@@ -0,0 +1,370 @@
+"""
+Leaderboard and regression diff across runs.
+
+Runs are joined on (domain, predicate, solution index): each run's outcomes
+become a Series on that hash index, and the Series are aligned with one
+outer join into an outcome matrix (a row per sample, a column per run). The
+leaderboard, flip statistics and per-problem changes are all vectorized
+over that matrix.
+
+Every run is compared against a baseline (the first run by default):
+
+- flips count the samples both runs answered by (baseline, run) outcome:
+  fixed (fail -> pass) and broken (pass -> fail) samples;
+- per-problem changes compare pass rates on the samples both runs answered,
+  and list the problems that regressed or improved the most.
+
+Usage:
+    alloy_eval compare results/gpt-4o.json results/gpt-4o-mini.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Sequence
+
+import pandas as pd
+from rich.table import Table
+
+from alloy_eval.result_store import load_runs, read_run
+from alloy_eval.ui_utils import console
+
+# Index of the outcome matrix
+SAMPLE_INDEX = ["domain", "predicate", "solution_index"]
+
+
+def load_comparison_runs(paths: Sequence[str | Path]) -> dict[str, pd.DataFrame]:
+    """
+    Load runs to compare.
+
+    Args:
+        paths: Results .json/.jsonl files, Parquet run files or run store
+            directories (each of their runs is loaded)
+
+    Returns:
+        Stored rows of each run (see result_store.COLUMNS), by unique run name
+    """
+    runs: dict[str, pd.DataFrame] = {}
+    for path in map(Path, paths):
+        if path.is_dir() or path.suffix == ".parquet":
+            frame = load_runs(path)
+            loaded = [
+                (str(run), rows) for run, rows in frame.groupby("run", observed=True)
+            ]
+        else:
+            loaded = [(path.stem, read_run(path))]
+        for name, rows in loaded:
+            unique, copy = name, 1
+            while unique in runs:
+                copy += 1
+                unique = f"{name}#{copy}"
+            runs[unique] = rows
+    return runs
+
+
+def outcome_matrix(runs: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Join runs on their samples.
+
+    Args:
+        runs: Stored rows of each run, by run name
+
+    Returns:
+        A DataFrame indexed by (domain, predicate, solution_index) with one
+        column per run: 1.0 passed, 0.0 failed, NaN not in the run
+    """
+    columns = {}
+    for name, rows in runs.items():
+        index = pd.MultiIndex.from_arrays(
+            [
+                rows["domain"].astype(str),
+                rows["predicate"].astype(str),
+                rows["solution_index"].fillna(0).astype("int64"),
+            ],
+            names=SAMPLE_INDEX,
+        )
+        outcomes = pd.Series(rows["passed"].to_numpy(dtype=float), index=index)
+        # A sample answered twice in one run keeps its last outcome
+        columns[name] = outcomes[~index.duplicated(keep="last")]
+    if not columns:
+        return pd.DataFrame(
+            index=pd.MultiIndex.from_arrays([[], [], []], names=SAMPLE_INDEX)
+        )
+    return pd.concat(columns, axis=1, join="outer", sort=True)
+
+
+def leaderboard(
+    matrix: pd.DataFrame, models: dict[str, str | None] | None = None
+) -> pd.DataFrame:
+    """
+    Rank runs by pass rate on the samples every run answered.
+
+    Args:
+        matrix: Outcome matrix, see outcome_matrix
+        models: Model of each run
+
+    Returns:
+        A DataFrame with run, model, samples, pass_rate, solved (share of
+        problems with a passing sample), shared_samples and shared_pass_rate,
+        best first
+    """
+    shared = matrix.dropna()
+    problems = matrix.groupby(level=["domain", "predicate"], sort=False).max()
+    table = pd.DataFrame(
+        {
+            "run": matrix.columns,
+            "model": [(models or {}).get(run) for run in matrix.columns],
+            "samples": matrix.count().to_numpy(),
+            "pass_rate": matrix.mean().to_numpy(),
+            "solved": problems.mean().to_numpy(),
+            "shared_samples": len(shared),
+            "shared_pass_rate": shared.mean().to_numpy(),
+        }
+    )
+    table = table.sort_values(
+        ["shared_pass_rate", "pass_rate"], ascending=False, kind="stable"
+    )
+    return table.reset_index(drop=True)
+
+
+def flip_stats(matrix: pd.DataFrame, baseline: str) -> pd.DataFrame:
+    """
+    Count how the outcomes of each run differ from the baseline's.
+
+    Args:
+        matrix: Outcome matrix, see outcome_matrix
+        baseline: Run to compare against
+
+    Returns:
+        A DataFrame with one row per other run: common samples, both_pass,
+        both_fail, fixed (fail -> pass), broken (pass -> fail), net (fixed -
+        broken) and flip_rate
+    """
+    base = matrix[baseline]
+    others = matrix.drop(columns=baseline)
+    common = others.notna() & base.notna().to_numpy()[:, None]
+    passes = others.eq(1) & common
+    fails = others.eq(0) & common
+    base_pass = base.eq(1).to_numpy()[:, None]
+    base_fail = base.eq(0).to_numpy()[:, None]
+    table = pd.DataFrame(
+        {
+            "run": others.columns,
+            "common": common.sum().to_numpy(),
+            "both_pass": (passes & base_pass).sum().to_numpy(),
+            "both_fail": (fails & base_fail).sum().to_numpy(),
+            "fixed": (passes & base_fail).sum().to_numpy(),
+            "broken": (fails & base_pass).sum().to_numpy(),
+        }
+    )
+    table["net"] = table["fixed"] - table["broken"]
+    flips = table["fixed"] + table["broken"]
+    table["flip_rate"] = flips / table["common"].where(table["common"] > 0)
+    return table
+
+
+def problem_changes(matrix: pd.DataFrame, baseline: str, run: str) -> pd.DataFrame:
+    """
+    Per-problem pass rates of a run against the baseline.
+
+    Args:
+        matrix: Outcome matrix, see outcome_matrix
+        baseline: Run to compare against
+        run: Run to compare
+
+    Returns:
+        A DataFrame with domain, predicate, samples (answered by both runs),
+        baseline and run pass rates and their delta, for problems whose pass
+        rate changed, largest regressions first
+    """
+    pair = matrix[[baseline, run]].dropna()
+    rates = pair.groupby(level=["domain", "predicate"], sort=False).agg(
+        ["size", "mean"]
+    )
+    table = pd.DataFrame(
+        {
+            "samples": rates[(baseline, "size")],
+            "baseline": rates[(baseline, "mean")],
+            "run": rates[(run, "mean")],
+        }
+    )
+    table["delta"] = table["run"] - table["baseline"]
+    table = table[table["delta"] != 0].sort_values("delta", kind="stable")
+    return table.reset_index()
+
+
+def display_comparison(
+    matrix: pd.DataFrame,
+    runs: dict[str, pd.DataFrame],
+    baseline: str,
+    top: int = 10,
+) -> dict[str, Any]:
+    """
+    Print the leaderboard, flip statistics and per-problem changes.
+
+    Args:
+        matrix: Outcome matrix, see outcome_matrix
+        runs: Stored rows of each run, by run name
+        baseline: Run to compare against
+        top: Regressions and improvements listed per run
+
+    Returns:
+        The comparison as JSON-serializable data
+    """
+    models = {
+        name: (str(rows["model"].iloc[0]) if len(rows) else None)
+        for name, rows in runs.items()
+    }
+    board = leaderboard(matrix, models)
+    table = Table(
+        show_header=True,
+        header_style="bold magenta",
+        title=f"[bold]Leaderboard[/bold] ({board['shared_samples'].max()} shared samples)",
+    )
+    for column in (
+        "#",
+        "Run",
+        "Model",
+        "Samples",
+        "Pass Rate",
+        "Solved",
+        "Shared Pass Rate",
+    ):
+        table.add_column(column)
+    for rank, row in board.iterrows():
+        table.add_row(
+            str(rank + 1),
+            row["run"],
+            str(row["model"]),
+            str(row["samples"]),
+            f"{row['pass_rate']*100:.1f}%",
+            f"{row['solved']*100:.1f}%",
+            (
+                "-"
+                if pd.isna(row["shared_pass_rate"])
+                else f"{row['shared_pass_rate']*100:.1f}%"
+            ),
+        )
+    console.print(table)
+
+    flips = flip_stats(matrix, baseline)
+    if not flips.empty:
+        table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            title=f"[bold]Flips against {baseline}[/bold]",
+        )
+        for column in (
+            "Run",
+            "Common",
+            "Both Pass",
+            "Both Fail",
+            "Fixed",
+            "Broken",
+            "Net",
+            "Flip Rate",
+        ):
+            table.add_column(column)
+        for _, row in flips.iterrows():
+            table.add_row(
+                row["run"],
+                str(row["common"]),
+                str(row["both_pass"]),
+                str(row["both_fail"]),
+                f"[green]{row['fixed']}[/green]",
+                f"[red]{row['broken']}[/red]",
+                f"{row['net']:+d}",
+                "-" if pd.isna(row["flip_rate"]) else f"{row['flip_rate']*100:.1f}%",
+            )
+        console.print(table)
+
+    changes = {}
+    for run in matrix.columns:
+        if run == baseline:
+            continue
+        changed = problem_changes(matrix, baseline, run)
+        regressions = changed[changed["delta"] < 0].head(top)
+        improvements = changed[changed["delta"] > 0].iloc[::-1].head(top)
+        for title, rows, style in (
+            ("Regressions", regressions, "red"),
+            ("Improvements", improvements, "green"),
+        ):
+            if rows.empty:
+                continue
+            table = Table(
+                show_header=True,
+                header_style="bold magenta",
+                title=f"[bold]{title}: {run} vs {baseline}[/bold]",
+            )
+            for column in ("Domain", "Predicate", "Samples", baseline, run, "Delta"):
+                table.add_column(column)
+            for _, row in rows.iterrows():
+                table.add_row(
+                    row["domain"],
+                    row["predicate"],
+                    str(row["samples"]),
+                    f"{row['baseline']*100:.1f}%",
+                    f"{row['run']*100:.1f}%",
+                    f"[{style}]{row['delta']*100:+.1f}%[/{style}]",
+                )
+            console.print(table)
+        changes[run] = {
+            "regressions": regressions.to_dict(orient="records"),
+            "improvements": improvements.to_dict(orient="records"),
+        }
+
+    return {
+        "baseline": baseline,
+        "leaderboard": board.astype(object)
+        .where(board.notna(), None)
+        .to_dict(orient="records"),
+        "flips": flips.astype(object)
+        .where(flips.notna(), None)
+        .to_dict(orient="records"),
+        "changes": changes,
+    }
+
+
+def _json_value(value: Any) -> Any:
+    """Convert NumPy scalars for json.dump."""
+    return value.item()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="alloy_eval compare",
+        description="Compare runs: leaderboard, flips and per-problem regressions.",
+    )
+    parser.add_argument(
+        "runs",
+        nargs="+",
+        help="Results .json/.jsonl files, Parquet run files or run store directories",
+    )
+    parser.add_argument(
+        "--baseline", help="Run to compare the others against (default: the first)"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Regressions and improvements to list per run",
+    )
+    parser.add_argument("--json", help="Write the comparison to this JSON file")
+    args = parser.parse_args(argv)
+
+    runs = load_comparison_runs(args.runs)
+    if not runs:
+        parser.error("no runs to compare")
+    baseline = args.baseline or next(iter(runs))
+    if baseline not in runs:
+        parser.error(f"unknown baseline {baseline!r}; runs are {', '.join(runs)}")
+    matrix = outcome_matrix(runs)
+    comparison = display_comparison(matrix, runs, baseline, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(comparison, f, indent=2, default=_json_value)
+        console.print(f"[green]Comparison written to {args.json}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 from .models import AlloyProblem
+from .problem_store import ProblemStore
 
 
 def read_jsonl(path: str | Path) -> list[dict[str, Any]]:
@@ -20,8 +21,20 @@ def write_jsonl(path: str | Path, data: list[dict[str, Any]]) -> None:
             f.write(json.dumps(item) + "\n")
 
 
-def read_problems(file_path: str | Path) -> list[AlloyProblem]:
-    """Read problems from a JSONL file."""
+def read_problems(
+    file_path: str | Path,
+    only: Sequence[str] | None = None,
+    exclude: Sequence[str] | None = None,
+) -> list[AlloyProblem]:
+    """
+    Read problems from a JSONL file.
+
+    With only or exclude patterns (e.g. "graph/*"), just the selected problems
+    are read, through the file's index (see ProblemStore).
+    """
+    if only or exclude:
+        with ProblemStore(file_path) as store:
+            return list(store.problems(only, exclude))
     problems = []
     with open(file_path) as f:
         for line in f:
@@ -1,8 +1,65 @@
+import functools
+import os
+import re
+import shutil
+import signal
 import subprocess
-import tempfile
+import threading
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from alloy_eval.alloy_output import (
+    CANCELLED,
+    AnalyzerOutput,
+    parse_alloy_output,
+    parse_worker_response,
+)
+from alloy_eval.alloy_parser import PreflightError, preflight_check
+from alloy_eval.cache import VerdictCache
 from alloy_eval.models import AlloyProblem, EvaluationResult
 from alloy_eval.data_utils import read_problems
+from alloy_eval.parallel import map_ordered
+from alloy_eval.portfolio import problem_key
+from alloy_eval.scratch import default_scratch
+from alloy_eval.tracing import span, traced
+
+if TYPE_CHECKING:
+    from alloy_eval.alloy_pool import AlloyWorkerPool
+    from alloy_eval.portfolio import SolverPortfolio
+    from alloy_eval.timeouts import TimeoutPolicy
+
+DEFAULT_TIMEOUT = 30
+
+# Seconds between checks for cancellation while an analyzer process runs
+CANCEL_POLL_INTERVAL = 0.05
+
+# Checking backends: "alloy" always runs the analyzer, "native" first tries
+# the NumPy bounded evaluator and only runs the analyzer when it is undecided
+BACKENDS = ("alloy", "native")
+
+# Scopes a check is first run at when escalating, if below its own scope
+ESCALATION_SCOPES = (2, 3)
+
+# The default scope of a check command: "} for 4" (possibly followed by "but")
+SCOPE_RE = re.compile(r"(\}\s*for\s+)(\d+)\b(?=[^{}]*$)")
+
+
+def build_alloy_content(problem: AlloyProblem, solution: str) -> str:
+    """Assemble the complete Alloy module for a problem and solution."""
+    return f"""
+/* Problem: {problem.task_id} */
+
+{problem.signatures}
+
+/* 
+{problem.prompt}
+*/
+{problem.predicate_definition}\t{solution}
+}}
+
+{problem.check}
+""".strip()
 
 
 def create_alloy_file(
@@ -14,6 +71,11 @@ def create_alloy_file(
     """
     Create an Alloy file with the problem and solution.
 
+    The file is created in the process scratch directory, which is removed
+    when the process exits. With a debug directory, the content is written
+    once, to the debug file, and the scratch file is a hard link to it (or a
+    copy across file systems).
+
     Args:
         problem: The Alloy problem
         solution: The solution to test
@@ -21,62 +83,373 @@ def create_alloy_file(
         task_id: Optional task ID to use for debug files (overrides problem.task_id)
 
     Returns:
-        Tuple of (temp file path, debug file path or None)
+        Tuple of (scratch file path, debug file path or None)
     """
-    content = f"""
-/* Problem: {problem.task_id} */
+    content = build_alloy_content(problem, solution)
+    temp_file = default_scratch().new_path(".als")
 
-{problem.signatures}
+    debug_file = None
+    if debug_dir:
+        # Use provided task_id if available, otherwise use problem.task_id
+        file_task_id = task_id if task_id is not None else problem.task_id
+        debug_file = write_debug_file(debug_dir, file_task_id, content)
+        try:
+            os.link(debug_file, temp_file)
+        except OSError:
+            shutil.copyfile(debug_file, temp_file)
+    else:
+        with span("create_alloy_file"):
+            temp_file.write_text(content)
 
-/* 
-{problem.prompt}
-*/
-{problem.predicate_definition}\t{solution}
-}}
+    return str(temp_file), debug_file
 
-{problem.check}
-""".strip()
 
-    # Create temporary file for evaluation
-    with tempfile.NamedTemporaryFile(suffix=".als", mode="w", delete=False) as f:
+@traced("create_alloy_file")
+def write_debug_file(debug_dir: str | Path, task_id: str, content: str) -> str:
+    """Save an Alloy file as {task_id}.als in the debug directory."""
+    clean_name = task_id.replace("/", "_")
+    debug_file = Path(debug_dir) / f"{clean_name}.als"
+    with open(debug_file, "w") as f:
         f.write(content)
-        temp_file = f.name
+    return str(debug_file)
 
-    # If debug directory provided, create a permanent copy
-    debug_file = None
-    if debug_dir:
-        # Use provided task_id if available, otherwise use problem.task_id
-        file_task_id = task_id if task_id is not None else problem.task_id
-        clean_name = file_task_id.replace("/", "_")
-        debug_file = debug_dir / f"{clean_name}.als"
-        with open(debug_file, "w") as f:
-            f.write(content)
 
-    return temp_file, str(debug_file) if debug_file else None
+@traced("check_alloy_solution")
+def analyze(
+    content: str | None,
+    alloy_path: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    pool: "AlloyWorkerPool | None" = None,
+    als_file: str | Path | None = None,
+    solver: str | None = None,
+    cancel: threading.Event | None = None,
+) -> AnalyzerOutput:
+    """
+    Run every command of an Alloy module and parse what the analyzer reports.
+
+    On a worker pool the module is sent to a warm analyzer over its pipe,
+    without any file. Otherwise ``alloy exec`` runs on a file in the scratch
+    directory (or on als_file, if it already holds the module) and writes its
+    output to a private scratch directory, both removed after the run.
+
+    Args:
+        content: The Alloy source, or None to read it from als_file
+        alloy_path: Path to Alloy analyzer executable
+        timeout: Seconds before the analyzer run is abandoned
+        pool: Optional pool of persistent Alloy workers
+        als_file: Optional existing file holding the module
+        solver: Id of the SAT solver to use (default: the analyzer's)
+        cancel: Optional event that abandons the run when set, which then
+            reports the CANCELLED error
+
+    Returns:
+        The per-command verdicts and statistics, or the error of the run
+    """
+    if pool is not None:
+        if content is None:
+            content = Path(als_file).read_text()
+        return parse_worker_response(pool.run(content, timeout, solver, cancel))
+
+    existing = Path(als_file) if als_file is not None else None
+    with default_scratch().stage(content, existing) as (path, output_dir):
+        cmd = [alloy_path, "exec", "-o", str(output_dir), "-f", str(path)]
+        if solver is not None:
+            cmd[2:2] = ["-s", solver]
+        try:
+            # In its own process group, so that killing it also stops the JVM
+            # the alloy launcher script starts
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                start_new_session=True,
+            )
+        except Exception as e:
+            return AnalyzerOutput([], f"Error: {str(e)}")
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = deadline - time.monotonic()
+            if cancel is not None:
+                wait = min(wait, CANCEL_POLL_INTERVAL)
+            try:
+                stdout, stderr = process.communicate(timeout=max(wait, 0))
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    error = CANCELLED
+                elif time.monotonic() >= deadline:
+                    error = "Timeout: Alloy check took too long"
+                else:
+                    continue
+                _kill(process)
+                return AnalyzerOutput([], error)
+    return parse_alloy_output(stdout + stderr)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kill an analyzer process and everything it started."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError):
+        process.kill()
+    process.communicate()
+
+
+def analyze_with_portfolio(
+    content: str | None,
+    alloy_path: str,
+    key: str,
+    portfolio: "SolverPortfolio | None" = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    pool: "AlloyWorkerPool | None" = None,
+    als_file: str | Path | None = None,
+) -> AnalyzerOutput:
+    """
+    Run analyze, racing the solvers of a portfolio when one is given.
+
+    Args:
+        content: The Alloy source, or None to read it from als_file
+        alloy_path: Path to Alloy analyzer executable
+        key: Solver history key of the checked problems, see problem_key
+        portfolio: Optional solver portfolio
+        timeout: Seconds before each analyzer run is abandoned
+        pool: Optional pool of persistent Alloy workers
+        als_file: Optional existing file holding the module
+
+    Returns:
+        The per-command verdicts and statistics, or the error of the run
+    """
+    if portfolio is None:
+        return analyze(content, alloy_path, timeout, pool, als_file)
+    return portfolio.run(
+        key,
+        lambda solver, cancel: analyze(
+            content, alloy_path, timeout, pool, als_file, solver, cancel
+        ),
+    )
+
+
+def run_alloy(
+    als_file: str,
+    alloy_path: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    pool: "AlloyWorkerPool | None" = None,
+) -> AnalyzerOutput:
+    """
+    Run every command of an Alloy file and parse what the analyzer reports.
+
+    When a worker pool is given the file is analyzed on one of its warm
+    analyzers instead of launching a new Alloy process.
+
+    Args:
+        als_file: Path to the Alloy file
+        alloy_path: Path to Alloy analyzer executable
+        timeout: Seconds before the analyzer run is abandoned
+        pool: Optional pool of persistent Alloy workers
+
+    Returns:
+        The per-command verdicts and statistics, or the error of the run
+    """
+    return analyze(None, alloy_path, timeout, pool, als_file)
 
 
 def check_alloy_solution(
-    als_file: str, alloy_path: str, timeout: int = 30
+    als_file: str,
+    alloy_path: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    pool: "AlloyWorkerPool | None" = None,
 ) -> tuple[bool, str | None]:
-    """Run Alloy analyzer to check the solution."""
+    """Run Alloy analyzer to check the solution.
+
+    When a worker pool is given the check runs on one of its warm analyzers
+    instead of launching a new Alloy process.
+    """
+    return run_alloy(als_file, alloy_path, timeout, pool).verdict()
+
+
+def run_alloy_commands(
+    als_file: str,
+    alloy_path: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    pool: "AlloyWorkerPool | None" = None,
+) -> tuple[dict[str, bool], str | None]:
+    """
+    Run every command of an Alloy file and report each check separately.
+
+    Args:
+        als_file: Path to the Alloy file
+        alloy_path: Path to Alloy analyzer executable
+        timeout: Seconds before the analyzer run is abandoned
+        pool: Optional pool of persistent Alloy workers
+
+    Returns:
+        Tuple of (check name -> passed, error affecting the whole file or None)
+    """
+    output = run_alloy(als_file, alloy_path, timeout, pool)
+    if output.error is not None:
+        return {}, output.error
+    verdicts = output.check_verdicts()
+    return verdicts, None if verdicts else "Unknown error"
+
+
+@functools.lru_cache(maxsize=None)
+def alloy_version(alloy_path: str) -> str:
+    """
+    Identify the Alloy analyzer for cache keys.
+
+    Uses the output of ``alloy version`` when available, otherwise the
+    resolved executable path and its modification time.
+    """
     try:
-        cmd = [alloy_path, "exec", "-o", "/tmp", "-f", als_file]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        result = subprocess.run(
+            [alloy_path, "version"], capture_output=True, text=True, timeout=60
+        )
+        version = (result.stdout or result.stderr).strip()
+        if result.returncode == 0 and version:
+            return version
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+    resolved = Path(shutil.which(alloy_path) or alloy_path)
+    mtime = resolved.stat().st_mtime if resolved.exists() else 0
+    return f"{resolved}:{mtime}"
+
+
+def native_verdict(
+    problem: AlloyProblem, solution: str, backend: str
+) -> tuple[bool, str | None] | None:
+    """
+    Decide a solution without the analyzer when the backend allows it.
+
+    Args:
+        problem: The Alloy problem
+        solution: The solution to test
+        backend: One of BACKENDS
+
+    Returns:
+        A (passed, error message or None) verdict, or None if the analyzer
+        has to decide
+    """
+    if backend == "alloy":
+        return None
+    if backend != "native":
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    # NumPy is an optional dependency, only needed by this backend
+    from alloy_eval.native_backend import native_check
+
+    return native_check(problem, solution)
+
+
+def prepare_backend(backend: str, problems_file: str | Path) -> None:
+    """Load what a backend needs for a problems file (native: truth tables)."""
+    if backend == "native":
+        from alloy_eval.truth_tables import load_truth_tables
+
+        load_truth_tables(problems_file)
+
+
+def check_scope(problem: AlloyProblem) -> int | None:
+    """The default scope of a problem's check command, if it sets one."""
+    match = SCOPE_RE.search(problem.check)
+    return int(match.group(2)) if match else None
+
+
+def with_scope(problem: AlloyProblem, scope: int) -> AlloyProblem:
+    """A copy of a problem whose check runs at another default scope."""
+    check = SCOPE_RE.sub(lambda m: f"{m.group(1)}{scope}", problem.check)
+    return problem.model_copy(update={"check": check})
+
+
+def escalation_scopes(problem: AlloyProblem) -> list[int]:
+    """The reduced scopes to try a problem's check at, smallest first."""
+    scope = check_scope(problem)
+    if scope is None:
+        return []
+    return [k for k in ESCALATION_SCOPES if k < scope]
+
+
+def run_check(
+    problem: AlloyProblem,
+    content: str,
+    alloy_path: str,
+    pool: "AlloyWorkerPool | None" = None,
+    als_file: str | Path | None = None,
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+) -> AnalyzerOutput:
+    """
+    Run the analyzer on a problem's module.
+
+    Args:
+        problem: The problem the module checks
+        content: The module
+        alloy_path: Path to Alloy analyzer executable
+        pool: Optional pool of persistent Alloy workers
+        als_file: Optional existing file holding the module
+        portfolio: Optional solver portfolio to race SAT solvers
+        timeouts: Optional policy giving the run the problem's learned
+            timeout, and recording its duration
+
+    Returns:
+        The per-command verdicts and statistics, or the error of the run
+    """
+    key = problem_key(problem)
+    timeout = (
+        timeouts.timeout_for(key, pool is not None)
+        if timeouts is not None
+        else DEFAULT_TIMEOUT
+    )
+    start = time.perf_counter()
+    output = analyze_with_portfolio(
+        content, alloy_path, key, portfolio, timeout, pool, als_file
+    )
+    if timeouts is not None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timeouts.observe(key, pool is not None, elapsed_ms, output)
+    return output
+
 
-        if "UNSAT" in result.stderr:
-            return True, None
-        if "Syntax error" in result.stderr:
-            return False, "Syntax Error"
-        if "Type error" in result.stderr:
-            return False, "Type Error"
-        if "SAT" in result.stderr:
-            return False, "Counterexample found"
-        return False, "Unknown error"
+def run_escalated(
+    problem: AlloyProblem,
+    solution: str,
+    alloy_path: str,
+    pool: "AlloyWorkerPool | None" = None,
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+) -> tuple[AnalyzerOutput | None, int | None]:
+    """
+    Look for a counterexample at the reduced scopes of a problem's check.
 
-    except subprocess.TimeoutExpired:
-        return False, "Timeout: Alloy check took too long"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+    An instance within a smaller scope is also within the full scope, so a
+    counterexample found early is one the full check would find too.
+
+    Args:
+        problem: The Alloy problem
+        solution: The solution to test
+        alloy_path: Path to Alloy analyzer executable
+        pool: Optional pool of persistent Alloy workers
+        portfolio: Optional solver portfolio to race SAT solvers
+        timeouts: Optional timeout policy
+
+    Returns:
+        Tuple of (output, scope) of the first run that failed the solution
+        (with a counterexample, or a syntax or type error), or (None, None)
+        if the full-scope check has to decide
+    """
+    for scope in escalation_scopes(problem):
+        scoped = with_scope(problem, scope)
+        output = run_check(
+            scoped,
+            build_alloy_content(scoped, solution),
+            alloy_path,
+            pool,
+            portfolio=portfolio,
+            timeouts=timeouts,
+        )
+        if output.decisive() and not output.verdict()[0]:
+            return output, scope
+    return None, None
 
 
 def evaluate_single_problem(
@@ -85,20 +458,112 @@ def evaluate_single_problem(
     alloy_path: str,
     debug_dir: str | Path | None = None,
     task_id: str | None = None,
+    pool: "AlloyWorkerPool | None" = None,
+    cache: VerdictCache | None = None,
+    preflight: bool = True,
+    backend: str = "alloy",
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+    escalate: bool = False,
 ) -> EvaluationResult:
-    """Evaluate a single Alloy problem with the provided solution."""
-    # Create Alloy file
-    als_file, debug_file = create_alloy_file(problem, solution, debug_dir, task_id)
+    """Evaluate a single Alloy problem with the provided solution.
+
+    With preflight, solutions the Python parser finds malformed are rejected
+    without running the analyzer. With the native backend, solutions the NumPy
+    evaluator can decide are not sent to the analyzer either. With a verdict
+    cache, the analyzer only runs for .als content (under the same Alloy
+    version and timeout) that has not been checked before. With a solver
+    portfolio, analyzer runs race its SAT solvers. With a timeout policy, the
+    analyzer gets the problem's learned timeout and its solve time is recorded.
+    With escalation, the check is first run at reduced scopes, and only runs at
+    its own scope if none of them finds a counterexample.
+    """
+    content = build_alloy_content(problem, solution)
+    rejected = preflight_check(problem, solution) if preflight else None
+    cached = None
+    if rejected is not None:
+        cached = (False, rejected.category)
+    else:
+        cached = native_verdict(problem, solution, backend)
+    if cached is None and cache is not None:
+        version = pool.version if pool is not None else alloy_version(alloy_path)
+        cached = cache.get_verdict(content, version, DEFAULT_TIMEOUT)
+
+    # The debug copy, if any, is the only file written for the solution: the
+    # analyzer reads it directly
+    debug_file = None
+    if debug_dir:
+        debug_file = write_debug_file(
+            debug_dir, task_id if task_id is not None else problem.task_id, content
+        )
+
+    output = None
+    scope = None
+    if cached is not None:
+        passed, error = cached
+    else:
+        if escalate:
+            output, scope = run_escalated(
+                problem, solution, alloy_path, pool, portfolio, timeouts
+            )
+        if output is None:
+            scope = check_scope(problem) if escalate else None
+            output = run_check(
+                problem, content, alloy_path, pool, debug_file, portfolio, timeouts
+            )
+        passed, error = output.verdict()
+        if cache is not None:
+            cache.put_verdict(content, version, DEFAULT_TIMEOUT, passed, error)
+
+    return build_result(
+        problem.task_id, solution, passed, error, rejected, output, debug_file, scope
+    )
 
-    # Run Alloy check
-    passed, error = check_alloy_solution(als_file, alloy_path)
 
+def build_result(
+    task_id: str,
+    solution: str,
+    passed: bool,
+    error: str | None,
+    rejected: PreflightError | None = None,
+    output: AnalyzerOutput | None = None,
+    debug_file: str | None = None,
+    scope: int | None = None,
+) -> EvaluationResult:
+    """
+    Assemble an EvaluationResult from a verdict and how it was reached.
+
+    Args:
+        task_id: The task ID of the result
+        solution: The evaluated solution
+        passed: Whether the solution passed
+        error: Error message or None
+        rejected: The preflight rejection, if the solution was rejected
+        output: The analyzer output, if the analyzer ran
+        debug_file: Path of the saved debug file, if any
+        scope: Scope of the check run that reached the verdict, when escalating
+
+    Returns:
+        The evaluation result, with the analyzer's statistics and error
+        position when available
+    """
+    if rejected is not None:
+        details = str(rejected)
+    elif output is not None and output.message:
+        details = output.message
+    else:
+        details = ""
     return EvaluationResult(
-        task_id=problem.task_id,
+        task_id=task_id,
         passed=passed,
         solution=solution,
+        details=details,
         error_message=error,
         debug_file=debug_file,
+        commands=output.commands if output is not None else [],
+        error_line=output.line if output is not None else None,
+        error_column=output.column if output is not None else None,
+        counterexample_scope=scope if error == "Counterexample found" else None,
     )
 
 
@@ -107,6 +572,16 @@ def evaluate_functional_correctness(
     alloy_path: str,
     problems_file: str | Path,
     debug_dir: str | Path | None = None,
+    pool: "AlloyWorkerPool | None" = None,
+    workers: int = 1,
+    cache: VerdictCache | None = None,
+    preflight: bool = True,
+    backend: str = "alloy",
+    portfolio: "SolverPortfolio | None" = None,
+    timeouts: "TimeoutPolicy | None" = None,
+    escalate: bool = False,
+    only: list[str] | None = None,
+    exclude: list[str] | None = None,
 ) -> list[EvaluationResult]:
     """
     Evaluate a single solution against multiple problems.
@@ -117,12 +592,37 @@ def evaluate_functional_correctness(
         problems_file: Optional path to problems file. If not provided,
                       will look for default problems.json in package data
         debug_dir: Optional directory to save debug files
+        pool: Optional pool of persistent Alloy workers to run the checks on
+        workers: Number of problems to check concurrently
+        cache: Optional verdict cache to skip already-checked solutions
+        preflight: Reject malformed solutions without running the analyzer
+        backend: "alloy" to always run the analyzer, or "native" to try the
+                 NumPy bounded evaluator first
+        portfolio: Optional solver portfolio to race SAT solvers on each check
+        timeouts: Optional policy giving each check a learned timeout
+        escalate: Look for counterexamples at reduced scopes first
+        only: Patterns of the problems to evaluate, e.g. "graph/*" (default: all)
+        exclude: Patterns of problems to leave out
 
     Returns:
         A list of EvaluationResult containing pass/fail and error messages for each problem.
     """
-    problems = read_problems(problems_file)
-    return [
-        evaluate_single_problem(problem, solution, alloy_path, debug_dir)
-        for problem in problems
-    ]
+    problems = read_problems(problems_file, only, exclude)
+    prepare_backend(backend, problems_file)
+    return map_ordered(
+        lambda problem: evaluate_single_problem(
+            problem,
+            solution,
+            alloy_path,
+            debug_dir,
+            pool=pool,
+            cache=cache,
+            preflight=preflight,
+            backend=backend,
+            portfolio=portfolio,
+            timeouts=timeouts,
+            escalate=escalate,
+        ),
+        problems,
+        workers=workers,
+    )
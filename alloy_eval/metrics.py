@@ -0,0 +1,354 @@
+"""
+pass@k with bootstrap confidence intervals.
+
+With n sampled solutions per problem of which c pass, the unbiased estimator
+of pass@k (Chen et al., 2021) is
+
+    pass@k = 1 - C(n - c, k) / C(n, k)
+
+averaged over problems. Binomials are evaluated in log space from a table of
+log factorials, so whole arrays of (n, c) pairs are estimated at once.
+
+Confidence intervals come from a two-level bootstrap: each resample draws
+problems with replacement and, for each drawn problem, a new pass count
+c* ~ Binomial(n, c / n). The second level keeps intervals meaningful for a
+single predicate, where there is only one problem to draw. All groups (domains
+or predicates) are resampled together, as arrays of shape (resamples, problems).
+
+Result rows are aggregated to (n, c) per problem with pandas, so millions of
+rows reduce to one row per problem before any estimation. Results streamed
+from files too large to tabulate are counted with PassCounts instead.
+"""
+
+import re
+import warnings
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+from rich.table import Table
+
+from alloy_eval.ui_utils import console
+
+DEFAULT_KS = (1, 5, 10)
+
+SOLUTION_SUFFIX_RE = re.compile(r"_sol\d+$")
+
+
+def _log_factorials(n_max: int) -> np.ndarray:
+    """log(m!) for m = 0..n_max."""
+    return np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, n_max + 1)))))
+
+
+def pass_at_k(n: np.ndarray, c: np.ndarray, k: int) -> np.ndarray:
+    """
+    Unbiased pass@k of each problem.
+
+    Args:
+        n: Number of samples of each problem
+        c: Number of passing samples of each problem (same shape as n)
+        k: Number of attempts
+
+    Returns:
+        pass@k of each problem, NaN where n < k
+    """
+    n = np.asarray(n, dtype=np.int64)
+    c = np.asarray(c, dtype=np.int64)
+    log_fact = _log_factorials(int(n.max(initial=0)))
+    failing = n - c
+    # C(n - c, k) / C(n, k) = (n - c)! (n - k)! / ((n - c - k)! n!)
+    possible = failing >= k
+    log_ratio = (
+        log_fact[failing]
+        + log_fact[np.maximum(n - k, 0)]
+        - log_fact[np.where(possible, failing - k, 0)]
+        - log_fact[n]
+    )
+    estimate = np.where(possible, 1.0 - np.exp(log_ratio), 1.0)
+    return np.where(n >= k, estimate, np.nan)
+
+
+def results_frame(
+    results: Iterable[dict[str, Any]], domain: str | None = None
+) -> pd.DataFrame:
+    """
+    Tabulate result dictionaries as (domain, predicate, passed) rows.
+
+    The predicate is the task_id without its "_solN" suffix. Task IDs of the
+    form "domain/predicate" carry their own domain; others get the given one.
+    Results without a generated solution count as failed samples.
+
+    Args:
+        results: Result dictionaries, as saved by run_tests
+        domain: Domain of results whose task_id does not name one
+
+    Returns:
+        A DataFrame with domain, predicate and passed columns
+    """
+    results = [r for r in results if "task_id" in r]
+    frame = pd.DataFrame(
+        {
+            "task_id": [r["task_id"] for r in results],
+            "passed": [bool(r.get("passed")) for r in results],
+        }
+    )
+    if frame.empty:
+        return pd.DataFrame({"domain": [], "predicate": [], "passed": []}).astype(
+            {"domain": object, "predicate": object, "passed": bool}
+        )
+    task = frame["task_id"].str.replace(SOLUTION_SUFFIX_RE, "", regex=True)
+    parts = task.str.rpartition("/")
+    frame["domain"] = parts[0].where(parts[1] == "/", domain or "all")
+    frame["predicate"] = parts[2]
+    return frame[["domain", "predicate", "passed"]]
+
+
+class PassCounts:
+    """Running samples n and passes c per (domain, predicate), one result at a time."""
+
+    def __init__(self, domain: str | None = None):
+        """
+        Initialize the counters.
+
+        Args:
+            domain: Domain of results whose task_id does not name one; it can
+                also be set any time before frame() is called
+        """
+        self.domain = domain
+        self.counts: dict[tuple[str | None, str], list[int]] = {}
+
+    def add(self, result: dict[str, Any]) -> None:
+        """Count one result dictionary (results without a task_id are ignored)."""
+        if "task_id" not in result:
+            return
+        task = SOLUTION_SUFFIX_RE.sub("", result["task_id"])
+        domain, slash, predicate = task.rpartition("/")
+        counts = self.counts.setdefault((domain if slash else None, predicate), [0, 0])
+        counts[0] += 1
+        counts[1] += bool(result.get("passed"))
+
+    def frame(self) -> pd.DataFrame:
+        """Return the counts as a problem_counts DataFrame."""
+        totals: dict[tuple[str, str], list[int]] = {}
+        for (domain, predicate), (n, c) in self.counts.items():
+            key = (domain if domain is not None else self.domain or "all", predicate)
+            total = totals.setdefault(key, [0, 0])
+            total[0] += n
+            total[1] += c
+        keys = sorted(totals)
+        return pd.DataFrame(
+            {
+                "domain": [domain for domain, _ in keys],
+                "predicate": [predicate for _, predicate in keys],
+                "n": [totals[key][0] for key in keys],
+                "c": [totals[key][1] for key in keys],
+            }
+        )
+
+
+def problem_counts(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce result rows to samples n and passes c per (domain, predicate).
+
+    Frames that already hold n and c columns (see PassCounts) are returned as is.
+    """
+    if {"n", "c"} <= set(frame.columns):
+        return frame
+    return (
+        frame.groupby(["domain", "predicate"], sort=True)["passed"]
+        .agg(n="size", c="sum")
+        .reset_index()
+    )
+
+
+def bootstrap_pass_at_k(
+    n: np.ndarray,
+    c: np.ndarray,
+    groups: np.ndarray,
+    ks: Sequence[int],
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    rng: np.random.Generator | None = None,
+) -> dict[int, np.ndarray]:
+    """
+    Mean pass@k of each group of problems with bootstrap confidence intervals.
+
+    Every group is resampled at once: problems are drawn within their own
+    group. pass@k of resampled pass counts is biased (towards 1 - (1 - c/n)^k
+    rather than the estimate), so each interval is shifted by its group's
+    bootstrap bias. Problems with fewer than k samples are left out of pass@k.
+
+    Args:
+        n: Number of samples of each problem
+        c: Number of passing samples of each problem
+        groups: Group number of each problem, from 0 to the number of groups - 1
+        ks: Numbers of attempts
+        resamples: Number of bootstrap resamples
+        confidence: Coverage of the intervals
+        rng: Random generator (default: seeded, for reproducible intervals)
+
+    Returns:
+        For each k, an array of (estimate, low, high) rows, one per group; NaN
+        for groups without a problem of k samples
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    order = np.argsort(groups, kind="stable")
+    n = np.asarray(n, dtype=np.int64)[order]
+    c = np.asarray(c, dtype=np.int64)[order]
+    starts = np.searchsorted(groups[order], np.arange(groups.max() + 1))
+    sizes = np.diff(np.append(starts, len(n)))
+    slot_start = np.repeat(starts, sizes)
+    slot_size = np.repeat(sizes, sizes)
+
+    def group_means(values: np.ndarray) -> np.ndarray:
+        eligible = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(eligible, values, 0.0), starts, axis=-1)
+        counts = np.add.reduceat(eligible, starts, axis=-1)
+        return np.divide(
+            sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0
+        )
+
+    # The same resamples serve every k; they are drawn in chunks to bound
+    # memory on very many problems
+    chunk = max(1, 10_000_000 // len(n))
+    boot: dict[int, list[np.ndarray]] = {k: [] for k in ks}
+    for start in range(0, resamples, chunk):
+        size = (min(chunk, resamples - start), len(n))
+        drawn = slot_start + (rng.random(size) * slot_size).astype(np.int64)
+        n_star = n[drawn]
+        c_star = rng.binomial(n_star, c[drawn] / n_star)
+        for k in ks:
+            boot[k].append(group_means(pass_at_k(n_star, c_star, k)))
+
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    with warnings.catch_warnings():
+        # Groups without a problem of k samples give all-NaN slices
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for k in ks:
+            estimate = group_means(pass_at_k(n, c, k))
+            means = np.concatenate(boot[k])
+            bias = np.nanmean(means, axis=0) - estimate
+            low, high = np.nanpercentile(means, [tail, 100 - tail], axis=0)
+            intervals[k] = np.column_stack(
+                (estimate, np.clip(low - bias, 0, 1), np.clip(high - bias, 0, 1))
+            )
+    return intervals
+
+
+def pass_at_k_table(
+    frame: pd.DataFrame,
+    ks: Sequence[int] = DEFAULT_KS,
+    by: Sequence[str] = ("domain",),
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    pass@k with confidence intervals for each group of problems.
+
+    Args:
+        frame: Result rows (see results_frame) or per-problem counts
+        ks: Numbers of attempts to estimate pass@k for
+        by: Columns to group problems by (() for a single overall row)
+        resamples: Number of bootstrap resamples
+        confidence: Coverage of the intervals
+        seed: Seed of the bootstrap
+
+    Returns:
+        A DataFrame with the group columns, problems, samples, and for each k
+        the columns "pass@k", "pass@k_low" and "pass@k_high"
+    """
+    counts = problem_counts(frame)
+    if by:
+        grouped = counts.groupby(list(by), sort=True)
+        groups = grouped.ngroup().to_numpy()
+        table = grouped["n"].agg(problems="size", samples="sum").reset_index()
+    else:
+        groups = np.zeros(len(counts), dtype=np.int64)
+        table = pd.DataFrame(
+            {"problems": [len(counts)], "samples": [int(counts["n"].sum())]}
+        )
+    if len(counts) == 0:
+        for k in ks:
+            for column in (f"pass@{k}", f"pass@{k}_low", f"pass@{k}_high"):
+                table[column] = np.nan
+        return table
+    intervals = bootstrap_pass_at_k(
+        counts["n"].to_numpy(),
+        counts["c"].to_numpy(),
+        groups,
+        ks,
+        resamples,
+        confidence,
+        np.random.default_rng(seed),
+    )
+    for k, rows in intervals.items():
+        table[f"pass@{k}"] = rows[:, 0]
+        table[f"pass@{k}_low"] = rows[:, 1]
+        table[f"pass@{k}_high"] = rows[:, 2]
+    return table
+
+
+def pass_at_k_report(
+    frame: pd.DataFrame, ks: Sequence[int] = DEFAULT_KS, **kwargs: Any
+) -> dict[str, Any]:
+    """
+    pass@k overall and per domain, as JSON-serializable report entries.
+
+    Args:
+        frame: Result rows (see results_frame) or per-problem counts
+        ks: Numbers of attempts to estimate pass@k for
+        **kwargs: Bootstrap options of pass_at_k_table
+
+    Returns:
+        Dictionary with "overall" and "domains" entries mapping "pass@k" to
+        {"estimate", "low", "high"} (null where no problem has k samples)
+    """
+
+    def entries(row: pd.Series) -> dict[str, Any]:
+        return {
+            f"pass@{k}": {
+                name: (None if pd.isna(row[column]) else round(float(row[column]), 4))
+                for name, column in (
+                    ("estimate", f"pass@{k}"),
+                    ("low", f"pass@{k}_low"),
+                    ("high", f"pass@{k}_high"),
+                )
+            }
+            for k in ks
+        }
+
+    overall = pass_at_k_table(frame, ks, by=(), **kwargs).iloc[0]
+    domains = pass_at_k_table(frame, ks, by=("domain",), **kwargs)
+    return {
+        "overall": entries(overall),
+        "domains": {row["domain"]: entries(row) for _, row in domains.iterrows()},
+    }
+
+
+def display_pass_at_k(table: pd.DataFrame, ks: Sequence[int], title: str) -> None:
+    """Print a pass@k table as "estimate [low, high]" cells."""
+    group_columns = [
+        column for column in ("domain", "predicate") if column in table.columns
+    ]
+    rich_table = Table(
+        show_header=True, header_style="bold magenta", title=f"[bold]{title}[/bold]"
+    )
+    for column in [*group_columns, "problems", "samples"]:
+        rich_table.add_column(column.capitalize())
+    for k in ks:
+        rich_table.add_column(f"pass@{k}")
+    for _, row in table.iterrows():
+        cells = [str(row[column]) for column in group_columns]
+        cells += [str(row["problems"]), str(row["samples"])]
+        for k in ks:
+            if pd.isna(row[f"pass@{k}"]):
+                cells.append("-")
+            else:
+                cells.append(
+                    f"{row[f'pass@{k}']:.3f} "
+                    f"[{row[f'pass@{k}_low']:.3f}, {row[f'pass@{k}_high']:.3f}]"
+                )
+        rich_table.add_row(*cells)
+    console.print(rich_table)
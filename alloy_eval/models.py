@@ -19,6 +19,20 @@ class AlloyPred(BaseModel):
     content: str
 
 
+class CommandVerdict(BaseModel):
+    """Outcome and solver statistics of one analyzer command."""
+
+    name: str
+    check: bool = True
+    satisfiable: Optional[bool] = None
+    solver: Optional[str] = None
+    translation_ms: Optional[int] = None
+    solve_ms: Optional[int] = None
+    primary_vars: Optional[int] = None
+    total_vars: Optional[int] = None
+    clauses: Optional[int] = None
+
+
 class EvaluationResult(BaseModel):
     """Represents the result of evaluating a single problem."""
 
@@ -28,3 +42,7 @@ class EvaluationResult(BaseModel):
     details: str = ""
     error_message: Optional[str] = None
     debug_file: Optional[str] = None
+    commands: list[CommandVerdict] = []
+    error_line: Optional[int] = None
+    error_column: Optional[int] = None
+    counterexample_scope: Optional[int] = None
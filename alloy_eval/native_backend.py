@@ -0,0 +1,1006 @@
+"""
+In-process bounded checker for small relational problems.
+
+Instead of running the Alloy analyzer, the check command of a problem is
+evaluated directly on instances of its signatures, with every relation held
+as a NumPy boolean array (sets as ``(B, N)`` and binary relations as
+``(B, N, N)`` arrays over a batch of B instances and N atoms):
+
+- if the scope is small enough, every instance is enumerated and the verdict
+  is exact either way;
+- otherwise random instances are sampled, which can only prove that a
+  counterexample exists.
+
+Whenever the backend cannot decide (larger problems without a sampled
+counterexample, constructs it does not model, facts, ``but`` scopes, ...),
+native_check returns None and the solution is left to the analyzer.
+
+Integers follow Alloy's default 4-bit wraparound semantics.
+"""
+
+import hashlib
+import itertools
+import math
+from functools import lru_cache
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from alloy_eval.alloy_lexer import LexError, Token, tokenize
+from alloy_eval.alloy_parser import (
+    FORMULA,
+    Environment,
+    Node,
+    Parser,
+    PreflightError,
+    Unsupported,
+    relation,
+)
+from alloy_eval.models import AlloyProblem
+
+# Enumerate every instance when there are at most this many, otherwise sample
+EXHAUSTIVE_LIMIT = 1 << 18
+SAMPLES = 4096
+CHUNK_SIZE = 1 << 16
+DEFAULT_SCOPE = 3
+BITWIDTH = 4
+
+
+class Sig(NamedTuple):
+    """A signature declaration."""
+
+    name: str
+    parent: str | None
+    subset: bool  # declared with "in" rather than "extends"
+    abstract: bool
+    multiplicity: str | None  # "one", "lone" or "some" (top-level sigs only)
+
+
+class Field(NamedTuple):
+    """A binary field declaration ``owner.name: multiplicity target``."""
+
+    name: str
+    owner: str
+    target: str
+    multiplicity: str  # "one", "lone", "some" or "set"
+
+
+class Schema(NamedTuple):
+    """The sigs and fields of a problem, in declaration order."""
+
+    sigs: dict[str, Sig]
+    fields: dict[str, Field]
+
+    def top(self, name: str) -> str:
+        """The top-level ancestor of a sig."""
+        while self.sigs[name].parent is not None:
+            name = self.sigs[name].parent
+        return name
+
+
+class Variable(NamedTuple):
+    """A choice made when building an instance, with its number of options."""
+
+    kind: str  # "class", "subset" or "field"
+    target: str
+    slot: int
+    size: int
+
+
+def _matching(tokens: list[Token], start: int) -> int:
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i].text in ("(", "[", "{"):
+            depth += 1
+        elif tokens[i].text in (")", "]", "}"):
+            depth -= 1
+            if depth == 0:
+                return i
+    raise Unsupported("unbalanced brackets")
+
+
+def _tokens(source: str) -> list[Token]:
+    try:
+        return tokenize(source)
+    except LexError as e:
+        raise Unsupported(str(e))
+
+
+def _name(tokens: list[Token], i: int) -> str:
+    if i >= len(tokens) or tokens[i].kind != "ident":
+        raise Unsupported("expected a name")
+    return tokens[i].text
+
+
+def parse_schema(signatures: str) -> Schema:
+    """
+    Parse signatures made of plain sig declarations with binary fields.
+
+    Raises:
+        Unsupported: For facts, functions, imports, multi-arity fields, etc.
+    """
+    tokens = _tokens(signatures)
+    sigs: dict[str, Sig] = {}
+    fields: dict[str, Field] = {}
+    i = 0
+    while i < len(tokens):
+        modifiers = set()
+        while tokens[i].text in ("abstract", "one", "lone", "some"):
+            modifiers.add(tokens[i].text)
+            i += 1
+        if tokens[i].text != "sig":
+            raise Unsupported(tokens[i].text)
+        names = [_name(tokens, i + 1)]
+        i += 2
+        while tokens[i].text == ",":
+            names.append(_name(tokens, i + 1))
+            i += 2
+
+        parent, subset = None, False
+        if tokens[i].text in ("extends", "in"):
+            subset = tokens[i].text == "in"
+            parent = _name(tokens, i + 1)
+            i += 2
+        multiplicity = next(iter(modifiers - {"abstract"}), None)
+        if len(modifiers - {"abstract"}) > 1 or (parent and multiplicity):
+            raise Unsupported("sig multiplicity")
+        if "abstract" in modifiers and subset:
+            raise Unsupported("abstract subset sig")
+        for name in names:
+            sigs[name] = Sig(
+                name, parent, subset, "abstract" in modifiers, multiplicity
+            )
+
+        if tokens[i].text != "{":
+            raise Unsupported(tokens[i].text)
+        end = _matching(tokens, i)
+        declared = _parse_fields(tokens[i + 1 : end], names)
+        if declared and len(names) > 1:
+            raise Unsupported("fields shared by several sigs")
+        fields.update(declared)
+        i = end + 1
+        if i < len(tokens) and tokens[i].text == "{":
+            raise Unsupported("signature fact")
+
+    for sig in sigs.values():
+        if sig.parent is not None and sig.parent not in sigs:
+            raise Unsupported(sig.parent)
+    for field in fields.values():
+        if field.target not in sigs:
+            raise Unsupported(field.target)
+    return Schema(sigs, fields)
+
+
+def _parse_fields(tokens: list[Token], owners: list[str]) -> dict[str, Field]:
+    """Parse ``a, b: [mult] Sig, c: Sig`` declarations."""
+    fields = {}
+    i = 0
+    while i < len(tokens):
+        names = [_name(tokens, i)]
+        i += 1
+        while i < len(tokens) and tokens[i].text == ",":
+            names.append(_name(tokens, i + 1))
+            i += 2
+        if i >= len(tokens) or tokens[i].text != ":":
+            raise Unsupported("field declaration")
+        i += 1
+        multiplicity = "one"
+        if i < len(tokens) and tokens[i].text in ("one", "lone", "some", "set"):
+            multiplicity = tokens[i].text
+            i += 1
+        target = _name(tokens, i)
+        i += 1
+        if i < len(tokens):
+            if tokens[i].text != ",":
+                raise Unsupported("field range")
+            i += 1
+        for name in names:
+            fields[name] = Field(name, owners[0], target, multiplicity)
+    return fields
+
+
+def parse_check(check: str) -> tuple[list[Token], int]:
+    """
+    Split ``check [name] { formula } [for N]`` into its formula tokens and scope.
+
+    Raises:
+        Unsupported: For named assertions and scopes other than ``for N``
+    """
+    tokens = _tokens(check)
+    i = 1 if tokens and tokens[0].text == "check" else None
+    if i is None:
+        raise Unsupported("not a check command")
+    if tokens[i].kind == "ident":
+        i += 1
+    if tokens[i].text != "{":
+        raise Unsupported("check of a named assertion")
+    end = _matching(tokens, i)
+    rest = [token.text for token in tokens[end + 1 :]]
+    if not rest:
+        scope = DEFAULT_SCOPE
+    elif len(rest) == 2 and rest[0] == "for" and rest[1].isdigit():
+        scope = int(rest[1])
+    else:
+        raise Unsupported("scope")
+    return tokens[i + 1 : end], scope
+
+
+def wrap(values: np.ndarray) -> np.ndarray:
+    """Wrap integers to Alloy's default two's complement bitwidth."""
+    half = 1 << (BITWIDTH - 1)
+    return (values + half) % (2 * half) - half
+
+
+class Layout:
+    """
+    Atom layout of a schema at a scope.
+
+    Every top-level sig owns a fixed range of atom slots; an instance with n
+    atoms of that sig uses the first n. Subsig membership and field tuples are
+    decoded from a vector of choices, one per Variable.
+    """
+
+    def __init__(self, schema: Schema, scope: int):
+        self.schema = schema
+        self.tops = [sig for sig in schema.sigs.values() if sig.parent is None]
+        self.slots: dict[str, range] = {}
+        self.counts: dict[str, range] = {}
+        start = 0
+        for sig in self.tops:
+            size = 1 if sig.multiplicity in ("one", "lone") else scope
+            self.slots[sig.name] = range(start, start + size)
+            low = 1 if sig.multiplicity in ("one", "some") else 0
+            self.counts[sig.name] = range(low, size + 1)
+            start += size
+        self.atoms = start
+
+        # Each atom of a top-level sig belongs to one branch of its extends tree
+        self.options = {sig.name: self._branches(sig.name) for sig in self.tops}
+        self.subsets = self._subsets_in_order()
+
+    def _branches(self, name: str) -> list[frozenset[str]]:
+        """The sets of extending subsigs an atom of a sig can belong to."""
+        sig = self.schema.sigs[name]
+        children = [
+            s.name
+            for s in self.schema.sigs.values()
+            if s.parent == name and not s.subset
+        ]
+        branches = [] if sig.abstract and children else [frozenset()]
+        for child in children:
+            branches += [branch | {child} for branch in self._branches(child)]
+        return branches
+
+    def _subsets_in_order(self) -> list[Sig]:
+        """Subset sigs, each after the sig it is a subset of."""
+        ordered: list[Sig] = []
+        pending = [s for s in self.schema.sigs.values() if s.subset]
+        while pending:
+            ready = [
+                s
+                for s in pending
+                if not self.schema.sigs[s.parent].subset
+                or self.schema.sigs[s.parent] in ordered
+            ]
+            if not ready:
+                raise Unsupported("cyclic subset sigs")
+            ordered += ready
+            pending = [s for s in pending if s not in ready]
+        return ordered
+
+    def variables(self, counts: dict[str, int]) -> list[Variable]:
+        """The choices defining an instance with the given top-level sig sizes."""
+        variables = []
+        for sig in self.tops:
+            if len(self.options[sig.name]) > 1:
+                for slot in self.slots[sig.name][: counts[sig.name]]:
+                    variables.append(
+                        Variable("class", sig.name, slot, len(self.options[sig.name]))
+                    )
+        for sig in self.subsets:
+            top = self.schema.top(sig.name)
+            for slot in self.slots[top][: counts[top]]:
+                variables.append(Variable("subset", sig.name, slot, 2))
+        for field in self.schema.fields.values():
+            owner = self.schema.top(field.owner)
+            targets = counts[self.schema.top(field.target)]
+            size = {
+                "one": targets,
+                "lone": targets + 1,
+                "some": 1 << targets,
+                "set": 1 << targets,
+            }[field.multiplicity]
+            for slot in self.slots[owner][: counts[owner]]:
+                variables.append(Variable("field", field.name, slot, max(size, 1)))
+        return variables
+
+    def decode(
+        self,
+        variables: list[Variable],
+        values: np.ndarray,
+        counts: dict[str, np.ndarray],
+    ) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """
+        Build the relations of a batch of instances.
+
+        Args:
+            variables: The choices, as returned by variables()
+            values: The chosen option of every variable, shape (B, len(variables))
+            counts: The size of every top-level sig, each of shape (B,)
+
+        Returns:
+            Tuple of (relation arrays by sig and field name, validity mask (B,))
+        """
+        batch = len(values)
+        members = {
+            name: np.zeros((batch, self.atoms), bool) for name in self.schema.sigs
+        }
+        for sig in self.tops:
+            slots = self.slots[sig.name]
+            members[sig.name][:, slots.start : slots.stop] = (
+                np.arange(len(slots))[None, :] < counts[sig.name][:, None]
+            )
+        fields = {
+            name: np.zeros((batch, self.atoms, self.atoms), bool)
+            for name in self.schema.fields
+        }
+
+        for kind in ("class", "subset", "field"):
+            for column, variable in enumerate(variables):
+                if variable.kind != kind:
+                    continue
+                value = values[:, column]
+                slot = variable.slot
+                if kind == "class":
+                    top = members[variable.target][:, slot]
+                    for k, branch in enumerate(self.options[variable.target]):
+                        for name in branch:
+                            members[name][:, slot] |= top & (value == k)
+                elif kind == "subset":
+                    parent = self.schema.sigs[variable.target].parent
+                    members[variable.target][:, slot] = (value == 1) & members[parent][
+                        :, slot
+                    ]
+                else:
+                    self._decode_row(fields[variable.target], variable, value)
+
+        valid = np.ones(batch, bool)
+        for name, field in self.schema.fields.items():
+            owners = members[field.owner]
+            rel = fields[name] & owners[:, :, None] & members[field.target][:, None, :]
+            fields[name] = rel
+            sizes = rel.sum(axis=2)
+            ok = {
+                "one": sizes == 1,
+                "lone": sizes <= 1,
+                "some": sizes >= 1,
+                "set": np.ones_like(owners),
+            }[field.multiplicity]
+            valid &= np.all(~owners | ok, axis=1)
+        return {**members, **fields}, valid
+
+    def _decode_row(
+        self, rel: np.ndarray, variable: Variable, value: np.ndarray
+    ) -> None:
+        field = self.schema.fields[variable.target]
+        targets = self.slots[self.schema.top(field.target)]
+        if field.multiplicity in ("some", "set"):
+            bits = (value[:, None] >> np.arange(len(targets))[None, :]) & 1
+            rel[:, variable.slot, targets.start : targets.stop] = bits.astype(bool)
+            return
+        column = value - 1 if field.multiplicity == "lone" else value
+        chosen = column >= 0
+        rows = np.nonzero(chosen)[0]
+        rel[rows, variable.slot, targets.start + column[chosen]] = True
+
+    def exhaustive_size(self) -> int:
+        """Number of choice vectors covering every instance."""
+        return sum(
+            math.prod(v.size for v in self.variables(counts))
+            for counts in self.size_combinations()
+        )
+
+    def size_combinations(self) -> Iterator[dict[str, int]]:
+        names = [sig.name for sig in self.tops]
+        for sizes in itertools.product(*(self.counts[name] for name in names)):
+            yield dict(zip(names, sizes))
+
+    def enumerate(
+        self,
+    ) -> Iterator[tuple[dict[str, np.ndarray], np.ndarray]]:
+        """Yield batches of every instance, as (relations, validity mask)."""
+        for combination in self.size_combinations():
+            variables = self.variables(combination)
+            sizes = np.array([v.size for v in variables], dtype=np.int64)
+            strides = np.cumprod(np.concatenate([[1], sizes]))[:-1]
+            total = math.prod(v.size for v in variables)
+            for start in range(0, total, CHUNK_SIZE):
+                index = np.arange(start, min(total, start + CHUNK_SIZE), dtype=np.int64)
+                values = (index[:, None] // strides[None, :]) % sizes[None, :]
+                counts = {
+                    name: np.full(len(index), size)
+                    for name, size in combination.items()
+                }
+                yield self.decode(variables, values, counts)
+
+    def sample(
+        self, count: int, rng: np.random.Generator
+    ) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """Draw random instances of varying sizes and densities."""
+        counts = {
+            name: rng.integers(sizes.start, sizes.stop, count)
+            for name, sizes in self.counts.items()
+        }
+        full = {name: sizes.stop - 1 for name, sizes in self.counts.items()}
+        variables = self.variables(full)
+        values = np.zeros((count, len(variables)), dtype=np.int64)
+        density = {name: rng.random(count) for name in self.schema.sigs}
+        density.update({name: rng.random(count) for name in self.schema.fields})
+        for column, variable in enumerate(variables):
+            p = density[variable.target]
+            if variable.kind == "class":
+                values[:, column] = rng.integers(0, variable.size, count)
+            elif variable.kind == "subset":
+                values[:, column] = rng.random(count) < p
+            else:
+                values[:, column] = self._sample_row(variable, counts, p, rng)
+        return self.decode(variables, values, counts)
+
+    def _sample_row(
+        self,
+        variable: Variable,
+        counts: dict[str, np.ndarray],
+        p: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        field = self.schema.fields[variable.target]
+        top = self.schema.top(field.target)
+        count = len(p)
+        if field.multiplicity in ("some", "set"):
+            bits = rng.random((count, len(self.slots[top]))) < p[:, None]
+            return (bits << np.arange(bits.shape[1])[None, :]).sum(axis=1)
+        column = (rng.random(count) * counts[top]).astype(np.int64)
+        if field.multiplicity == "lone":
+            return np.where(rng.random(count) < p, column + 1, 0)
+        return column
+
+
+class Evaluator:
+    """Evaluates parsed formulas over a batch of instances."""
+
+    def __init__(
+        self,
+        relations: dict[str, np.ndarray],
+        atoms: int,
+        predicates: dict[str, list[Node]],
+    ):
+        self.relations = relations
+        self.atoms = atoms
+        self.predicates = predicates
+        self.singletons = np.eye(atoms, dtype=bool)[:, None, :]
+        self._predicate_values: dict[str, np.ndarray | None] = {}
+        self._names: dict[int, frozenset[str]] = {}
+        self._memo: dict[int, np.ndarray] = {}
+
+    def formula(self, nodes: list[Node] | tuple[Node, ...], env: dict) -> np.ndarray:
+        """The conjunction of formulas, shape (B,) or broadcastable to it."""
+        result = np.ones(1, bool)
+        for node in nodes:
+            result = result & self.evaluate(node, env)
+        return result
+
+    def names(self, node: Node) -> frozenset[str]:
+        """Every name a node refers to."""
+        key = id(node)
+        if key not in self._names:
+            names = {node.args[0]} if node.op == "name" else set()
+            for arg in _children(node):
+                names |= self.names(arg)
+            self._names[key] = frozenset(names)
+        return self._names[key]
+
+    def evaluate(self, node: Node, env: dict) -> np.ndarray:
+        # Subexpressions not using bound variables are only computed once
+        if self.names(node).isdisjoint(env):
+            key = id(node)
+            if key not in self._memo:
+                self._memo[key] = self._evaluate(node, {})
+            return self._memo[key]
+        return self._evaluate(node, env)
+
+    def _evaluate(self, node: Node, env: dict) -> np.ndarray:
+        op, args = node.op, node.args
+        if op == "name":
+            name = args[0]
+            if name in env:
+                return env[name]
+            if name in self.predicates:
+                if name not in self._predicate_values:
+                    # Guard against a predicate body referring to itself
+                    self._predicate_values[name] = None
+                    self._predicate_values[name] = self.formula(
+                        self.predicates[name], {}
+                    )
+                if self._predicate_values[name] is None:
+                    raise Unsupported("recursive predicate")
+                return self._predicate_values[name]
+            return self.relations[name]
+        if op == "number":
+            return np.array([args[0]])
+        if op == "none":
+            return np.zeros((1, self.atoms), bool)
+        if op == "iden":
+            return np.eye(self.atoms, dtype=bool)[None]
+        if op == "block":
+            return self.formula(args, env)
+        if op == "quantifier":
+            return self.quantified(*args, env)
+        if op == "comprehension":
+            return self.comprehension(*args, env)
+        if op == "let":
+            bindings, body = args
+            env = dict(env)
+            for name, value in bindings:
+                env[name] = self.evaluate(value, env)
+            return self.evaluate(body, env)
+        if op == "else":
+            condition, then, otherwise = (self.evaluate(a, env) for a in args)
+            return (condition & then) | (~condition & otherwise)
+
+        values = [self.evaluate(a, env) for a in args]
+        if op == "not":
+            return ~values[0]
+        if len(values) == 1:
+            return self.unary(op, values[0])
+        return self.binary(op, *values)
+
+    def unary(self, op: str, value: np.ndarray) -> np.ndarray:
+        if op == "~":
+            return np.swapaxes(value, 1, 2)
+        if op in ("^", "*"):
+            closure = value
+            for _ in range(max(1, math.ceil(math.log2(self.atoms)))):
+                closure = closure | _compose(closure, closure)
+            return (
+                closure | np.eye(self.atoms, dtype=bool)[None] if op == "*" else closure
+            )
+
+        size = value.reshape(len(value), -1).sum(axis=1)
+        if op == "#":
+            return wrap(size)
+        return {
+            "no": size == 0,
+            "some": size > 0,
+            "lone": size <= 1,
+            "one": size == 1,
+        }[op]
+
+    def binary(self, op: str, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        if op == "and":
+            return left & right
+        if op == "or":
+            return left | right
+        if op == "implies":
+            return ~left | right
+        if op == "iff":
+            return left == right
+        if op in ("=", "!="):
+            if left.ndim == 1:
+                equal = left == right
+            else:
+                equal = _all(left == right)
+            return equal if op == "=" else ~equal
+        if op == "in":
+            return ~_any(left & ~right)
+        if op in ("<", ">", "=<", ">="):
+            return {
+                "<": np.less,
+                ">": np.greater,
+                "=<": np.less_equal,
+                ">=": np.greater_equal,
+            }[op](left, right)
+        if op == "+":
+            return left | right
+        if op == "-":
+            return left & ~right
+        if op == "&":
+            return left & right
+        if op == "++":
+            if left.ndim == 2:
+                return left | right
+            return (left & ~right.any(axis=2)[:, :, None]) | right
+        if op == "->":
+            return left[:, :, None] & right[:, None, :]
+        if op == "<:":
+            return left & right if right.ndim == 2 else left[:, :, None] & right
+        if op == ":>":
+            return left & right if left.ndim == 2 else left & right[:, None, :]
+        if op == ".":
+            return _join(left, right)
+        raise Unsupported(op)
+
+    def assignments(
+        self, declarations: tuple, env: dict
+    ) -> Iterator[tuple[np.ndarray, dict, tuple[int, ...]]]:
+        """Yield (mask, environment, atoms) for each binding of the variables."""
+        variables = [(name, bound) for names, bound in declarations for name in names]
+
+        def bind(i: int, mask: np.ndarray, env: dict, atoms: tuple[int, ...]):
+            if i == len(variables):
+                yield mask, env, atoms
+                return
+            name, bound = variables[i]
+            members = self.evaluate(bound, env)
+            for atom in range(self.atoms):
+                inner = mask & members[:, atom]
+                if inner.any():
+                    yield from bind(
+                        i + 1,
+                        inner,
+                        {**env, name: self.singletons[atom]},
+                        atoms + (atom,),
+                    )
+
+        yield from bind(0, np.ones(1, bool), env, ())
+
+    def quantified(
+        self, quantifier: str, declarations: tuple, body: Node, env: dict
+    ) -> np.ndarray:
+        matches = np.zeros(1, np.int64)
+        violated = np.zeros(1, bool)
+        for mask, inner, _ in self.assignments(declarations, env):
+            holds = self.evaluate(body, inner)
+            matches = matches + (mask & holds)
+            violated = violated | (mask & ~holds)
+        return {
+            "all": ~violated,
+            "some": matches > 0,
+            "no": matches == 0,
+            "lone": matches <= 1,
+            "one": matches == 1,
+        }[quantifier]
+
+    def comprehension(self, declarations: tuple, body: Node, env: dict) -> np.ndarray:
+        arity = sum(len(names) for names, _ in declarations)
+        result = None
+        for mask, inner, atoms in self.assignments(declarations, env):
+            holds = mask & self.evaluate(body, inner)
+            if result is None:
+                result = np.zeros((len(holds),) + (self.atoms,) * arity, bool)
+            if len(holds) > len(result):
+                result = np.broadcast_to(
+                    result, (len(holds),) + result.shape[1:]
+                ).copy()
+            result[(slice(None),) + atoms] |= holds
+        if result is None:
+            result = np.zeros((1,) + (self.atoms,) * arity, bool)
+        return result
+
+
+def _children(node: Node) -> Iterator[Node]:
+    """The sub-nodes of a node, including declaration bounds and bindings."""
+    for arg in node.args:
+        if isinstance(arg, Node):
+            yield arg
+        elif isinstance(arg, tuple):
+            for item in arg:
+                if isinstance(item, Node):
+                    yield item
+                elif isinstance(item, tuple):
+                    yield from (x for x in item if isinstance(x, Node))
+
+
+def _any(value: np.ndarray) -> np.ndarray:
+    return value.reshape(len(value), -1).any(axis=1)
+
+
+def _all(value: np.ndarray) -> np.ndarray:
+    return value.reshape(len(value), -1).all(axis=1)
+
+
+def _compose(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return np.matmul(left.astype(np.uint8), right.astype(np.uint8)) > 0
+
+
+def _join(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    if left.ndim == 2:
+        return _compose(left[:, None, :], right)[:, 0, :]
+    if right.ndim == 2:
+        return _compose(left, right[:, :, None])[:, :, 0]
+    return _compose(left, right)
+
+
+def check_supported(node: Node) -> bool:
+    """
+    Verify that the evaluator can handle a formula.
+
+    ``iden`` and ``*e`` lack the identity tuples of Alloy's integer atoms, so
+    they are only allowed where those tuples cannot change the result.
+
+    Returns:
+        Whether the value of the node is exact (always True for formulas)
+
+    Raises:
+        Unsupported: If the evaluator might disagree with Alloy
+    """
+    op, value, args = node.op, node.value, node.args
+    if value.kind == "any" or (value.kind == "expr" and value.arity not in (1, 2)):
+        raise Unsupported(op)
+    if op in ("univ", "Int", "String"):
+        raise Unsupported(op)
+    if op == "number":
+        if not -(1 << (BITWIDTH - 1)) <= args[0] < 1 << (BITWIDTH - 1):
+            raise Unsupported("integer out of range")
+        return True
+    if op in ("name", "none"):
+        return True
+    if op == "iden":
+        return False
+    if op == "quantifier":
+        quantifier, declarations, body = args
+        if quantifier not in ("all", "some", "no", "lone", "one"):
+            raise Unsupported(quantifier)
+        _check_declarations(declarations)
+        check_supported(body)
+        return True
+    if op == "comprehension":
+        declarations, body = args
+        _check_declarations(declarations)
+        check_supported(body)
+        return True
+    if op == "let":
+        bindings, body = args
+        for _, bound in bindings:
+            if not check_supported(bound):
+                raise Unsupported("inexact let binding")
+        return check_supported(body)
+    if op == "else" and value.kind != "formula":
+        raise Unsupported("conditional expression")
+
+    exact = [check_supported(arg) for arg in args if isinstance(arg, Node)]
+    kinds = [arg.value.kind for arg in args if isinstance(arg, Node)]
+    if op in ("+", "-") and "int" in kinds:
+        raise Unsupported("integer arithmetic")
+    if op in ("=", "!=") and len(set(kinds)) > 1:
+        raise Unsupported("comparison of an integer and a relation")
+    if op in ("<", ">", "=<", ">=") and set(kinds) != {"int"}:
+        raise Unsupported("integer comparison of relations")
+
+    if op == "*":
+        return False
+    if op in ("~", "^"):
+        return exact[0]
+    if op in (".", "&"):
+        return exact[0] or exact[1]
+    if op == "+":
+        return exact[0] and exact[1]
+    if op == "-":
+        return exact[0]
+    if op == "in":
+        if not exact[0]:
+            raise Unsupported("inexact subset")
+        return True
+    if not all(exact):
+        raise Unsupported(f"inexact operand of {op}")
+    return True
+
+
+def _check_declarations(declarations: tuple) -> None:
+    for _, bound in declarations:
+        if bound.value.arity != 1 or not check_supported(bound):
+            raise Unsupported("declaration bound")
+
+
+class ProblemModel(NamedTuple):
+    """Everything about a problem the native backend needs, computed once."""
+
+    environment: Environment
+    predicate: str
+    check: list[Node]
+    layout: Layout
+    exhaustive: bool
+
+
+@lru_cache(maxsize=None)
+def _problem_model(
+    signatures: str, predicate_definition: str, check: str
+) -> ProblemModel | None:
+    try:
+        schema = parse_schema(signatures)
+        definition = _tokens(predicate_definition)
+        if len(definition) != 3 or definition[0].text != "pred":
+            raise Unsupported("predicate parameters")
+        predicate = definition[1].text
+
+        names = {name: relation(1) for name in schema.sigs}
+        names.update({name: relation(2) for name in schema.fields})
+        names[predicate] = FORMULA
+        environment = Environment(names, closed=True)
+
+        check_tokens, scope = parse_check(check)
+        nodes = Parser(check_tokens, environment).body()
+        for node in nodes:
+            check_supported(node)
+
+        layout = Layout(schema, scope)
+        exhaustive = layout.exhaustive_size() <= EXHAUSTIVE_LIMIT
+        return ProblemModel(environment, predicate, nodes, layout, exhaustive)
+    except (Unsupported, PreflightError, IndexError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _instances(
+    signatures: str, predicate_definition: str, check: str
+) -> list[tuple[dict[str, np.ndarray], np.ndarray]]:
+    """The instances a problem is checked on: all of them, or a fixed sample."""
+    model = _problem_model(signatures, predicate_definition, check)
+    if model.exhaustive:
+        return list(model.layout.enumerate())
+    return [model.layout.sample(SAMPLES, np.random.default_rng(0))]
+
+
+class TruthTable(NamedTuple):
+    """A canonical solution's value on every instance of a problem's bank."""
+
+    bits: np.ndarray  # (instances,) bool, False on invalid instances
+    bank: str  # digest of the instance bank the bits refer to
+
+
+# Precomputed truth tables by problem fingerprint, see alloy_eval.truth_tables
+TRUTH_TABLES: dict[str, TruthTable] = {}
+
+
+def problem_fingerprint(problem: AlloyProblem) -> str:
+    """Hash of everything a problem's truth table depends on."""
+    parts = (
+        problem.signatures,
+        problem.predicate_definition,
+        problem.check,
+        problem.canonical_solution or "",
+    )
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def bank_digest(signatures: str, predicate_definition: str, check: str) -> str:
+    """Hash of a problem's instance bank, to detect a stale truth table."""
+    digest = hashlib.sha256()
+    for relations, valid in _instances(signatures, predicate_definition, check):
+        for name in sorted(relations):
+            digest.update(name.encode())
+            digest.update(np.packbits(relations[name]).tobytes())
+        digest.update(np.packbits(valid).tobytes())
+    return digest.hexdigest()
+
+
+def _solution_body(model: ProblemModel, solution: str) -> list[Node]:
+    """Parse a predicate body, raising Unsupported or PreflightError."""
+    body = Parser(_tokens(solution), model.environment).body()
+    for node in body:
+        check_supported(node)
+    return body
+
+
+def _has_counterexample(key: tuple[str, str, str], body: list[Node]) -> bool:
+    """Whether the check fails on some instance of the bank for this body."""
+    model = _problem_model(*key)
+    for relations, valid in _instances(*key):
+        evaluator = Evaluator(relations, model.layout.atoms, {model.predicate: body})
+        if np.any(valid & ~evaluator.formula(model.check, {})):
+            return True
+    return False
+
+
+def _truth_values(key: tuple[str, str, str], body: list[Node]) -> np.ndarray:
+    """A predicate body's value on every instance of the bank."""
+    model = _problem_model(*key)
+    chunks = []
+    for relations, valid in _instances(*key):
+        evaluator = Evaluator(relations, model.layout.atoms, {model.predicate: body})
+        holds = np.broadcast_to(evaluator.formula(body, {}), valid.shape)
+        chunks.append(valid & holds)
+    return np.concatenate(chunks)
+
+
+def _compares_to_oracle(model: ProblemModel) -> bool:
+    """Whether the check has the form ``pred iff (oracle)``."""
+    if len(model.check) != 1 or model.check[0].op != "iff":
+        return False
+    return any(
+        arg.op == "name" and arg.args[0] == model.predicate
+        for arg in model.check[0].args
+    )
+
+
+def compute_truth_table(problem: AlloyProblem) -> TruthTable | None:
+    """
+    Evaluate a problem's canonical solution on its instance bank.
+
+    Args:
+        problem: The Alloy problem
+
+    Returns:
+        The truth table, or None if the problem has no canonical solution,
+        its check does not compare the predicate to an oracle, or the native
+        backend cannot evaluate it
+    """
+    return _computed_truth_table(
+        problem.signatures,
+        problem.predicate_definition,
+        problem.check,
+        problem.canonical_solution,
+    )
+
+
+@lru_cache(maxsize=None)
+def _computed_truth_table(
+    signatures: str,
+    predicate_definition: str,
+    check: str,
+    canonical_solution: str | None,
+) -> TruthTable | None:
+    key = (signatures, predicate_definition, check)
+    model = _problem_model(*key)
+    if model is None or canonical_solution is None or not _compares_to_oracle(model):
+        return None
+    try:
+        body = _solution_body(model, canonical_solution.rstrip().removesuffix("}"))
+        # A canonical solution failing its own check cannot stand for it
+        if _has_counterexample(key, body):
+            return None
+        return TruthTable(_truth_values(key, body), bank_digest(*key))
+    except (Unsupported, PreflightError):
+        return None
+
+
+def truth_table(problem: AlloyProblem) -> TruthTable | None:
+    """The problem's precomputed truth table if still valid, else computed."""
+    table = TRUTH_TABLES.get(problem_fingerprint(problem))
+    key = (problem.signatures, problem.predicate_definition, problem.check)
+    if table is not None and table.bank == bank_digest(*key):
+        return table
+    return compute_truth_table(problem)
+
+
+def native_check(
+    problem: AlloyProblem, solution: str
+) -> tuple[bool, str | None] | None:
+    """
+    Check a solution without the Alloy analyzer, when possible.
+
+    When the problem has a truth table, only the solution is evaluated and
+    compared to the canonical solution's value on each instance. Solutions
+    the evaluator cannot parse are never given a verdict, even if malformed.
+
+    Args:
+        problem: The Alloy problem
+        solution: The predicate body
+
+    Returns:
+        A (passed, error message or None) verdict, or None if the backend
+        cannot decide and Alloy has to be run
+    """
+    key = (problem.signatures, problem.predicate_definition, problem.check)
+    model = _problem_model(*key)
+    if model is None:
+        return None
+
+    try:
+        body = _solution_body(model, solution)
+    except (Unsupported, PreflightError):
+        # Rejecting malformed solutions is the preflight check's job; a body
+        # the evaluator cannot parse is left to Alloy
+        return None
+
+    table = truth_table(problem)
+    try:
+        if table is not None:
+            failed = np.any(_truth_values(key, body) != table.bits)
+        else:
+            failed = _has_counterexample(key, body)
+    except Unsupported:
+        return None
+    if failed:
+        return False, "Counterexample found"
+    return (True, None) if model.exhaustive else None
@@ -0,0 +1,236 @@
+"""
+Syntactic normalization of Alloy predicate bodies.
+
+The canonical form is only used as a deduplication key: two solutions with
+the same canonical form are guaranteed to mean the same thing, so only one
+of them needs to be checked. Every rewrite is therefore conservative; when in
+doubt, the original tokens are kept.
+"""
+
+from alloy_eval.alloy_lexer import LexError, Token, tokenize
+
+# Operators with a keyword spelling that means exactly the same thing
+SYNONYMS = {"&&": "and", "||": "or", "!": "not", "=>": "implies", "<=>": "iff"}
+
+QUANTIFIERS = {"all", "some", "no", "lone", "one", "sum"}
+KEYWORDS = QUANTIFIERS | {
+    "and", "or", "not", "implies", "iff", "else", "in", "let", "disj", "set", "seq",
+}  # fmt: skip
+COMPARISONS = {"in", "=", "!=", "<", ">", "=<", ">="}
+OPENING = {"(": ")", "{": "}", "[": "]"}
+CLOSING = set(OPENING.values())
+
+# Relational expression operators, all binding tighter than formula operators
+EXPRESSION_OPS = {"&", "+", "-", "~", "^", "*", ".", "->", "++", "<:", ":>"}
+
+# Tokens that may surround a parenthesized relational expression without the
+# parentheses affecting how it parses
+LEFT_CONTEXT = {
+    None, "(", "{", "|", ",", ":", "and", "or", "implies", "iff", "else", "not",
+    "no", "some", "lone", "one", "in", "=", "!=", "<", ">", "=<", ">=",
+}  # fmt: skip
+RIGHT_CONTEXT = {
+    None, ")", "}", "]", "|", ",", "and", "or", "implies", "iff", "else", "not",
+    "in", "=", "!=", "<", ">", "=<", ">=",
+}  # fmt: skip
+
+# Tokens that may surround a parenthesized comparison (a formula binding
+# tighter than every logical operator)
+LOGICAL_LEFT = {None, "(", "{", "|", "and", "or", "implies", "iff", "else", "not"}
+LOGICAL_RIGHT = {None, ")", "}", "and", "or", "implies", "iff", "else"}
+
+
+def rename_bound_variables(tokens: list[str]) -> list[str]:
+    """
+    Rename quantified variables to $0, $1, ... in order of declaration.
+
+    Only ``quantifier [disj] x, y: ...`` declarations are renamed. If a name is
+    declared while already bound (shadowing), the tokens are returned as is.
+    """
+    renamed = list(tokens)
+    scopes: list[tuple[int, dict[str, str]]] = []  # (bracket depth, names)
+    depth = 0
+    counter = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in OPENING:
+            depth += 1
+        elif token in CLOSING:
+            depth -= 1
+            # Closing a bracket ends the quantifiers declared inside it
+            while scopes and scopes[-1][0] > depth:
+                scopes.pop()
+
+        if token in QUANTIFIERS:
+            j = i + 1
+            if j < len(tokens) and tokens[j] == "disj":
+                j += 1
+            names = []
+            while (
+                j + 1 < len(tokens)
+                and tokens[j][0].isalpha()
+                and tokens[j + 1] in (",", ":")
+            ):
+                names.append(tokens[j])
+                j += 2
+                if tokens[j - 1] == ":":
+                    break
+            if names and tokens[j - 1] == ":":
+                bound = {name for _, frame in scopes for name in frame}
+                if any(name in bound for name in names):
+                    return list(tokens)
+                if any(name in _declaration_bound(tokens, j) for name in names):
+                    return list(tokens)
+                frame = {}
+                for name in names:
+                    frame[name] = f"${counter}"
+                    counter += 1
+                scopes.append((depth, frame))
+                for k in range(i + 1, j):
+                    if tokens[k] in frame:
+                        renamed[k] = frame[tokens[k]]
+                i = j
+                continue
+
+        for _, frame in reversed(scopes):
+            if token in frame:
+                renamed[i] = frame[token]
+                break
+        i += 1
+    return renamed
+
+
+def _declaration_bound(tokens: list[str], start: int) -> list[str]:
+    """Tokens of a declaration bound, from start up to the "|" or "," ending it."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] in OPENING:
+            depth += 1
+        elif tokens[i] in CLOSING:
+            depth -= 1
+        if depth < 0 or (depth == 0 and tokens[i] in ("|", ",")):
+            return tokens[start:i]
+    return tokens[start:]
+
+
+def _is_atom(token: str) -> bool:
+    return (token[0].isalnum() or token[0] == "$") and token not in KEYWORDS
+
+
+def _is_expression(tokens: list[str]) -> bool:
+    """Whether tokens only form a relational expression (no integers)."""
+    return all((t in EXPRESSION_OPS or _is_atom(t)) and not t.isdigit() for t in tokens)
+
+
+def _is_comparison(tokens: list[str]) -> bool:
+    """Whether tokens form a single comparison between two expressions."""
+    comparisons = [i for i, t in enumerate(tokens) if t in COMPARISONS]
+    if len(comparisons) != 1:
+        return False
+    i = comparisons[0]
+    left = tokens[: i - 1] if i > 0 and tokens[i - 1] == "not" else tokens[:i]
+    operands = left + tokens[i + 1 :]
+    return (
+        bool(left)
+        and i + 1 < len(tokens)
+        and all(t in EXPRESSION_OPS or t == "#" or _is_atom(t) for t in operands)
+    )
+
+
+def remove_redundant_parentheses(tokens: list[str]) -> list[str]:
+    """Drop parentheses that cannot change how the body parses."""
+    changed = True
+    while changed:
+        changed = False
+        stack = []
+        for i, token in enumerate(tokens):
+            if token in OPENING:
+                stack.append(i)
+                continue
+            if token not in CLOSING:
+                continue
+            start = stack.pop()
+            if token != ")":
+                continue
+
+            inner = tokens[start + 1 : i]
+            before = tokens[start - 1] if start > 0 else None
+            after = tokens[i + 1] if i + 1 < len(tokens) else None
+            redundant = (
+                # (x) or ((...))
+                (len(inner) == 1 and _is_atom(inner[0]))
+                or (inner and inner[0] == "(" and _matching(inner, 0) == len(inner) - 1)
+                # The whole body
+                or (start == 0 and i == len(tokens) - 1)
+                # A relational expression in a formula position
+                or (
+                    inner
+                    and before in LEFT_CONTEXT
+                    and after in RIGHT_CONTEXT
+                    and _is_expression(inner)
+                )
+                # A comparison between logical operators
+                or (
+                    before in LOGICAL_LEFT
+                    and after in LOGICAL_RIGHT
+                    and _is_comparison(inner)
+                )
+            )
+            if redundant:
+                tokens = tokens[:start] + inner + tokens[i + 1 :]
+                changed = True
+                break
+    return tokens
+
+
+def _matching(tokens: list[str], start: int) -> int:
+    """Index of the bracket closing the one at start."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] in OPENING:
+            depth += 1
+        elif tokens[i] in CLOSING:
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _balanced(tokens: list[str]) -> bool:
+    stack = []
+    for token in tokens:
+        if token in OPENING:
+            stack.append(OPENING[token])
+        elif token in CLOSING:
+            if not stack or stack.pop() != token:
+                return False
+    return not stack
+
+
+def normalize_solution(solution: str) -> str:
+    """
+    Compute the canonical form of a predicate body.
+
+    Comments and whitespace are dropped, operator synonyms unified, bound
+    variables alpha-renamed and redundant parentheses removed. Bodies that do
+    not tokenize or have unbalanced brackets are only whitespace-normalized,
+    since they will fail in the analyzer anyway.
+
+    Args:
+        solution: The predicate body
+
+    Returns:
+        The canonical form, as space-separated tokens
+    """
+    try:
+        tokens: list[Token] = tokenize(solution)
+    except LexError:
+        return " ".join(solution.split())
+
+    texts = [SYNONYMS.get(t.text, t.text) for t in tokens]
+    if not _balanced(texts):
+        return " ".join(texts)
+    texts = rename_bound_variables(texts)
+    texts = remove_redundant_parentheses(texts)
+    return " ".join(texts)
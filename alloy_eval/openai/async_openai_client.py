@@ -0,0 +1,119 @@
+import asyncio
+import os
+
+from alloy_eval.models import AlloyPred
+from alloy_eval.openai.openai_client import OpenAIClient, build_messages
+from alloy_eval.openai.rate_limiter import TokenBucket
+from alloy_eval.openai.response_cache import CacheMode, ResponseCache
+from alloy_eval.tracing import span
+from alloy_eval.ui_utils import console
+from openai import AsyncOpenAI
+
+
+class AsyncOpenAIClient(OpenAIClient):
+    """
+    Asyncio OpenAI client that fans requests out with bounded concurrency.
+
+    Requests are additionally throttled by optional requests-per-minute and
+    tokens-per-minute token buckets so large runs stay under the org limits.
+    Responses go through the same response cache as OpenAIClient.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: int = 512,
+        concurrency: int = 8,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        base_url: str | None = None,
+        cache: ResponseCache | None = None,
+        cache_mode: CacheMode = CacheMode.RECORD,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            model: OpenAI model to use
+            temperature: OpenAI temperature parameter
+            max_tokens: Maximum completion tokens per request
+            concurrency: Maximum number of requests in flight
+            requests_per_minute: Optional request rate limit
+            tokens_per_minute: Optional token rate limit (prompt + completion)
+            base_url: Optional API base URL, e.g. a local OpenAI-compatible server
+            cache: Optional response cache
+            cache_mode: How the response cache is used
+        """
+        super().__init__(model, temperature, max_tokens, base_url, cache, cache_mode)
+        self.concurrency = concurrency
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+
+    def estimate_tokens(self, prompt: str) -> int:
+        """Estimate the tokens a request may use: ~4 chars per prompt token plus the completion budget."""
+        return len(prompt) // 4 + self.max_tokens
+
+    async def _query(
+        self, client: AsyncOpenAI, semaphore: asyncio.Semaphore, prompt: str
+    ) -> str | None:
+        """Send one request once a concurrency slot and rate budget are available."""
+        done, cached = self.cached_response(prompt)
+        if done:
+            return cached
+
+        async with semaphore:
+            reserved = self.estimate_tokens(prompt)
+            if self.request_bucket:
+                await self.request_bucket.acquire()
+            if self.token_bucket:
+                await self.token_bucket.acquire(reserved)
+
+            try:
+                with span("openai_query"):
+                    response = await client.beta.chat.completions.parse(
+                        model=self.model,
+                        messages=build_messages(prompt),
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        response_format=AlloyPred,
+                    )
+            except Exception as e:
+                console.print(f"[red]Error querying OpenAI API: {e}[/red]")
+                return None
+
+            if self.token_bucket and response.usage:
+                self.token_bucket.refund(max(0, reserved - response.usage.total_tokens))
+            content = response.choices[0].message.parsed.content
+            self.store_response(prompt, content)
+            return content
+
+    async def query_many(self, prompts: list[str]) -> list[str | None]:
+        """
+        Query all prompts concurrently.
+
+        Args:
+            prompts: The prompts to send
+
+        Returns:
+            The responses in prompt order, None where a request failed
+        """
+        if self.cache_mode == CacheMode.REPLAY:
+            return [self.cached_response(prompt)[1] for prompt in prompts]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", ""), base_url=self.base_url
+        ) as client:
+            return await asyncio.gather(
+                *(self._query(client, semaphore, prompt) for prompt in prompts)
+            )
+
+    def query_all(self, prompts: list[str]) -> list[str | None]:
+        """Synchronous wrapper around query_many."""
+        return asyncio.run(self.query_many(prompts))
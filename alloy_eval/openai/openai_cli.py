@@ -1,7 +1,22 @@
 import argparse
 from enum import Enum
 
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from alloy_eval.alloy_pool import AlloyWorkerPool
+from alloy_eval.cache import (
+    SolverHistory,
+    TimingHistory,
+    VerdictCache,
+    default_cache_dir,
+)
+from alloy_eval.evaluation import BACKENDS
 from alloy_eval.openai.openai_tester import OpenAITester
+from alloy_eval.openai.response_cache import CacheMode, ResponseCache
+from alloy_eval.portfolio import DEFAULT_SOLVERS, SolverPortfolio
+from alloy_eval.timeouts import TimeoutPolicy
 
 
 class Mode(Enum):
@@ -16,6 +31,8 @@ class Mode(Enum):
 
 def main() -> None:
     """Run the OpenAI tester CLI."""
+    # Settings such as ALLOY_EVAL_CACHE_DIR may come from a .env file
+    load_dotenv()
     parser = argparse.ArgumentParser(
         description="Test Alloy specifications using OpenAI models."
     )
@@ -26,11 +43,19 @@ def main() -> None:
         required=True,
         help="Path to JSONL file containing problems",
     )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        help="Test only problems matching these patterns (e.g. 'graph/*')",
+    )
+    parser.add_argument(
+        "--exclude", nargs="+", help="Leave out problems matching these patterns"
+    )
     parser.add_argument(
         "--output",
         type=str,
         default="results.json",
-        help="Path to save results JSONL file",
+        help="Path to save results JSON file",
     )
     parser.add_argument(
         "--mode",
@@ -69,8 +94,197 @@ def main() -> None:
         help="Number of different solutions to generate for each problem",
     )
 
+    parser.add_argument(
+        "--alloy-jar",
+        type=str,
+        help="Path to the Alloy jar; enables a pool of persistent analyzer workers",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="Number of persistent Alloy workers (with --alloy-jar)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of problems and Alloy checks to process concurrently",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent OpenAI requests (above 1 uses the async client)",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        help="Rate limit for OpenAI requests per minute",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=float,
+        help="Rate limit for OpenAI tokens per minute",
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        help="OpenAI API base URL, e.g. a local OpenAI-compatible server",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Check all solutions of a problem in a single Alloy run",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Check solutions of all problems sharing signatures together, "
+        "up to this many per Alloy run",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run, skipping problems already in the "
+        "results checkpoint (the --output path with a .checkpoint.jsonl suffix)",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="Send every solution to Alloy, even ones the Python parser rejects",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write per-stage timing spans to PATH in Chrome trace format "
+        "(chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="alloy",
+        help="native: decide small-scope problems with NumPy, falling back to "
+        "Alloy when undecided (requires the 'native' extra)",
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Race several SAT solvers on each Alloy check and keep the first "
+        "answer; problems with a known fastest solver run only that one",
+    )
+    parser.add_argument(
+        "--solvers",
+        nargs="+",
+        default=list(DEFAULT_SOLVERS),
+        help="Ids of the Alloy SAT solvers to race (with --portfolio)",
+    )
+    parser.add_argument(
+        "--no-solver-history",
+        action="store_true",
+        help="Race on every check instead of using the recorded fastest solvers",
+    )
+    parser.add_argument(
+        "--adaptive-timeouts",
+        action="store_true",
+        help="Time out each Alloy check after a multiple of its problem's p99 "
+        "solve time in earlier runs (see python -m alloy_eval.timeouts)",
+    )
+    parser.add_argument(
+        "--timeout-multiplier",
+        type=float,
+        default=3.0,
+        help="Adaptive timeout as a multiple of the p99 solve time",
+    )
+    parser.add_argument(
+        "--timeout-cap",
+        type=float,
+        default=120.0,
+        help="Longest adaptive timeout, in seconds",
+    )
+    parser.add_argument(
+        "--escalate-scopes",
+        action="store_true",
+        help="Look for counterexamples at scopes 2 and 3 before running each "
+        "check at its own scope",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Check every solution even if an equivalent one was already checked",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run Alloy instead of reusing cached verdicts",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=str(default_cache_dir()),
+        help="Directory of the verdict and response caches",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Maximum number of cached verdicts",
+    )
+    parser.add_argument(
+        "--response-cache",
+        type=CacheMode,
+        choices=list(CacheMode),
+        help="Cache model responses: record (reuse and store), replay (cached "
+        "responses only, offline) or refresh (query and overwrite)",
+    )
+    parser.add_argument(
+        "--response-cache-size",
+        type=int,
+        default=100_000,
+        help="Maximum number of cached model responses",
+    )
+
     args = parser.parse_args()
 
+    alloy_pool = (
+        AlloyWorkerPool(args.alloy_jar, size=args.pool_size)
+        if args.alloy_jar and args.mode == Mode.EVALUATE
+        else None
+    )
+    verdict_cache = (
+        VerdictCache(Path(args.cache_dir) / "verdicts.sqlite", args.cache_size)
+        if not args.no_cache and args.mode == Mode.EVALUATE
+        else None
+    )
+    solver_history = (
+        SolverHistory(Path(args.cache_dir) / "solvers.sqlite")
+        if args.portfolio and not args.no_solver_history
+        else None
+    )
+    portfolio = (
+        SolverPortfolio(args.solvers, solver_history)
+        if args.portfolio and args.mode == Mode.EVALUATE
+        else None
+    )
+    timing_history = (
+        TimingHistory(Path(args.cache_dir) / "timings.sqlite")
+        if args.adaptive_timeouts and args.mode == Mode.EVALUATE
+        else None
+    )
+    timeouts = (
+        TimeoutPolicy(timing_history, args.timeout_multiplier, args.timeout_cap)
+        if timing_history is not None
+        else None
+    )
+    response_cache = (
+        ResponseCache(
+            Path(args.cache_dir) / "responses.sqlite", args.response_cache_size
+        )
+        if args.response_cache
+        else None
+    )
+
     # Initialize tester
     tester = OpenAITester(
         problems_file=args.problems,
@@ -79,13 +293,45 @@ def main() -> None:
         temperature=args.temperature,
         debug_dir=args.debug_dir,
         num_solutions=args.num_solutions,
+        alloy_pool=alloy_pool,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        base_url=args.base_url,
+        verdict_cache=verdict_cache,
+        response_cache=response_cache,
+        cache_mode=args.response_cache or CacheMode.RECORD,
+        batch=args.batch,
+        batch_size=args.batch_size,
+        dedup=not args.no_dedup,
+        preflight=not args.no_preflight,
+        backend=args.backend,
+        portfolio=portfolio,
+        timeouts=timeouts,
+        escalate=args.escalate_scopes,
+        trace_file=args.trace,
+        only=args.only,
+        exclude=args.exclude,
     )
 
     # Run in specified mode
-    if args.mode == Mode.EVALUATE:
-        tester.run_tests(args.output)
-    else:
-        tester.generate_solutions(args.output)
+    try:
+        if args.mode == Mode.EVALUATE:
+            tester.run_tests(args.output, resume=args.resume)
+        else:
+            tester.generate_solutions(args.output)
+    finally:
+        if alloy_pool is not None:
+            alloy_pool.close()
+        if verdict_cache is not None:
+            verdict_cache.close()
+        if solver_history is not None:
+            solver_history.close()
+        if timing_history is not None:
+            timing_history.close()
+        if response_cache is not None:
+            response_cache.close()
 
 
 if __name__ == "__main__":
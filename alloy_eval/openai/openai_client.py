@@ -1,39 +1,103 @@
 import os
 
 from alloy_eval.models import AlloyPred
+from alloy_eval.openai.response_cache import CacheMode, ResponseCache
+from alloy_eval.tracing import traced
+from alloy_eval.ui_utils import console
 from dotenv import load_dotenv
 from openai import OpenAI
 
-# Load environment variables
-load_dotenv()
+SYSTEM_PROMPT = "You are an expert in formal methods and the Alloy specification language. Complete the Alloy predicate implementation in one line."
+
+
+def build_messages(prompt: str) -> list[dict[str, str]]:
+    """Build the chat messages sent for a prompt."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
 
 class OpenAIClient:
-    def __init__(self, model: str, temperature: float, max_tokens: int = 512):
-        self.client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", ""),
-        )
+    def __init__(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: int = 512,
+        base_url: str | None = None,
+        cache: ResponseCache | None = None,
+        cache_mode: CacheMode = CacheMode.RECORD,
+    ):
+        # Environment variables (OPENAI_API_KEY) may come from a .env file
+        load_dotenv()
+        self.base_url = base_url
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self._client: OpenAI | None = None
+
+    @property
+    def client(self) -> OpenAI:
+        """The OpenAI client, created on first use so replay runs work offline."""
+        if self._client is None:
+            self._client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY", ""),
+                base_url=self.base_url,
+            )
+        return self._client
+
+    def cache_key(self, prompt: str) -> str:
+        """Build the response cache key for a prompt."""
+        return ResponseCache.request_key(
+            self.model, self.temperature, self.max_tokens, SYSTEM_PROMPT, prompt
+        )
 
+    def cached_response(self, prompt: str) -> tuple[bool, str | None]:
+        """
+        Look up a prompt in the response cache according to the cache mode.
+
+        Args:
+            prompt: The user prompt
+
+        Returns:
+            Tuple of (whether the API must not be queried, cached response or None)
+        """
+        if self.cache is None or self.cache_mode == CacheMode.REFRESH:
+            return False, None
+        response = self.cache.get(self.cache_key(prompt))
+        if response is None and self.cache_mode == CacheMode.REPLAY:
+            console.print(
+                "[yellow]Response cache miss in replay mode, skipping API query[/yellow]"
+            )
+            return True, None
+        return response is not None, response
+
+    def store_response(self, prompt: str, response: str | None) -> None:
+        """Record a fresh response in the cache."""
+        if self.cache is not None and response is not None:
+            self.cache.put(self.cache_key(prompt), response)
+
+    @traced("openai_query")
     def query(self, prompt: str) -> str | None:
         """Query OpenAI API with structured response."""
+        done, response = self.cached_response(prompt)
+        if done:
+            return response
+
         try:
             response = self.client.beta.chat.completions.parse(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert in formal methods and the Alloy specification language. Complete the Alloy predicate implementation in one line.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                messages=build_messages(prompt),
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 response_format=AlloyPred,
             )
-            return response.choices[0].message.parsed.content
+            content = response.choices[0].message.parsed.content
         except Exception as e:
             print(f"Error querying OpenAI API: {e}")
             return None
+
+        self.store_response(prompt, content)
+        return content
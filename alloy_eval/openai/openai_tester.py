@@ -1,17 +1,37 @@
 import json
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
+from alloy_eval.batch_evaluation import BatchEntry, evaluate_batch, evaluate_scheduled
+from alloy_eval.cache import VerdictCache
 from alloy_eval.data_utils import read_problems
-from alloy_eval.evaluation import evaluate_single_problem
+from alloy_eval.evaluation import evaluate_single_problem, prepare_backend
+from alloy_eval.metrics import (
+    DEFAULT_KS,
+    display_pass_at_k,
+    pass_at_k_report,
+    pass_at_k_table,
+    results_frame,
+)
 from alloy_eval.models import AlloyProblem, EvaluationResult
+from alloy_eval.openai.async_openai_client import AsyncOpenAIClient
 from alloy_eval.openai.openai_client import OpenAIClient
 from alloy_eval.openai.prompt_generator import PromptGenerator
+from alloy_eval.openai.response_cache import CacheMode, ResponseCache
 from alloy_eval.openai.result_handler import ResultHandler
 from alloy_eval.openai.solution_processor import SolutionProcessor
+from alloy_eval.parallel import map_ordered
+from alloy_eval.portfolio import SolverPortfolio
+from alloy_eval.result_stream import ResultStream, checkpoint_path, read_checkpoint
+from alloy_eval.tracing import TRACER
 from alloy_eval.ui_utils import console, setup_debug_dir
 from rich.progress import track
 
+if TYPE_CHECKING:
+    from alloy_eval.alloy_pool import AlloyWorkerPool
+    from alloy_eval.timeouts import TimeoutPolicy
+
 
 class OpenAITester:
     """
@@ -33,6 +53,26 @@ class OpenAITester:
         temperature: float,
         debug_dir: str | Path | None = None,
         num_solutions: int = 1,
+        alloy_pool: "AlloyWorkerPool | None" = None,
+        workers: int = 1,
+        concurrency: int = 1,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        base_url: str | None = None,
+        verdict_cache: VerdictCache | None = None,
+        response_cache: ResponseCache | None = None,
+        cache_mode: CacheMode = CacheMode.RECORD,
+        batch: bool = False,
+        batch_size: int = 1,
+        dedup: bool = True,
+        preflight: bool = True,
+        backend: str = "alloy",
+        portfolio: SolverPortfolio | None = None,
+        timeouts: "TimeoutPolicy | None" = None,
+        escalate: bool = False,
+        trace_file: str | Path | None = None,
+        only: List[str] | None = None,
+        exclude: List[str] | None = None,
     ) -> None:
         """
         Initialize the tester.
@@ -44,9 +84,53 @@ class OpenAITester:
             temperature: OpenAI temperature parameter
             debug_dir: Directory to save debug files (None to disable)
             num_solutions: Number of different solutions to generate for each problem
+            alloy_pool: Optional pool of persistent Alloy workers to run checks on
+            workers: Number of problems and Alloy checks to process concurrently
+            concurrency: Number of concurrent OpenAI requests; above 1, responses for
+                all problems are fetched up front with the async client
+            requests_per_minute: Optional request rate limit for the async client
+            tokens_per_minute: Optional token rate limit for the async client
+            base_url: Optional OpenAI API base URL (e.g. a local compatible server)
+            verdict_cache: Optional cache of Alloy verdicts shared across runs
+            response_cache: Optional cache of model responses for record/replay
+            cache_mode: How the response cache is used (record, replay or refresh)
+            batch: Check all solutions of a problem in a single Alloy run
+            batch_size: Above 1, group solutions of all problems sharing signatures
+                into Alloy runs of up to this many checks (after generating all)
+            dedup: Check syntactically equivalent solutions of a problem only once
+            preflight: Reject malformed solutions without running the analyzer
+            backend: "alloy" to always run the analyzer, or "native" to try the
+                NumPy bounded evaluator first
+            portfolio: Optional solver portfolio to race SAT solvers on each check
+            timeouts: Optional policy giving each check a learned timeout
+            escalate: Look for counterexamples at reduced scopes before running
+                each check at its own scope
+            trace_file: Optional path to write timing spans to, in Chrome trace
+                format, after each run_tests
+            only: Patterns of the problems to test, e.g. "graph/*" (default: all)
+            exclude: Patterns of problems to leave out
         """
-        self.problems = read_problems(problems_file)
+        self.problems = read_problems(problems_file, only, exclude)
+        self.problems_file = problems_file
         self.alloy_path = alloy_path
+        self.alloy_pool = alloy_pool
+        self.verdict_cache = verdict_cache
+        self.workers = workers
+        self.batch = batch
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.preflight = preflight
+        self.backend = backend
+        self.portfolio = portfolio
+        self.timeouts = timeouts
+        self.escalate = escalate
+        self.trace_file = trace_file
+        prepare_backend(backend, problems_file)
+        self.solutions_total = 0
+        self.solutions_checked = 0
+        self._stats_lock = threading.Lock()
+        # Bounds the number of in-flight Alloy checks across all problems
+        self._alloy_slots = threading.BoundedSemaphore(max(1, workers))
         self.debug_dir = setup_debug_dir(debug_dir)
         self.num_solutions = num_solutions
 
@@ -59,10 +143,31 @@ class OpenAITester:
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
+            base_url=base_url,
+            cache=response_cache,
+            cache_mode=cache_mode,
+        )
+        self.async_client = (
+            AsyncOpenAIClient(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                concurrency=concurrency,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                base_url=base_url,
+                cache=response_cache,
+                cache_mode=cache_mode,
+            )
+            if concurrency > 1
+            else None
         )
+        self._prefetched: dict[str, str | None] = {}
         self.prompt_generator = PromptGenerator(num_solutions)
         self.solution_processor = SolutionProcessor(num_solutions)
-        self.result_handler = ResultHandler(model)
+        self.result_handler = ResultHandler(
+            model, Path(problems_file).stem.removesuffix("_problems"), temperature
+        )
 
     def query_openai(self, prompt: str) -> str | None:
         """
@@ -81,6 +186,130 @@ class OpenAITester:
             console.print(f"[red]Error querying OpenAI API: {e}[/red]")
             return None
 
+    def prefetch_responses(self, problems: List[AlloyProblem]) -> None:
+        """
+        Fetch responses for all problems concurrently with the async client.
+
+        Does nothing when the tester was created without concurrency.
+
+        Args:
+            problems: The problems to fetch responses for
+        """
+        if self.async_client is None:
+            return
+
+        prompts = [self.prompt_generator.create_prompt(p) for p in problems]
+        with console.status(
+            f"Querying {self.client.model} for {len(prompts)} problems"
+        ):
+            responses = self.async_client.query_all(prompts)
+        self._prefetched.update(
+            (problem.task_id, response)
+            for problem, response in zip(problems, responses)
+        )
+
+    def get_response(self, problem: AlloyProblem) -> str | None:
+        """
+        Get the model response for a problem, using a prefetched one if available.
+
+        Args:
+            problem: The Alloy problem
+
+        Returns:
+            The response from OpenAI or None if there was an error
+        """
+        if problem.task_id in self._prefetched:
+            return self._prefetched.pop(problem.task_id)
+
+        prompt = self.prompt_generator.create_prompt(problem)
+        return self.query_openai(prompt)
+
+    def evaluate_solution(
+        self, problem: AlloyProblem, index: int, solution: str | None
+    ) -> EvaluationResult:
+        """
+        Evaluate one generated solution of a problem.
+
+        Args:
+            problem: The Alloy problem
+            index: The solution index
+            solution: The solution text, or None if none was generated
+
+        Returns:
+            An EvaluationResult whose task_id carries the solution index
+        """
+        if solution is None:
+            return self.result_handler.create_result_with_index(
+                problem.task_id, index, error="No solution generated", passed=False
+            )
+
+        # Create a modified task_id with solution index
+        modified_task_id = f"{problem.task_id}_sol{index}"
+
+        # Pass the modified task_id to evaluate_single_problem
+        with self._alloy_slots:
+            result = evaluate_single_problem(
+                problem,
+                solution,
+                self.alloy_path,
+                self.debug_dir,
+                modified_task_id,
+                pool=self.alloy_pool,
+                cache=self.verdict_cache,
+                preflight=self.preflight,
+                backend=self.backend,
+                portfolio=self.portfolio,
+                timeouts=self.timeouts,
+                escalate=self.escalate,
+            )
+
+        # Add solution index to the task_id
+        result.task_id = modified_task_id
+        return result
+
+    def evaluate_solutions_batched(
+        self, problem: AlloyProblem, solutions: List[str | None]
+    ) -> List[EvaluationResult]:
+        """
+        Evaluate all generated solutions of a problem in one Alloy run.
+
+        Args:
+            problem: The Alloy problem
+            solutions: The solution texts, None where none was generated
+
+        Returns:
+            An EvaluationResult per solution, in order
+        """
+        entries = [
+            BatchEntry(problem, solution, f"{problem.task_id}_sol{i}")
+            for i, solution in enumerate(solutions)
+            if solution is not None
+        ]
+        with self._alloy_slots:
+            evaluated = iter(
+                evaluate_batch(
+                    entries,
+                    self.alloy_path,
+                    self.debug_dir,
+                    pool=self.alloy_pool,
+                    cache=self.verdict_cache,
+                    preflight=self.preflight,
+                    backend=self.backend,
+                    portfolio=self.portfolio,
+                    timeouts=self.timeouts,
+                    escalate=self.escalate,
+                )
+            )
+
+        return [
+            (
+                self.evaluate_solution(problem, i, None)
+                if solution is None
+                else next(evaluated)
+            )
+            for i, solution in enumerate(solutions)
+        ]
+
     def test_problem(self, problem: AlloyProblem) -> List[EvaluationResult]:
         """
         Test a single problem with multiple solutions.
@@ -95,43 +324,159 @@ class OpenAITester:
         console.print(f"\n[blue]Testing: {task_id}[/blue]")
 
         # Generate solutions
-        prompt = self.prompt_generator.create_prompt(problem)
-        response = self.query_openai(prompt)
+        response = self.get_response(problem)
 
         # Process solutions
         solutions = self.solution_processor.process_solutions(task_id, response)
 
         # Evaluate each solution
-        results = []
-        for i, solution in enumerate(solutions):
-            if solution is None:
-                results.append(
-                    self.result_handler.create_result_with_index(
-                        task_id, i, error="No solution generated", passed=False
-                    )
-                )
-                continue
+        results = self.evaluate_solutions(problem, solutions)
 
-            # Create a modified task_id with solution index
-            modified_task_id = f"{task_id}_sol{i}"
+        self.display_results(results)
+        return results
 
-            # Pass the modified task_id to evaluate_single_problem
-            result = evaluate_single_problem(
-                problem, solution, self.alloy_path, self.debug_dir, modified_task_id
+    def evaluate_solutions(
+        self, problem: AlloyProblem, solutions: List[str | None]
+    ) -> List[EvaluationResult]:
+        """
+        Evaluate the solutions of a problem, checking equivalent ones only once.
+
+        Args:
+            problem: The Alloy problem
+            solutions: The solution texts, None where none was generated
+
+        Returns:
+            An EvaluationResult per solution, in order
+        """
+        representatives = self.deduplicate(solutions)
+        unique = [
+            solution if representatives[i] == i else None
+            for i, solution in enumerate(solutions)
+        ]
+
+        if self.batch:
+            results = self.evaluate_solutions_batched(problem, unique)
+        else:
+            results = map_ordered(
+                lambda item: self.evaluate_solution(problem, *item),
+                enumerate(unique),
+                workers=self.workers,
             )
+        return self.fan_out(problem, solutions, representatives, results)
+
+    def deduplicate(self, solutions: List[str | None]) -> List[int]:
+        """
+        Map each solution to the first equivalent one and count the savings.
+
+        Args:
+            solutions: The solution texts, None where none was generated
 
-            # Add solution index to the task_id
-            result.task_id = modified_task_id
+        Returns:
+            The index of each solution's representative
+        """
+        if self.dedup:
+            representatives = self.solution_processor.deduplicate(solutions)
+        else:
+            representatives = list(range(len(solutions)))
+
+        generated = [i for i, solution in enumerate(solutions) if solution is not None]
+        with self._stats_lock:
+            self.solutions_total += len(generated)
+            self.solutions_checked += sum(
+                1 for i in generated if representatives[i] == i
+            )
+        return representatives
 
-            results.append(result)
+    def fan_out(
+        self,
+        problem: AlloyProblem,
+        solutions: List[str | None],
+        representatives: List[int],
+        results: List[EvaluationResult],
+    ) -> List[EvaluationResult]:
+        """Copy each representative's verdict to its equivalent solutions."""
+        return [
+            (
+                results[i]
+                if representative == i
+                else results[representative].model_copy(
+                    update={
+                        "task_id": f"{problem.task_id}_sol{i}",
+                        "solution": solutions[i],
+                    }
+                )
+            )
+            for i, representative in enumerate(representatives)
+        ]
 
-            # Display test result immediately
+    def display_results(self, results: List[EvaluationResult]) -> None:
+        """Display test results in solution order."""
+        for i, result in enumerate(results):
+            if result.solution is None:
+                continue
             status = (
                 "[green]✓ PASSED[/green]" if result.passed else "[red]✗ FAILED[/red]"
             )
             console.print(f"  Solution {i+1}/{self.num_solutions}: {status}")
 
-        return results
+    def test_problems_scheduled(
+        self, problems: List[AlloyProblem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Test problems by generating all solutions first, then checking them in
+        signature-grouped batches spanning problems.
+
+        Args:
+            problems: The Alloy problems to test
+
+        Returns:
+            A list of EvaluationResult objects for each problem
+        """
+        all_solutions = [
+            self.solution_processor.process_solutions(
+                problem.task_id, self.get_response(problem)
+            )
+            for problem in track(problems, description="Generating solutions")
+        ]
+
+        all_representatives = [self.deduplicate(s) for s in all_solutions]
+
+        entries, positions = [], []
+        for p, (problem, solutions) in enumerate(zip(problems, all_solutions)):
+            for i, solution in enumerate(solutions):
+                if solution is not None and all_representatives[p][i] == i:
+                    entries.append(
+                        BatchEntry(problem, solution, f"{problem.task_id}_sol{i}")
+                    )
+                    positions.append((p, i))
+
+        evaluated = evaluate_scheduled(
+            entries,
+            self.alloy_path,
+            batch_size=self.batch_size,
+            debug_dir=self.debug_dir,
+            pool=self.alloy_pool,
+            cache=self.verdict_cache,
+            workers=self.workers,
+            preflight=self.preflight,
+            backend=self.backend,
+            portfolio=self.portfolio,
+            timeouts=self.timeouts,
+            escalate=self.escalate,
+        )
+
+        all_results = [
+            [self.evaluate_solution(problem, i, None) for i in range(len(solutions))]
+            for problem, solutions in zip(problems, all_solutions)
+        ]
+        for (p, i), result in zip(positions, evaluated):
+            all_results[p][i] = result
+        return [
+            self.fan_out(problem, solutions, representatives, results)
+            for problem, solutions, representatives, results in zip(
+                problems, all_solutions, all_representatives, all_results
+            )
+        ]
 
     def generate_solution(self, problem: AlloyProblem) -> List[Dict[str, Any]]:
         """
@@ -147,8 +492,7 @@ class OpenAITester:
         console.print(f"\n[blue]Generating solutions for: {task_id}[/blue]")
 
         # Generate solutions
-        prompt = self.prompt_generator.create_prompt(problem)
-        response = self.query_openai(prompt)
+        response = self.get_response(problem)
 
         # Process solutions
         solutions = self.solution_processor.process_solutions(task_id, response)
@@ -183,6 +527,7 @@ class OpenAITester:
             output_file: Path to save results to
         """
         all_results = []
+        self.prefetch_responses(self.problems)
 
         for problem in track(self.problems, description="Generating solutions"):
             results = self.generate_solution(problem)
@@ -193,28 +538,119 @@ class OpenAITester:
             output_file, all_results, "Alloy OpenAI Generation Report"
         )
 
-    def run_tests(self, output_file: str | Path) -> None:
+    def run_tests(self, output_file: str | Path, resume: bool = False) -> None:
         """
         Run tests for all problems.
 
+        Results are streamed to a JSONL checkpoint next to output_file as each
+        problem completes; the final results file and report are built from it.
+
         Args:
             output_file: Path to save results to
+            resume: Skip problems already recorded in the checkpoint
         """
-        all_results = []
+        TRACER.reset()
+        settings = {
+            "num_solutions": self.num_solutions,
+            "temperature": self.result_handler.temperature,
+            "problems_file": str(Path(self.problems_file).resolve()),
+        }
+        with ResultStream(
+            checkpoint_path(output_file),
+            self.result_handler.model,
+            resume=resume,
+            settings=settings,
+        ) as stream:
+            problems = [p for p in self.problems if p.task_id not in stream.completed]
+            if len(problems) < len(self.problems):
+                console.print(
+                    f"[yellow]Resuming: {len(self.problems) - len(problems)} problems "
+                    f"already done, {len(problems)} remaining[/yellow]"
+                )
+            self.prefetch_responses(problems)
 
-        for problem in track(self.problems, description="Testing problems"):
-            results = self.test_problem(problem)
-            # Convert EvaluationResult to dictionary using model_dump()
-            result_dicts = [r.model_dump() for r in results]
-            all_results.extend(result_dicts)
+            def summarize(
+                problem: AlloyProblem, results: List[EvaluationResult]
+            ) -> None:
+                # Convert EvaluationResult to dictionary using model_dump()
+                result_dicts = [r.model_dump() for r in results]
 
-            # Count successful solutions
-            problem_successful = sum(1 for r in result_dicts if r.get("passed", False))
-            console.print(
-                f"  Problem summary: {problem_successful}/{len(results)} solutions passed"
-            )
+                # Count successful solutions
+                problem_successful = sum(
+                    1 for r in result_dicts if r.get("passed", False)
+                )
+                console.print(
+                    f"  Problem summary: {problem_successful}/{len(results)} solutions passed"
+                )
+                stream.write(problem.task_id, result_dicts)
+
+            if self.batch_size > 1:
+                scheduled = self.test_problems_scheduled(problems)
+                for problem, results in zip(problems, scheduled):
+                    console.print(f"\n[blue]Testing: {problem.task_id}[/blue]")
+                    self.display_results(results)
+                    summarize(problem, results)
+            else:
+                map_ordered(
+                    lambda problem: summarize(problem, self.test_problem(problem)),
+                    problems,
+                    workers=self.workers,
+                    description="Testing problems",
+                )
+
+        _, completed = read_checkpoint(stream.path)
+        all_results = [
+            result
+            for problem in self.problems
+            for result in completed.get(problem.task_id, [])
+        ]
+
+        # pass@k for every k up to the number of solutions per problem
+        frame = results_frame(all_results, self.result_handler.domain)
+        ks = sorted({k for k in DEFAULT_KS if k < self.num_solutions})
+        ks.append(self.num_solutions)
+        pass_at_k = pass_at_k_report(frame, ks)
 
         # Save results
+        deduplicated = self.solutions_total - self.solutions_checked
         self.result_handler.save_results(
-            output_file, all_results, "Alloy OpenAI Testing Report", include_report=True
+            output_file,
+            all_results,
+            "Alloy OpenAI Testing Report",
+            include_report=True,
+            extra_report={
+                "solutions_checked": self.solutions_checked,
+                "deduplicated_solutions": deduplicated,
+                "dedup_ratio": (
+                    f"{deduplicated/self.solutions_total*100:.2f}%"
+                    if self.solutions_total
+                    else "n/a"
+                ),
+            },
+            pass_at_k=pass_at_k,
         )
+        display_pass_at_k(pass_at_k_table(frame, ks), ks, "pass@k by Domain")
+        if self.num_solutions > 1:
+            display_pass_at_k(
+                pass_at_k_table(frame, ks, by=("domain", "predicate")),
+                ks,
+                "pass@k by Predicate",
+            )
+
+        if self.verdict_cache is not None:
+            stats = self.verdict_cache.stats()
+            console.print(
+                f"[green]Verdict cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']})[/green]"
+            )
+        if self.portfolio is not None:
+            stats = self.portfolio.stats()
+            console.print(
+                f"[green]Solver portfolio: {stats['races']} races, "
+                f"{stats['picks']} history picks, wins {stats['wins']}[/green]"
+            )
+
+        TRACER.print_summary()
+        if self.trace_file:
+            TRACER.write_chrome_trace(self.trace_file)
+            console.print(f"[green]Trace written to {self.trace_file}[/green]")
@@ -1,4 +1,5 @@
 from alloy_eval.models import AlloyProblem
+from alloy_eval.tracing import traced
 
 
 class PromptGenerator:
@@ -13,6 +14,7 @@ class PromptGenerator:
         """
         self.num_solutions = num_solutions
 
+    @traced("create_prompt")
     def create_prompt(self, problem: AlloyProblem) -> str:
         """
         Create a prompt for the language model.
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            per_minute: Number of tokens added per minute, also the bucket capacity
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Wait until the requested number of tokens is available and take them.
+
+        Args:
+            amount: Number of tokens to take (clamped to the bucket capacity)
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """
+        Return unused tokens, e.g. when a request used fewer than reserved.
+
+        Args:
+            amount: Number of tokens to give back
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
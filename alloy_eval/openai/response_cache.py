@@ -0,0 +1,45 @@
+from enum import Enum
+from pathlib import Path
+
+from alloy_eval.cache import SqliteCache, default_cache_dir, hash_key
+
+
+class CacheMode(Enum):
+    """How the response cache is used."""
+
+    RECORD = "record"  # Reuse cached responses, query and store on a miss
+    REPLAY = "replay"  # Only use cached responses, never query the API
+    REFRESH = "refresh"  # Always query the API and overwrite cached responses
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class ResponseCache(SqliteCache):
+    """
+    Cache of model responses keyed by the request that produced them.
+
+    The key covers the model, sampling parameters, system prompt and user
+    prompt, so any change to the request is a cache miss.
+    """
+
+    def __init__(self, path: str | Path | None = None, max_entries: int = 100_000):
+        """
+        Open the response cache.
+
+        Args:
+            path: Path to the SQLite file (defaults to responses.sqlite in the cache dir)
+            max_entries: Maximum number of responses kept
+        """
+        super().__init__(path or default_cache_dir() / "responses.sqlite", max_entries)
+
+    @staticmethod
+    def request_key(
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: str,
+        prompt: str,
+    ) -> str:
+        """Build the cache key for a request."""
+        return hash_key(model, temperature, max_tokens, system_prompt, prompt)
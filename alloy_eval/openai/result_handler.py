@@ -3,20 +3,31 @@ from pathlib import Path
 from typing import Any
 
 from alloy_eval.models import EvaluationResult
+from alloy_eval.tracing import traced
 from alloy_eval.ui_utils import console, generate_report
 
 
 class ResultHandler:
     """Handles the processing and saving of results."""
 
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        domain: str | None = None,
+        temperature: float | None = None,
+    ):
         """
         Initialize the result handler.
 
         Args:
             model: The OpenAI model name
+            domain: Domain of the problems (e.g. "relations"), recorded with the
+                results for per-domain metrics
+            temperature: Sampling temperature, recorded with the results
         """
         self.model = model
+        self.domain = domain
+        self.temperature = temperature
 
     def create_result_with_index(
         self,
@@ -24,7 +35,7 @@ class ResultHandler:
         index: int,
         solution: str | None = None,
         error: str | None = None,
-        passed: bool = False,
+        passed: bool | None = None,
     ) -> EvaluationResult | dict[str, Any]:
         """
         Create a result with the solution index in the task_id.
@@ -34,14 +45,14 @@ class ResultHandler:
             index: The solution index
             solution: The solution text
             error: Error message if any
-            passed: Whether the solution passed
+            passed: Whether the solution passed (None for generation results)
 
         Returns:
             An EvaluationResult or dictionary
         """
         task_id_with_index = f"{task_id}_sol{index}"
 
-        if isinstance(solution, str):
+        if passed is not None:
             # For evaluation results
             return EvaluationResult(
                 task_id=task_id_with_index,
@@ -57,12 +68,15 @@ class ResultHandler:
                 "error": error,
             }
 
+    @traced("save_results")
     def save_results(
         self,
         output_file: str | Path,
         all_results: list[dict[str, Any]],
         title: str,
         include_report: bool = False,
+        extra_report: dict[str, Any] | None = None,
+        pass_at_k: dict[str, Any] | None = None,
     ) -> None:
         """
         Save results to a file and generate a report.
@@ -72,24 +86,34 @@ class ResultHandler:
             all_results: List of result dictionaries
             title: Report title
             include_report: Whether to include a report in the output
+            extra_report: Additional run statistics to add to the report
+            pass_at_k: pass@k estimates to add to the report, see
+                metrics.pass_at_k_report
         """
         # Prepare data for saving
         data = {
             "model": self.model,
             "results": all_results,
         }
+        if self.temperature is not None:
+            data["temperature"] = self.temperature
+        if self.domain is not None:
+            data["domain"] = self.domain
 
         # Add report if needed
         if include_report:
             total = len(all_results)
             successful = sum(1 for r in all_results if r.get("passed"))
-            success_rate = f"{successful/total*100:.2f}%"
+            success_rate = f"{successful/total*100:.2f}%" if total else "n/a"
 
             data["report"] = {
                 "total_problems": total,
                 "total_success": successful,
                 "success_rate": success_rate,
+                **(extra_report or {}),
             }
+            if pass_at_k is not None:
+                data["report"]["pass_at_k"] = pass_at_k
 
         # Save results
         with open(output_file, "w") as f:
@@ -112,6 +136,10 @@ class ResultHandler:
             console.print(
                 f"[green]Successful solutions: {successful} ({success_rate})[/green]"
             )
+            for key, value in (extra_report or {}).items():
+                console.print(
+                    f"[green]{key.replace('_', ' ').capitalize()}: {value}[/green]"
+                )
         else:
             successful = sum(1 for r in all_results if r.get("solution") is not None)
             console.print(f"\n[green]Total solutions generated: {successful}[/green]")
@@ -1,5 +1,6 @@
 import re
 
+from alloy_eval.normalize import normalize_solution
 from alloy_eval.ui_utils import console
 
 
@@ -75,3 +76,24 @@ class SolutionProcessor:
             )
 
         return solutions
+
+    def deduplicate(self, solutions: list[str | None]) -> list[int]:
+        """
+        Find syntactically equivalent solutions.
+
+        Args:
+            solutions: The processed solutions
+
+        Returns:
+            For each solution, the index of the first solution with the same
+            canonical form (its own index if it is the first)
+        """
+        first_index: dict[str, int] = {}
+        representatives = []
+        for i, solution in enumerate(solutions):
+            if solution is None:
+                representatives.append(i)
+                continue
+            key = normalize_solution(solution)
+            representatives.append(first_index.setdefault(key, i))
+        return representatives
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    description: str | None = None,
+) -> list[R]:
+    """
+    Apply a function to every item, optionally on a thread pool.
+
+    Alloy checks run in separate processes (or pooled workers), so threads are
+    enough to keep several analyzers busy at once. Results are returned in the
+    order of the input regardless of completion order, and the progress bar
+    advances as each item finishes.
+
+    Args:
+        fn: Function to apply
+        items: Items to process
+        workers: Maximum number of items processed concurrently
+        description: Optional progress bar description
+
+    Returns:
+        The results, in input order
+    """
+    items = list(items)
+    if description:
+        # rich.progress is slow to import; workers that show no progress skip it
+        from rich.progress import track
+
+    if workers <= 1:
+        iterable = track(items, description=description) if description else items
+        return [fn(item) for item in iterable]
+
+    results: list[R | None] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fn, item): i for i, item in enumerate(items)}
+        completed = as_completed(futures)
+        if description:
+            completed = track(completed, total=len(futures), description=description)
+        for future in completed:
+            results[futures[future]] = future.result()
+    return results
@@ -0,0 +1,146 @@
+"""
+SAT solver portfolios.
+
+Alloy bundles several SAT solvers, and which one is fastest varies from
+problem to problem: a solver that answers in milliseconds on one check can
+stall until the timeout on another. A SolverPortfolio runs a check with each
+of its solvers at once and keeps the first decisive answer (a verdict or a
+syntax/type error, not a timeout or crash), cancelling the other runs. All
+solvers agree on verdicts, only the time to reach them differs.
+
+With a SolverHistory, the winner of every race is recorded per problem. Once
+a problem has been raced min_races times, its checks run only the solver
+that won most often, and the others are only raced when that one is not
+decisive.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from alloy_eval.alloy_output import AnalyzerOutput
+from alloy_eval.cache import SolverHistory, hash_key
+from alloy_eval.models import AlloyProblem
+
+# SAT solvers bundled with the Alloy distribution
+DEFAULT_SOLVERS = ("sat4j", "minisat(jni)", "glucose(jni)")
+
+# Runs an analyzer check with the given solver, abandoning it once the event is set
+SolverRun = Callable[[str, threading.Event], AnalyzerOutput]
+
+
+def problem_key(*problems: AlloyProblem) -> str:
+    """Key of the solver history for a check of the given problems."""
+    return hash_key(
+        *sorted({(p.signatures, p.predicate_definition, p.check) for p in problems})
+    )
+
+
+class SolverPortfolio:
+    """Races SAT solvers on analyzer checks, learning which one to use."""
+
+    def __init__(
+        self,
+        solvers: tuple[str, ...] | list[str] = DEFAULT_SOLVERS,
+        history: SolverHistory | None = None,
+        min_races: int = 3,
+    ):
+        """
+        Initialize the portfolio.
+
+        Args:
+            solvers: Ids of the solvers to race
+            history: Optional record of past races, to skip racing on problems
+                with a known fastest solver
+            min_races: Races a problem needs before its fastest solver is used alone
+        """
+        if not solvers:
+            raise ValueError("A solver portfolio needs at least one solver")
+        self.solvers = tuple(solvers)
+        self.history = history
+        self.min_races = min_races
+        self.races = 0
+        self.picks = 0
+        self.wins: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def run(self, key: str, check: SolverRun) -> AnalyzerOutput:
+        """
+        Run a check with the historically fastest solver, or race them all.
+
+        Args:
+            key: The problem key of the check, see problem_key
+            check: Runs the check with a given solver
+
+        Returns:
+            The first decisive output, or the last output if none was decisive
+        """
+        solver = None
+        if self.history is not None:
+            solver = self.history.fastest(key, self.solvers, self.min_races)
+        if solver is None:
+            return self.race(key, self.solvers, check)
+
+        with self._lock:
+            self.picks += 1
+        start = time.perf_counter()
+        output = check(solver, threading.Event())
+        if output.decisive():
+            self.history.record(key, solver, _elapsed_ms(start), race=False)
+            return output
+        rivals = [s for s in self.solvers if s != solver]
+        return self.race(key, rivals, check) if rivals else output
+
+    def race(
+        self, key: str, solvers: tuple[str, ...] | list[str], check: SolverRun
+    ) -> AnalyzerOutput:
+        """
+        Run a check with every solver at once and keep the first decisive output.
+
+        The other runs are cancelled and finish in the background.
+
+        Args:
+            key: The problem key of the check
+            solvers: The solvers to race
+            check: Runs the check with a given solver
+
+        Returns:
+            The first decisive output, or the last output if none was decisive
+        """
+        cancel = threading.Event()
+        outputs: queue.Queue[tuple[str, AnalyzerOutput, float]] = queue.Queue()
+        start = time.perf_counter()
+
+        def attempt(solver: str) -> None:
+            outputs.put((solver, check(solver, cancel), _elapsed_ms(start)))
+
+        for solver in solvers:
+            threading.Thread(target=attempt, args=(solver,), daemon=True).start()
+
+        output = None
+        for _ in solvers:
+            solver, output, elapsed_ms = outputs.get()
+            if output.decisive():
+                cancel.set()
+                with self._lock:
+                    self.races += 1
+                    self.wins[solver] += 1
+                if self.history is not None:
+                    self.history.record(key, solver, elapsed_ms, race=True)
+                return output
+        return output
+
+    def stats(self) -> dict[str, object]:
+        """Return race and pick counters for this session."""
+        with self._lock:
+            return {
+                "races": self.races,
+                "picks": self.picks,
+                "wins": dict(self.wins.most_common()),
+            }
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,290 @@
+"""
+Indexed, random-access problems files.
+
+read_problems parses and validates every line of a problems file. A
+ProblemStore instead keeps a byte-offset index of the file, so only the
+problems that are asked for are read (through a memory map) and validated.
+The index is stored next to the problems file:
+
+    data/graph_problems.jsonl -> data/graph_problems.index.json
+
+It records the size, modification time and digest of the problems file. A
+changed size or digest rebuilds it. A file that was only touched keeps its
+index, which is saved again with the new modification time. When the index
+cannot be written (e.g. a read-only data directory), it is kept in memory.
+
+Problems are selected with shell-style patterns matched against
+"domain/task_id", where the domain is the task_id's own "domain/" prefix or
+the problems file name without "_problems", and against the bare task_id:
+
+    store.select(only=["graph/*"], exclude=["graph/weakly*"])
+
+Usage:
+    python -m alloy_eval.problem_store data/*.jsonl --only 'graph/*'
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from alloy_eval.models import AlloyProblem
+
+FORMAT_VERSION = 1
+
+
+def problem_index_path(problems_file: str | Path) -> Path:
+    """Return the index file of a problems file (x.jsonl -> x.index.json)."""
+    return Path(problems_file).with_suffix(".index.json")
+
+
+def file_domain(problems_file: str | Path) -> str:
+    """Domain of the problems in a file whose task_id does not name one."""
+    return Path(problems_file).stem.removesuffix("_problems")
+
+
+def compile_patterns(patterns: Sequence[str]) -> re.Pattern:
+    """Compile shell-style patterns into one regex matching any of them."""
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+def select(
+    task_ids: Sequence[str],
+    domain: str,
+    only: Sequence[str] | None = None,
+    exclude: Sequence[str] | None = None,
+) -> list[int]:
+    """
+    Positions of the task IDs selected by --only and --exclude patterns.
+
+    Args:
+        task_ids: Task IDs of a problems file
+        domain: Domain of task IDs that do not name one
+        only: Patterns of problems to keep (default: all)
+        exclude: Patterns of problems to leave out
+
+    Returns:
+        Positions of the task IDs that match a pattern of only (against
+        "domain/task_id" or the bare task_id) and none of exclude
+    """
+    keep = compile_patterns(only).match if only else None
+    drop = compile_patterns(exclude).match if exclude else None
+    selected = []
+    for i, task_id in enumerate(task_ids):
+        name = task_id if "/" in task_id else f"{domain}/{task_id}"
+        if keep is not None and not (keep(name) or keep(task_id)):
+            continue
+        if drop is not None and (drop(name) or drop(task_id)):
+            continue
+        selected.append(i)
+    return selected
+
+
+class ProblemStore:
+    """Reads problems of a JSONL file on demand through a byte-offset index."""
+
+    def __init__(self, problems_file: str | Path, persist: bool = True):
+        """
+        Open a problems file, building or refreshing its index if needed.
+
+        Args:
+            problems_file: Path to the problems JSONL file
+            persist: Save the index next to the problems file
+        """
+        self.path = Path(problems_file)
+        self.domain = file_domain(self.path)
+        self.persist = persist
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be memory-mapped
+        self._map = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+        # Task ID, byte offset and length of each line, in file order
+        self.task_ids: list[str] = []
+        self.offsets: list[int] = []
+        self.lengths: list[int] = []
+        self._load_index()
+        self._positions: dict[str, int] | None = None
+
+    def _digest(self) -> str:
+        return hashlib.blake2b(self._map, digest_size=16).hexdigest()
+
+    def _load_index(self) -> None:
+        stat = os.fstat(self._file.fileno())
+        index_path = problem_index_path(self.path)
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+
+        if (
+            isinstance(index, dict)
+            and index.get("version") == FORMAT_VERSION
+            and index.get("size") == stat.st_size
+        ):
+            fresh = index["mtime_ns"] == stat.st_mtime_ns
+            digest = None if fresh else self._digest()
+            if fresh or index["digest"] == digest:
+                self.task_ids = index["task_ids"]
+                self.offsets = index["offsets"]
+                self.lengths = index["lengths"]
+                if not fresh:
+                    # Touched but unchanged: record the new mtime
+                    self._save_index(stat, digest)
+                return
+
+        self._build_index()
+        self._save_index(stat, self._digest())
+
+    def _build_index(self) -> None:
+        offset = 0
+        size = len(self._map)
+        while offset < size:
+            end = self._map.find(b"\n", offset)
+            end = size if end == -1 else end
+            line = self._map[offset:end]
+            if line.strip():
+                self.task_ids.append(json.loads(line)["task_id"])
+                self.offsets.append(offset)
+                self.lengths.append(end - offset)
+            offset = end + 1
+
+    def _save_index(self, stat: os.stat_result, digest: str) -> None:
+        if not self.persist:
+            return
+        index_path = problem_index_path(self.path)
+        temporary = index_path.with_name(f".{index_path.name}.{os.getpid()}")
+        try:
+            with open(temporary, "w") as f:
+                json.dump(
+                    {
+                        "version": FORMAT_VERSION,
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "digest": digest,
+                        "task_ids": self.task_ids,
+                        "offsets": self.offsets,
+                        "lengths": self.lengths,
+                    },
+                    f,
+                )
+            os.replace(temporary, index_path)
+        except OSError:
+            temporary.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._position_index()
+
+    def _position_index(self) -> dict[str, int]:
+        if self._positions is None:
+            # Reversed, so that the first of repeated task IDs wins
+            self._positions = {
+                task_id: i for i, task_id in reversed(list(enumerate(self.task_ids)))
+            }
+        return self._positions
+
+    def __iter__(self) -> Iterator[AlloyProblem]:
+        return self.problems()
+
+    def get(self, task_id: str) -> AlloyProblem:
+        """
+        Read one problem.
+
+        Args:
+            task_id: The problem's task_id
+
+        Returns:
+            The problem (the first one, if the file repeats the task_id)
+
+        Raises:
+            KeyError: If no problem has the task_id
+        """
+        return self._read(self._position_index()[task_id])
+
+    def _read(self, position: int) -> AlloyProblem:
+        offset = self.offsets[position]
+        return AlloyProblem.model_validate_json(
+            self._map[offset : offset + self.lengths[position]]
+        )
+
+    def select(
+        self,
+        only: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+    ) -> list[str]:
+        """Task IDs of the selected problems, in file order (see select)."""
+        return [
+            self.task_ids[i] for i in select(self.task_ids, self.domain, only, exclude)
+        ]
+
+    def problems(
+        self,
+        only: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+    ) -> Iterator[AlloyProblem]:
+        """
+        Read the selected problems, in file order.
+
+        Args:
+            only: Patterns of problems to keep (default: all)
+            exclude: Patterns of problems to leave out
+
+        Yields:
+            The selected problems
+        """
+        if not only and not exclude:
+            positions = range(len(self))
+        else:
+            positions = select(self.task_ids, self.domain, only, exclude)
+        for position in positions:
+            yield self._read(position)
+
+    def close(self) -> None:
+        """Release the memory map and the file."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ProblemStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Index problems files and list their selected problems."
+    )
+    parser.add_argument("problems_files", nargs="+", help="Problems JSONL files")
+    parser.add_argument(
+        "--only", nargs="+", help="Patterns of problems to list, e.g. 'graph/*'"
+    )
+    parser.add_argument(
+        "--exclude", nargs="+", help="Patterns of problems to leave out"
+    )
+    args = parser.parse_args()
+
+    from alloy_eval.ui_utils import console
+
+    for problems_file in args.problems_files:
+        with ProblemStore(problems_file) as store:
+            selected = store.select(args.only, args.exclude)
+            console.print(f"{problems_file}: {len(selected)} of {len(store)} problems")
+            if args.only or args.exclude:
+                for task_id in selected:
+                    console.print(f"  {task_id}")
+
+
+if __name__ == "__main__":
+    main()
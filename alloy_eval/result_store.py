@@ -0,0 +1,266 @@
+"""
+Columnar store of evaluation runs.
+
+A results file holds one run as nested JSON, which every analysis has to
+re-parse in Python. Exporting runs flattens each result to one typed row
+(see COLUMNS) and writes every run as a Parquet file in a store directory, so
+analyses across many runs load only the columns they need, with pandas.
+
+Parquet needs pyarrow: pip install 'alloy_eval[parquet]'.
+
+Usage:
+    python -m alloy_eval.result_store results/*.json --store runs
+"""
+
+import argparse
+import importlib.util
+import re
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import pandas as pd
+
+from alloy_eval.analyze_results import solver_time
+from alloy_eval.results_reader import ResultsReader
+from alloy_eval.ui_utils import console
+
+SOLUTION_INDEX_RE = re.compile(r"_sol(\d+)$")
+
+# Error categories, in report order
+ERROR_CATEGORIES = [
+    "Success",
+    "Counterexample",
+    "Syntax Error",
+    "Type Error",
+    "Timeout",
+    "No Solution",
+    "Other Failure",
+]
+
+# Column types of a stored run, one row per result
+COLUMNS = {
+    "run": "category",
+    "model": "category",
+    "temperature": "float64",
+    "domain": "category",
+    "task_id": "string",
+    "predicate": "category",
+    "solution_index": "Int32",
+    "passed": "bool",
+    "error_category": pd.CategoricalDtype(ERROR_CATEGORIES),
+    "counterexample_scope": "Int8",
+    "commands": "Int32",
+    "translation_ms": "Int64",
+    "solve_ms": "Int64",
+    "analyzer_ms": "Int64",
+    "primary_vars": "Int64",
+    "clauses": "Int64",
+}
+
+
+def _require_pyarrow() -> None:
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError(
+            "The result store requires pyarrow: pip install 'alloy_eval[parquet]'"
+        )
+
+
+def error_category(result: dict[str, Any]) -> str:
+    """Classify a result dictionary into one of ERROR_CATEGORIES."""
+    if result.get("passed"):
+        return "Success"
+    if result.get("error") == "No solution generated":
+        return "No Solution"
+    message = result.get("error_message") or ""
+    if message == "Counterexample found":
+        return "Counterexample"
+    if message in ("Syntax Error", "Type Error"):
+        return message
+    if message.startswith("Timeout"):
+        return "Timeout"
+    return "Other Failure"
+
+
+def _rows(results: Iterable[dict[str, Any]]) -> dict[str, list[Any]]:
+    """Per-result columns; the domain is None for task IDs that do not name one."""
+    rows: dict[str, list[Any]] = {column: [] for column in COLUMNS}
+    for result in results:
+        if "task_id" not in result:
+            continue
+        task_id = result["task_id"]
+        index = SOLUTION_INDEX_RE.search(task_id)
+        task = task_id[: index.start()] if index else task_id
+        domain, slash, predicate = task.rpartition("/")
+        commands = result.get("commands") or []
+        rows["task_id"].append(task_id)
+        rows["domain"].append(domain if slash else None)
+        rows["predicate"].append(predicate)
+        rows["solution_index"].append(int(index.group(1)) if index else None)
+        rows["passed"].append(bool(result.get("passed")))
+        rows["error_category"].append(error_category(result))
+        rows["counterexample_scope"].append(result.get("counterexample_scope"))
+        rows["commands"].append(len(commands))
+        for column in ("translation_ms", "solve_ms", "primary_vars", "clauses"):
+            values = [c.get(column) for c in commands if c.get(column) is not None]
+            rows[column].append(sum(values) if values else None)
+        rows["analyzer_ms"].append(solver_time(result) if commands else None)
+    return rows
+
+
+def _frame(
+    rows: dict[str, list[Any]],
+    run: str,
+    model: str | None,
+    temperature: float | None,
+    domain: str | None,
+) -> pd.DataFrame:
+    count = len(rows["task_id"])
+    rows["run"] = [run] * count
+    rows["model"] = [model] * count
+    rows["temperature"] = [temperature] * count
+    rows["domain"] = [d if d is not None else domain or "all" for d in rows["domain"]]
+    return pd.DataFrame(rows).astype(COLUMNS)
+
+
+def run_frame(
+    results: Iterable[dict[str, Any]],
+    run: str,
+    model: str | None = None,
+    temperature: float | None = None,
+    domain: str | None = None,
+) -> pd.DataFrame:
+    """
+    Flatten result dictionaries into typed rows.
+
+    Args:
+        results: Result dictionaries of one run
+        run: Name of the run
+        model: Model of the run
+        temperature: Sampling temperature of the run
+        domain: Domain of results whose task_id does not name one
+
+    Returns:
+        A DataFrame with the COLUMNS of a stored run
+    """
+    return _frame(_rows(results), run, model, temperature, domain)
+
+
+def read_run(
+    results_file: str | Path,
+    run: str | None = None,
+    temperature: float | None = None,
+) -> pd.DataFrame:
+    """
+    Load a results file as typed rows, streaming it.
+
+    The model, temperature and domain are those recorded in the file.
+
+    Args:
+        results_file: A results .json file, or a .jsonl results/checkpoint file
+        run: Name of the run (default: the file name without its suffix)
+        temperature: Temperature of runs whose file does not record one
+
+    Returns:
+        A DataFrame with the COLUMNS of a stored run
+    """
+    reader = ResultsReader(results_file)
+    rows = _rows(reader)
+    # The header is complete once every result has been read
+    header = reader.header
+    return _frame(
+        rows,
+        run or Path(results_file).stem,
+        header.get("model"),
+        header.get("temperature", temperature),
+        header.get("domain"),
+    )
+
+
+def export_run(
+    results_file: str | Path,
+    store: str | Path,
+    run: str | None = None,
+    temperature: float | None = None,
+) -> Path:
+    """
+    Write a results file into a store, replacing an earlier export of the run.
+
+    Args:
+        results_file: A results .json file, or a .jsonl results/checkpoint file
+        store: Directory of the store
+        run: Name of the run (default: the file name without its suffix)
+        temperature: Temperature of runs whose file does not record one
+
+    Returns:
+        Path of the run's Parquet file
+    """
+    _require_pyarrow()
+    run = run or Path(results_file).stem
+    store = Path(store)
+    store.mkdir(parents=True, exist_ok=True)
+    path = store / f"{run}.parquet"
+    read_run(results_file, run, temperature).to_parquet(path, index=False)
+    return path
+
+
+def load_runs(
+    store: str | Path,
+    runs: Sequence[str] | None = None,
+    columns: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Load runs from a store.
+
+    Args:
+        store: Directory of the store, or a single run's Parquet file
+        runs: Names of the runs to load (default: all)
+        columns: Columns to load (default: all)
+
+    Returns:
+        A DataFrame with one row per result of the loaded runs
+    """
+    _require_pyarrow()
+    store = Path(store)
+    if store.is_dir():
+        paths = (
+            [store / f"{run}.parquet" for run in runs]
+            if runs is not None
+            else sorted(store.glob("*.parquet"))
+        )
+    else:
+        paths = [store]
+    if not paths:
+        frame = pd.DataFrame({column: [] for column in COLUMNS}).astype(COLUMNS)
+        return frame[list(columns)] if columns is not None else frame
+    frame = pd.concat(
+        [pd.read_parquet(path, columns=columns) for path in paths], ignore_index=True
+    )
+    # Runs have their own categories, which concat turns back into objects
+    for column in frame.columns:
+        if COLUMNS[column] == "category":
+            frame[column] = frame[column].astype(COLUMNS[column])
+    return frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export results files to the columnar run store."
+    )
+    parser.add_argument(
+        "results_files", nargs="+", help="Results .json or .jsonl files"
+    )
+    parser.add_argument("--store", required=True, help="Directory of the store")
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        help="Temperature of runs whose results file does not record one",
+    )
+    args = parser.parse_args()
+
+    for results_file in args.results_files:
+        path = export_run(results_file, args.store, temperature=args.temperature)
+        console.print(f"Exported {results_file} to {path}")
+
+
+if __name__ == "__main__":
+    main()
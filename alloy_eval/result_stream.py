@@ -0,0 +1,182 @@
+"""
+Crash-safe, incremental results file.
+
+Results are appended to a JSONL checkpoint as each problem completes, one line
+per problem:
+
+    {"model": "gpt-4o-mini", "num_solutions": 5, ...}  <- header, first line
+    {"task_id": "undirected", "results": [...]}
+
+The header records the model and the run settings the results depend on
+(number of solutions, temperature, problems file). A checkpoint is only
+resumed by a run with the same ones.
+
+Lines are flushed as they are written and fsynced in batches, so a crash loses
+at most the last unsynced problems. A line cut short by a crash is dropped when
+the file is reopened with resume=True.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from alloy_eval.tracing import span
+
+# Checkpoint lines written between two fsyncs, and maximum seconds between them
+FSYNC_EVERY = 10
+FSYNC_INTERVAL = 5.0
+
+
+def checkpoint_path(output_file: str | Path) -> Path:
+    """
+    Return the JSONL checkpoint path for a results file.
+
+    The checkpoint has its own suffix, so that it is never the results file
+    itself: results.json and results.jsonl -> results.checkpoint.jsonl.
+    """
+    return Path(output_file).with_suffix(".checkpoint.jsonl")
+
+
+def read_checkpoint(path: str | Path) -> tuple[dict[str, Any], dict[str, list[dict]]]:
+    """
+    Read a checkpoint file, ignoring a truncated last line.
+
+    Args:
+        path: Path to the JSONL checkpoint
+
+    Returns:
+        Tuple of (header, empty if the file has none, results by problem task_id)
+
+    Raises:
+        ValueError: If a line other than the last one is not valid JSON
+    """
+    header: dict[str, Any] = {}
+    completed: dict[str, list[dict]] = {}
+    with open(path) as f:
+        invalid = None
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            if invalid is not None:
+                raise ValueError(
+                    f"{path}: line {invalid} is not valid JSON and is not the last line"
+                )
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                invalid = number
+                continue
+            if "task_id" in record:
+                completed[record["task_id"]] = record["results"]
+            else:
+                header.update(record)
+    return header, completed
+
+
+class ResultStream:
+    """
+    Appends per-problem results to a JSONL checkpoint.
+
+    Safe to share between threads. Use as a context manager, or call close().
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        model: str,
+        resume: bool = False,
+        settings: dict[str, Any] | None = None,
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        """
+        Open the checkpoint.
+
+        Args:
+            path: Path to the JSONL checkpoint
+            model: Model name, written to the header line
+            resume: Keep the results already in the file instead of starting over
+            settings: Run settings the results depend on, written to the
+                header line; resuming requires the same ones
+            fsync_every: Number of lines written between two fsyncs
+            fsync_interval: Maximum seconds between two fsyncs
+        """
+        self.path = Path(path)
+        self.model = model
+        self.settings = dict(settings or {})
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.completed: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        if resume and self.path.exists():
+            header, self.completed = read_checkpoint(self.path)
+            # A file without a header (cut short by a crash) has no results
+            if header:
+                for name, value in {"model": model, **self.settings}.items():
+                    if header.get(name) != value:
+                        raise ValueError(
+                            f"{self.path} was written with {name}="
+                            f"{header.get(name)!r}, not {value!r}"
+                        )
+            self._truncate_partial_line()
+            self._file = open(self.path, "a")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w")
+            self._write_line({"model": model, **self.settings})
+            self._sync()
+
+    def _truncate_partial_line(self) -> None:
+        """Drop whatever follows the last complete line (left by a crash mid-write)."""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+
+    def _write_line(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, task_id: str, results: list[dict[str, Any]]) -> None:
+        """
+        Append the results of one problem.
+
+        Args:
+            task_id: The problem task ID
+            results: The result dictionaries of the problem's solutions
+        """
+        with self._lock, span("checkpoint_write"):
+            self._write_line({"task_id": task_id, "results": results})
+            self.completed[task_id] = results
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def close(self) -> None:
+        """Sync and close the checkpoint."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+    def __enter__(self) -> "ResultStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,151 @@
+"""
+Streaming reader of results files.
+
+Results files of large sweeps do not fit in memory, so a ResultsReader yields
+their result dictionaries one at a time, holding only the current one (plus a
+read buffer) in memory. Two layouts are read:
+
+- ``.json`` files as written by save_results, ``{"model": ..., "results":
+  [...], "report": {...}}``. The top-level object is parsed incrementally:
+  every key other than "results" is kept in ``header``, and the elements of
+  "results" are decoded one by one.
+- ``.jsonl`` files: the run checkpoints written by ResultStream (a header
+  line, then one line of results per problem) or one result per line.
+  Lines that are not results (no "task_id") are merged into ``header``. A
+  last line cut short by a crash is ignored, but an invalid line followed by
+  more lines raises ValueError, as the results after it would be lost.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+# Characters read from the file at a time
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE_RE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+class _JsonScanner:
+    """Decodes JSON values from a text file through a sliding buffer."""
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> None:
+        """Drop the consumed text and read at least as much as is left over."""
+        remaining = self.text[self.pos :]
+        chunk = self.file.read(max(self.chunk_size, len(remaining)))
+        self.eof = not chunk
+        self.text = remaining + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ("" at the end of the file)."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos : self.pos + 1]
+            self._fill()
+
+    def expect(self, chars: str) -> str:
+        """Consume the next non-whitespace character, which must be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} in results file, found {char!r}"
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the file
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill()
+
+
+class ResultsReader:
+    """Iterates over the result dictionaries of a results file."""
+
+    def __init__(self, path: str | Path, chunk_size: int = CHUNK_SIZE):
+        """
+        Initialize the reader.
+
+        Args:
+            path: Path to a .json results file or a .jsonl results/checkpoint file
+            chunk_size: Characters read from the file at a time
+        """
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        # Everything in the file besides the results (model, domain, report, ...);
+        # keys stored after the results are only known once iteration is done
+        self.header: dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self.path.suffix == ".jsonl":
+            return self._iter_lines()
+        return self._iter_object()
+
+    def _iter_lines(self) -> Iterator[dict[str, Any]]:
+        with open(self.path) as f:
+            invalid = None
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                if invalid is not None:
+                    raise ValueError(
+                        f"{self.path}: line {invalid} is not valid JSON "
+                        "and is not the last line"
+                    )
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Only tolerated as the last line, cut short by a crash
+                    invalid = number
+                    continue
+                if isinstance(record.get("results"), list):
+                    yield from record["results"]
+                elif "task_id" in record:
+                    yield record
+                else:
+                    self.header.update(record)
+
+    def _iter_object(self) -> Iterator[dict[str, Any]]:
+        with open(self.path) as f:
+            scanner = _JsonScanner(f, self.chunk_size)
+            scanner.expect("{")
+            if scanner.peek() == "}":
+                return
+            while True:
+                key = scanner.value()
+                scanner.expect(":")
+                if key == "results" and scanner.peek() == "[":
+                    scanner.expect("[")
+                    if scanner.peek() == "]":
+                        scanner.expect("]")
+                    else:
+                        while True:
+                            yield scanner.value()
+                            if scanner.expect(",]") == "]":
+                                break
+                else:
+                    self.header[key] = scanner.value()
+                if scanner.expect(",}") == "}":
+                    return
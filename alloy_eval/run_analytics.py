@@ -0,0 +1,104 @@
+"""
+Breakdowns of many runs from the columnar run store.
+
+Every breakdown is a pandas groupby over the stored rows (see
+result_store.COLUMNS), so queries across runs with millions of results take
+seconds.
+
+Usage:
+    python -m alloy_eval.run_analytics runs --by model domain
+"""
+
+import argparse
+from typing import Sequence
+
+import pandas as pd
+from rich.table import Table
+
+from alloy_eval.result_store import ERROR_CATEGORIES, load_runs
+from alloy_eval.ui_utils import console
+
+
+def breakdown(frame: pd.DataFrame, by: Sequence[str] = ("model",)) -> pd.DataFrame:
+    """
+    Pass rates, error shares and analyzer time per group of results.
+
+    Args:
+        frame: Stored rows, see result_store.load_runs
+        by: Columns to group results by
+
+    Returns:
+        A DataFrame with the group columns, runs, samples, passed, pass_rate,
+        median and total analyzer_ms, and the share of each error category
+    """
+    grouped = frame.groupby(list(by), observed=True, sort=True)
+    table = grouped.agg(
+        runs=("run", "nunique"),
+        samples=("passed", "size"),
+        passed=("passed", "sum"),
+        pass_rate=("passed", "mean"),
+        median_analyzer_ms=("analyzer_ms", "median"),
+        total_analyzer_ms=("analyzer_ms", "sum"),
+    )
+    errors = pd.crosstab(
+        [frame[column] for column in by], frame["error_category"], normalize="index"
+    )
+    errors = errors.reindex(columns=ERROR_CATEGORIES, fill_value=0.0)
+    return table.join(errors).reset_index()
+
+
+def display_breakdown(table: pd.DataFrame, by: Sequence[str], title: str) -> None:
+    """Print a breakdown table, with error categories that occur."""
+    categories = [c for c in ERROR_CATEGORIES[1:] if (table[c] > 0).any()]
+    rich_table = Table(
+        show_header=True, header_style="bold magenta", title=f"[bold]{title}[/bold]"
+    )
+    for column in by:
+        rich_table.add_column(column.replace("_", " ").capitalize())
+    for column in ("Runs", "Samples", "Pass Rate", "Median Analyzer ms"):
+        rich_table.add_column(column)
+    for category in categories:
+        rich_table.add_column(category)
+    for _, row in table.iterrows():
+        median = row["median_analyzer_ms"]
+        rich_table.add_row(
+            *(str(row[column]) for column in by),
+            str(row["runs"]),
+            str(row["samples"]),
+            f"{row['pass_rate']*100:.1f}%",
+            "-" if pd.isna(median) else f"{median:.0f}",
+            *(f"{row[category]*100:.1f}%" for category in categories),
+        )
+    console.print(rich_table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Break down stored runs by model, domain, predicate, ..."
+    )
+    parser.add_argument("store", help="Directory of the run store")
+    parser.add_argument(
+        "--by",
+        nargs="+",
+        default=["model"],
+        help="Columns to group results by (e.g. model temperature domain predicate)",
+    )
+    parser.add_argument(
+        "--runs", nargs="+", help="Names of the runs to include (default: all)"
+    )
+    args = parser.parse_args()
+
+    frame = load_runs(
+        args.store,
+        args.runs,
+        columns=[
+            *dict.fromkeys([*args.by, "run", "passed", "error_category", "analyzer_ms"])
+        ],
+    )
+    display_breakdown(
+        breakdown(frame, args.by), args.by, f"Results by {', '.join(args.by)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
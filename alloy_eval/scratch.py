@@ -0,0 +1,137 @@
+"""
+Per-run scratch space for analyzer files.
+
+Every .als file handed to ``alloy exec``, and the analyzer's output directory
+(``-o``), lives in a directory private to the process, on tmpfs (/dev/shm)
+when available. Each analyzer run gets its own file and output directory,
+removed as soon as the run ends. The directory itself is removed on close or
+when the process exits, and directories left behind by killed processes are
+swept the next time one is created in the same place.
+"""
+
+import contextlib
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import Iterator
+
+from alloy_eval.tracing import span
+
+PREFIX = "alloy_eval_"
+
+
+def default_scratch_root() -> Path:
+    """
+    Return the directory scratch directories are created in.
+
+    This is $ALLOY_EVAL_SCRATCH_DIR if set, else /dev/shm if it is a writable
+    directory, else the system temp directory.
+
+    Returns:
+        The scratch root
+    """
+    configured = os.getenv("ALLOY_EVAL_SCRATCH_DIR")
+    if configured:
+        return Path(configured)
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale(root: Path) -> None:
+    """Remove scratch directories of processes that are no longer running."""
+    for path in root.glob(f"{PREFIX}*"):
+        pid = path.name[len(PREFIX) :].split("_")[0]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class ScratchDir:
+    """A private directory for analyzer input and output files."""
+
+    def __init__(self, root: str | Path | None = None):
+        """
+        Create the directory.
+
+        Args:
+            root: Directory to create it in (default: default_scratch_root())
+        """
+        root = Path(root) if root is not None else default_scratch_root()
+        root.mkdir(parents=True, exist_ok=True)
+        remove_stale(root)
+        self.path = Path(tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}_", dir=root))
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, True)
+
+    def new_path(self, suffix: str = "") -> Path:
+        """Return a fresh, unused path inside the directory."""
+        with self._lock:
+            return self.path / f"{next(self._counter)}{suffix}"
+
+    @contextlib.contextmanager
+    def stage(
+        self, content: str | None, als_file: Path | None = None
+    ) -> Iterator[tuple[Path, Path]]:
+        """
+        Provide the files of one analyzer run, removing them afterwards.
+
+        Args:
+            content: Module source to write, if als_file does not hold it yet
+            als_file: Existing file to analyze instead of writing content (it
+                is not removed)
+
+        Yields:
+            Tuple of (.als file to analyze, empty output directory)
+        """
+        staged = None
+        if als_file is None:
+            staged = als_file = self.new_path(".als")
+            with span("create_alloy_file"):
+                als_file.write_text(content)
+        output_dir = self.new_path(".out")
+        output_dir.mkdir()
+        try:
+            yield als_file, output_dir
+        finally:
+            if staged is not None:
+                staged.unlink(missing_ok=True)
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def close(self) -> None:
+        """Remove the directory and everything in it."""
+        self._finalizer()
+
+    def __enter__(self) -> "ScratchDir":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default: ScratchDir | None = None
+_default_lock = threading.Lock()
+
+
+def default_scratch() -> ScratchDir:
+    """The process-wide scratch directory, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ScratchDir()
+        return _default
@@ -0,0 +1,192 @@
+"""
+Per-problem analyzer timeouts learned from past solve times.
+
+A fixed 30 s timeout is far too generous for trivial checks, so hung
+candidates hold a worker for the full 30 s, and it can be too tight for
+heavy ones. A TimeoutPolicy records how long every analyzer run of a
+problem that reached check verdicts took and gives each later run
+``multiplier`` times the p99 of those durations, within [floor, cap].
+Problems with fewer than min_samples recorded runs get the default timeout.
+
+Durations are wall-clock times of the whole run, so they are kept apart for
+``alloy exec`` runs (which include a JVM start) and pooled workers.
+
+The history can be seeded with a calibration pass over the canonical
+solutions:
+
+Usage:
+    python -m alloy_eval.timeouts data/*.jsonl --alloy-path alloy --runs 5
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from alloy_eval.alloy_output import AnalyzerOutput
+from alloy_eval.alloy_pool import AlloyWorkerPool
+from alloy_eval.cache import TimingHistory, default_cache_dir, hash_key
+from alloy_eval.data_utils import read_problems
+from alloy_eval.evaluation import DEFAULT_TIMEOUT, analyze, build_alloy_content
+from alloy_eval.models import AlloyProblem
+from alloy_eval.parallel import map_ordered
+from alloy_eval.portfolio import problem_key
+from alloy_eval.tracing import percentile
+from alloy_eval.ui_utils import console
+
+
+class TimeoutPolicy:
+    """Chooses analyzer timeouts from the recorded solve times of each problem."""
+
+    def __init__(
+        self,
+        history: TimingHistory,
+        multiplier: float = 3.0,
+        cap: float = 120.0,
+        floor: float = 2.0,
+        min_samples: int = 5,
+        default: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            history: Where solve times are recorded and read from
+            multiplier: Timeout as a multiple of the p99 solve time
+            cap: Longest timeout ever given, in seconds
+            floor: Shortest timeout ever given, in seconds
+            min_samples: Recorded runs a problem needs before its timeout is learned
+            default: Timeout of problems without enough recorded runs, in seconds
+        """
+        self.history = history
+        self.multiplier = multiplier
+        self.cap = cap
+        self.floor = floor
+        self.min_samples = min_samples
+        self.default = min(default, cap)
+
+    @staticmethod
+    def _key(key: str, pooled: bool) -> str:
+        return hash_key(key, "pool" if pooled else "exec")
+
+    def timeout_for(self, key: str, pooled: bool = False) -> float:
+        """
+        Timeout of an analyzer run.
+
+        Args:
+            key: The problem key of the run, see problem_key
+            pooled: Whether the run is on a worker pool rather than ``alloy exec``
+
+        Returns:
+            The timeout in seconds
+        """
+        samples = sorted(self.history.samples(self._key(key, pooled)))
+        if len(samples) < self.min_samples:
+            return self.default
+        learned = self.multiplier * percentile(samples, 99) / 1000
+        return min(max(learned, self.floor), self.cap)
+
+    def observe(
+        self, key: str, pooled: bool, elapsed_ms: float, output: AnalyzerOutput
+    ) -> None:
+        """
+        Record the duration of an analyzer run, if it reached check verdicts.
+
+        Syntax and type errors stop the analyzer before it solves anything,
+        so their durations say nothing about the problem's solve time.
+
+        Args:
+            key: The problem key of the run
+            pooled: Whether the run was on a worker pool
+            elapsed_ms: Wall-clock duration of the run
+            output: What the run reported
+        """
+        if output.error is None and output.check_verdicts():
+            self.history.record(self._key(key, pooled), elapsed_ms)
+
+
+def calibrate(
+    problems_file: str | Path,
+    alloy_path: str,
+    policy: TimeoutPolicy,
+    pool: AlloyWorkerPool | None = None,
+    runs: int = 5,
+    workers: int = 1,
+) -> int:
+    """
+    Record solve times of the canonical solutions of a problems file.
+
+    Args:
+        problems_file: Path to the problems JSONL file
+        alloy_path: Path to Alloy analyzer executable
+        policy: The policy to record the times in
+        pool: Optional pool of persistent Alloy workers
+        runs: Analyzer runs per canonical solution
+        workers: Number of runs to execute concurrently
+
+    Returns:
+        Number of problems calibrated (those with a canonical solution)
+    """
+    problems = [p for p in read_problems(problems_file) if p.canonical_solution]
+
+    def run(problem: AlloyProblem) -> None:
+        # The canonical solution closes the predicate, as build_alloy_content does
+        solution = problem.canonical_solution.rstrip().removesuffix("}")
+        content = build_alloy_content(problem, solution)
+        key = problem_key(problem)
+        start = time.perf_counter()
+        output = analyze(content, alloy_path, policy.cap, pool)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        policy.observe(key, pool is not None, elapsed_ms, output)
+
+    map_ordered(
+        run,
+        [problem for problem in problems for _ in range(runs)],
+        workers=workers,
+        description="Calibrating timeouts",
+    )
+    return len(problems)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Record canonical-solution solve times for adaptive timeouts."
+    )
+    parser.add_argument("problems_files", nargs="+", help="Problems JSONL files")
+    parser.add_argument(
+        "--alloy-path", required=True, help="Path to Alloy analyzer executable"
+    )
+    parser.add_argument(
+        "--alloy-jar",
+        help="Path to the Alloy jar; calibrates the persistent worker pool",
+    )
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Analyzer runs per canonical solution"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of runs to execute concurrently"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(default_cache_dir()),
+        help="Directory of the timing history",
+    )
+    args = parser.parse_args()
+
+    pool = AlloyWorkerPool(args.alloy_jar, args.pool_size) if args.alloy_jar else None
+    history = TimingHistory(Path(args.cache_dir) / "timings.sqlite")
+    policy = TimeoutPolicy(history)
+    try:
+        for problems_file in args.problems_files:
+            count = calibrate(
+                problems_file, args.alloy_path, policy, pool, args.runs, args.workers
+            )
+            console.print(f"Calibrated {count} problems of {problems_file}")
+    finally:
+        if pool is not None:
+            pool.close()
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Lightweight timing spans for finding where a run spends its time.
+
+Stages are wrapped in spans, either with the ``traced`` decorator or the
+``span`` context manager:
+
+    @traced("create_prompt")
+    def create_prompt(...): ...
+
+    with span("openai_query", model=model):
+        ...
+
+Spans are recorded on the process-wide TRACER. They can be summarized as
+p50/p95/p99 durations per stage, and exported in the Chrome trace event
+format, which chrome://tracing, Perfetto and most OpenTelemetry tooling open.
+Spans opened inside asyncio tasks are exported as async events, so
+overlapping requests on the event loop thread render correctly.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span(NamedTuple):
+    """A finished span."""
+
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    task_id: int | None  # id of the asyncio task the span ran in, if any
+    args: dict[str, Any]
+
+
+class Tracer:
+    """Collects finished spans from any thread."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Forget all recorded spans."""
+        with self._lock:
+            self.spans = []
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def durations(self) -> dict[str, list[float]]:
+        """Span durations in milliseconds, by stage name."""
+        by_stage: dict[str, list[float]] = {}
+        with self._lock:
+            for span in self.spans:
+                by_stage.setdefault(span.name, []).append(span.duration_ns / 1e6)
+        return by_stage
+
+    def write_chrome_trace(self, path: str | Path) -> None:
+        """
+        Export the spans as a Chrome trace event file.
+
+        Args:
+            path: Path of the JSON file to write
+        """
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            event = {
+                "name": span.name,
+                "cat": "alloy_eval",
+                "pid": pid,
+                "tid": span.thread_id,
+                "ts": span.start_ns / 1000,
+                "args": span.args,
+            }
+            if span.task_id is None:
+                events.append({**event, "ph": "X", "dur": span.duration_ns / 1000})
+            else:
+                end = (span.start_ns + span.duration_ns) / 1000
+                events.append({**event, "ph": "b", "id": span.task_id})
+                events.append({**event, "ph": "e", "id": span.task_id, "ts": end})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def print_summary(self) -> None:
+        """Print p50/p95/p99 durations per stage."""
+        from rich.table import Table
+
+        from alloy_eval.ui_utils import console
+
+        durations = self.durations()
+        if not durations:
+            return
+        table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            title="[bold]Stage Timings (ms)[/bold]",
+        )
+        for column in ("Stage", "Count", "Total (s)", "p50", "p95", "p99"):
+            table.add_column(column)
+        for name, values in sorted(
+            durations.items(), key=lambda item: sum(item[1]), reverse=True
+        ):
+            values.sort()
+            table.add_row(
+                name,
+                str(len(values)),
+                f"{sum(values)/1000:.2f}",
+                *(f"{percentile(values, q):.1f}" for q in (50, 95, 99)),
+            )
+        console.print(table)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Linearly interpolated percentile of sorted values.
+
+    Args:
+        values: Sorted, non-empty values
+        q: Percentile between 0 and 100
+
+    Returns:
+        The q-th percentile
+    """
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+TRACER = Tracer()
+
+
+def _current_task_id() -> int | None:
+    # Without asyncio imported, no task can be running (and importing it is slow)
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None:
+        return None
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return None
+    return id(task) if task is not None else None
+
+
+@contextlib.contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """
+    Time the enclosed block as a span of the given stage.
+
+    Args:
+        name: Stage name
+        **args: Extra details exported with the span
+    """
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        TRACER.record(
+            Span(
+                name,
+                start,
+                time.perf_counter_ns() - start,
+                threading.get_ident(),
+                _current_task_id(),
+                args,
+            )
+        )
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator recording every call of a function as a span."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,134 @@
+"""
+Precomputed truth tables of canonical solutions.
+
+For problems checked as ``check p { p iff (oracle) } for N``, a candidate
+passes exactly when it agrees with the canonical solution on every instance
+in scope. The native backend evaluates the canonical solution once over its
+instance bank (every instance, or a fixed sample for larger problems) and
+keeps the result as a bitset. Checking a candidate then only evaluates the
+candidate and compares bitsets.
+
+Bitsets are stored next to the problems file and versioned with it:
+
+    data/graph_problems.jsonl -> data/graph_problems.truth.json
+
+Each entry records a fingerprint of its problem and a digest of the instance
+bank, so tables for edited problems or a changed bank are ignored (and
+recomputed in memory) instead of giving wrong verdicts.
+
+Usage:
+    python -m alloy_eval.truth_tables data/*.jsonl
+"""
+
+import argparse
+import base64
+import json
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from alloy_eval.data_utils import read_problems
+from alloy_eval.native_backend import (
+    TRUTH_TABLES,
+    TruthTable,
+    compute_truth_table,
+    problem_fingerprint,
+)
+from alloy_eval.ui_utils import console
+
+FORMAT_VERSION = 1
+
+
+def truth_table_path(problems_file: str | Path) -> Path:
+    """Return the truth table file of a problems file (x.jsonl -> x.truth.json)."""
+    return Path(problems_file).with_suffix(".truth.json")
+
+
+def encode_bits(bits: np.ndarray) -> str:
+    """Pack a boolean array into compressed base64 text."""
+    return base64.b64encode(zlib.compress(np.packbits(bits).tobytes(), 9)).decode()
+
+
+def decode_bits(text: str, count: int) -> np.ndarray:
+    """Inverse of encode_bits for an array of count booleans."""
+    packed = np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=np.uint8)
+    return np.unpackbits(packed, count=count).astype(bool)
+
+
+def build_truth_tables(problems_file: str | Path) -> Path:
+    """
+    Compute and save the truth tables of every problem in a file.
+
+    Problems the native backend cannot evaluate, or whose check does not
+    compare the predicate to an oracle, are left out.
+
+    Args:
+        problems_file: Path to the problems JSONL file
+
+    Returns:
+        Path of the written truth table file
+    """
+    problems = {}
+    for problem in read_problems(problems_file):
+        table = compute_truth_table(problem)
+        if table is None:
+            console.print(f"[yellow]{problem.task_id}: no truth table[/]")
+            continue
+        problems[problem.task_id] = {
+            "fingerprint": problem_fingerprint(problem),
+            "bank": table.bank,
+            "instances": len(table.bits),
+            "bits": encode_bits(table.bits),
+        }
+
+    path = truth_table_path(problems_file)
+    with open(path, "w") as f:
+        json.dump({"version": FORMAT_VERSION, "problems": problems}, f, indent=1)
+        f.write("\n")
+    return path
+
+
+def load_truth_tables(problems_file: str | Path) -> int:
+    """
+    Make the saved truth tables of a problems file available to the backend.
+
+    Args:
+        problems_file: Path to the problems JSONL file
+
+    Returns:
+        Number of truth tables loaded (0 if there is no truth table file)
+    """
+    path = truth_table_path(problems_file)
+    if not path.exists():
+        return 0
+    return _load(path.resolve(), path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _load(path: Path, mtime_ns: int) -> int:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != FORMAT_VERSION:
+        return 0
+    for entry in data["problems"].values():
+        bits = decode_bits(entry["bits"], entry["instances"])
+        TRUTH_TABLES[entry["fingerprint"]] = TruthTable(bits, entry["bank"])
+    return len(data["problems"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Precompute canonical-solution truth tables for the native backend."
+    )
+    parser.add_argument("problems_files", nargs="+", help="Problems JSONL files")
+    args = parser.parse_args()
+
+    for problems_file in args.problems_files:
+        path = build_truth_tables(problems_file)
+        console.print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,13 +25,15 @@ def generate_report(
     total = len(results)
     successful = sum(1 for r in results if r.get(success_key))
 
+    success_rate = f"{successful/total*100:.2f}%" if total else "n/a"
+
     console.print(
         f"""
     ===== {title} =====
     Model: {model}
     Total problems: {total}
     {success_label}: {successful}
-    Success rate: {successful/total*100:.2f}%
+    Success rate: {success_rate}
     """
     )
 
@@ -0,0 +1 @@
+"""Offline benchmarks of the evaluation pipeline, see benchmarks.run."""
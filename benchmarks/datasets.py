@@ -0,0 +1,82 @@
+"""Synthetic benchmark inputs built from the bundled problems."""
+
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+FAKE_ALLOY = Path(__file__).resolve().parent / "fake_alloy.py"
+
+
+def scale_problems(count: int, output: str | Path, data_dir: Path = DATA_DIR) -> Path:
+    """
+    Write a problems file of the requested size.
+
+    Problems of every data/*_problems.jsonl file are repeated in turn, each
+    copy with its own "domain/task_id_copy" task_id, until count problems are
+    written.
+
+    Args:
+        count: Number of problems to write
+        output: Path of the problems JSONL file to create
+        data_dir: Directory holding the source problems
+
+    Returns:
+        The output path
+    """
+    sources = []
+    for path in sorted(data_dir.glob("*_problems.jsonl")):
+        domain = path.stem.removesuffix("_problems")
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    problem = json.loads(line)
+                    # Task IDs are only unique within a domain file
+                    problem["task_id"] = f"{domain}/{problem['task_id']}"
+                    sources.append(problem)
+
+    with open(output, "w") as f:
+        for i in range(count):
+            problem = dict(sources[i % len(sources)])
+            problem["task_id"] = f"{problem['task_id']}_{i // len(sources)}"
+            f.write(json.dumps(problem) + "\n")
+    return Path(output)
+
+
+def write_samples(solutions: list[str], output: str | Path) -> Path:
+    """
+    Write an eval_alloy samples file with one sample per solution.
+
+    Args:
+        solutions: The completions
+        output: Path of the samples JSONL file to create
+
+    Returns:
+        The output path
+    """
+    with open(output, "w") as f:
+        for i, solution in enumerate(solutions):
+            f.write(json.dumps({"task_id": f"sample{i}", "completion": solution}))
+            f.write("\n")
+    return Path(output)
+
+
+def install_fake_alloy(directory: str | Path) -> Path:
+    """
+    Create an ``alloy`` executable running the fake analyzer.
+
+    The fake reads its delays and verdict mix from the environment of the
+    process calling it, see benchmarks.fake_alloy.
+
+    Args:
+        directory: Directory to create the executable in
+
+    Returns:
+        Path of the executable
+    """
+    path = Path(directory) / "alloy"
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_ALLOY}" "$@"\n')
+    os.chmod(path, path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
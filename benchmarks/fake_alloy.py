@@ -0,0 +1,125 @@
+"""
+Stand-in for the ``alloy`` executable.
+
+Understands ``alloy version`` and ``alloy exec [-s SOLVER] -o DIR -f FILE``, and answers
+the latter in the analyzer's reporter format, with solver statistics, for
+every check command of the file. Configured through environment variables:
+
+    FAKE_ALLOY_STARTUP_MS  delay before the file is read (JVM startup), default 0
+    FAKE_ALLOY_SOLVE_MS    delay per check command, default 0
+    FAKE_ALLOY_SOLVER_MS   delay per check command of given solvers, e.g.
+                           "sat4j=200,minisat(jni)=20"; others use
+                           FAKE_ALLOY_SOLVE_MS
+    FAKE_ALLOY_MIX         verdict weights, default
+                           "pass=0.3,counterexample=0.6,syntax=0.05,type=0.05"
+
+Verdicts are drawn from the mix by hashing the predicate body, so a solution
+always gets the same verdict, whatever the solver. As in Alloy, one syntax or
+type error fails the whole file.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import time
+
+DEFAULT_MIX = "pass=0.3,counterexample=0.6,syntax=0.05,type=0.05"
+DEFAULT_SOLVER = "sat4j"
+
+PREDICATE_RE = re.compile(r"^pred\s+(\w+)\s*\{\n(.*?)\n\}", re.MULTILINE | re.DOTALL)
+CHECK_RE = re.compile(r"^check\s+(\w+)\s*\{", re.MULTILINE)
+
+
+def parse_mix(text: str) -> list[tuple[str, float]]:
+    """Parse "verdict=weight,..." into cumulative thresholds."""
+    weights = [
+        (k.strip(), float(v)) for k, v in (p.split("=") for p in text.split(","))
+    ]
+    total = sum(weight for _, weight in weights)
+    thresholds, cumulative = [], 0.0
+    for verdict, weight in weights:
+        cumulative += weight / total
+        thresholds.append((verdict, cumulative))
+    return thresholds
+
+
+def parse_solver_ms(text: str) -> dict[str, float]:
+    """Parse "solver=ms,..." into solve delays by solver."""
+    return {
+        k.strip(): float(v)
+        for k, v in (p.rsplit("=", 1) for p in text.split(",") if p.strip())
+    }
+
+
+def draw(body: str, thresholds: list[tuple[str, float]]) -> str:
+    """Pick a verdict for a predicate body, deterministically."""
+    digest = hashlib.blake2b(body.strip().encode(), digest_size=8).digest()
+    u = int.from_bytes(digest, "big") / 2**64
+    for verdict, threshold in thresholds:
+        if u < threshold:
+            return verdict
+    return thresholds[-1][0]
+
+
+def execute(
+    path: str,
+    thresholds: list[tuple[str, float]],
+    solve_ms: float,
+    solver: str = DEFAULT_SOLVER,
+) -> int:
+    with open(path) as f:
+        source = f.read()
+    predicates = {m.group(1): m for m in PREDICATE_RE.finditer(source)}
+
+    verdicts = {}
+    for name in CHECK_RE.findall(source):
+        match = predicates.get(name)
+        verdicts[name] = draw(match.group(2), thresholds) if match else "pass"
+        if verdicts[name] in ("syntax", "type"):
+            line = source.count("\n", 0, match.start(2)) + 1
+            kind = "Syntax" if verdicts[name] == "syntax" else "Type"
+            print(f"{kind} error in {path} at line {line} column 2:", file=sys.stderr)
+            print("Fake analyzer error.", file=sys.stderr)
+            return 1
+
+    for name, verdict in verdicts.items():
+        time.sleep(solve_ms / 1000)
+        size = len(predicates[name].group(2)) if name in predicates else 0
+        print(f'Executing "Check {name} for 4"')
+        print(f"   Solver={solver} Bitwidth=4 MaxSeq=4 SkolemDepth=1 Symmetry=20")
+        print(
+            f"   {1000 + 40 * size} vars. {64 + size} primary vars. "
+            f"{2500 + 90 * size} clauses. {5 + size % 7}ms."
+        )
+        if verdict == "pass":
+            print(
+                f"   No counterexample found. Assertion may be valid. {int(solve_ms)}ms."
+            )
+        else:
+            print(f"   Counterexample found. Assertion is invalid. {int(solve_ms)}ms.")
+    return 0
+
+
+def main() -> int:
+    time.sleep(float(os.environ.get("FAKE_ALLOY_STARTUP_MS", 0)) / 1000)
+    args = sys.argv[1:]
+    if args[:1] == ["version"]:
+        print("fake-alloy 1.0")
+        return 0
+    if args[:1] != ["exec"] or "-f" not in args:
+        print(
+            "usage: alloy exec [-s SOLVER] -o DIR -f FILE | alloy version",
+            file=sys.stderr,
+        )
+        return 2
+    thresholds = parse_mix(os.environ.get("FAKE_ALLOY_MIX", DEFAULT_MIX))
+    solver = args[args.index("-s") + 1] if "-s" in args else DEFAULT_SOLVER
+    solve_ms = parse_solver_ms(os.environ.get("FAKE_ALLOY_SOLVER_MS", "")).get(
+        solver, float(os.environ.get("FAKE_ALLOY_SOLVE_MS", 0))
+    )
+    return execute(args[args.index("-f") + 1], thresholds, solve_ms, solver)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Answers every POST to ``/v1/chat/completions`` after a configurable latency
+with a structured AlloyPred response. The predicate bodies are built from the
+sig names found in the prompt, one per requested solution, and picked by
+hashing the prompt, so reruns see the same responses.
+
+Usage:
+    python -m benchmarks.fake_openai --port 8765 --latency-ms 200
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Predicate bodies, over the first sig of the problem
+TEMPLATES = [
+    "some {sig}",
+    "no {sig}",
+    "lone {sig}",
+    "one {sig}",
+    "#{sig} > 1",
+    "all x: {sig} | x in {sig}",
+    "some {sig} implies no {sig}",
+    "some x: {sig} | x not in {sig}",
+    "no {sig} or one {sig}",
+]
+
+SIG_RE = re.compile(r"\bsig\s+(\w+)")
+COUNT_RE = re.compile(r"implement (\d+) unique")
+
+
+def fake_solutions(prompt: str) -> str:
+    """Build the response content for a prompt."""
+    sig = next(iter(SIG_RE.findall(prompt)), "univ")
+    count = int(next(iter(COUNT_RE.findall(prompt)), 1))
+    seed = int.from_bytes(hashlib.blake2b(prompt.encode(), digest_size=4).digest())
+    bodies = [
+        TEMPLATES[(seed + 7 * k) % len(TEMPLATES)].format(sig=sig) for k in range(count)
+    ]
+    return "\n\n".join(bodies)
+
+
+def make_handler(latency_ms: float) -> type[BaseHTTPRequestHandler]:
+    """Create a request handler class answering after latency_ms."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            length = int(self.headers["Content-Length"])
+            request = json.loads(self.rfile.read(length))
+            time.sleep(latency_ms / 1000)
+            prompt = request["messages"][-1]["content"]
+            content = json.dumps({"content": fake_solutions(prompt)})
+            body = json.dumps(
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(prompt) // 4,
+                        "completion_tokens": len(content) // 4,
+                        "total_tokens": (len(prompt) + len(content)) // 4,
+                    },
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+class FakeOpenAIServer:
+    """The fake endpoint, served from a background thread."""
+
+    def __init__(self, latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Start the server.
+
+        Args:
+            latency_ms: Delay before each response
+            host: Interface to listen on
+            port: Port to listen on, 0 for any free port
+        """
+        self.server = ThreadingHTTPServer((host, port), make_handler(latency_ms))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        """The base URL to pass to the OpenAI client."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def close(self) -> None:
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency_ms))
+    print(f"Serving on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
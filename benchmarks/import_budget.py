@@ -0,0 +1,152 @@
+"""
+Import-time budget of the evaluation entry points.
+
+Short-lived evaluation workers pay the package's import time on every start,
+so each entry point below is imported in a fresh interpreter and checked
+against a time budget and a list of modules it must not load (the OpenAI
+stack and the analytics dependencies). Each import is timed several times
+and the fastest run counts, to keep the check stable on a busy machine.
+
+Usage:
+    python -m benchmarks.import_budget              # exit 1 if over budget
+    python -m benchmarks.import_budget --scale 2    # budgets for a slow machine
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rich.table import Table
+
+from alloy_eval.ui_utils import console
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules no evaluation entry point may load
+HEAVY_MODULES = ("openai", "dotenv", "httpx", "pandas", "numpy", "pyarrow", "jpype")
+
+
+class ImportBudget(NamedTuple):
+    statement: str
+    budget_ms: float
+    forbidden: tuple[str, ...] = HEAVY_MODULES
+
+
+BUDGETS = [
+    ImportBudget("import alloy_eval", 50),
+    ImportBudget("from alloy_eval import evaluate_functional_correctness", 500),
+    ImportBudget("from alloy_eval import AlloyProblem, EvaluationResult", 400),
+    ImportBudget("import alloy_eval.evaluation", 500),
+    ImportBudget("import alloy_eval.batch_evaluation", 500),
+    ImportBudget("import alloy_eval.cli", 600),
+]
+
+# Run in the child: time the statement and report what it loaded
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed_ms = (time.perf_counter() - start) * 1000
+loaded = sorted({{name.partition(".")[0] for name in sys.modules}})
+print(json.dumps({{"ms": elapsed_ms, "modules": loaded}}))
+"""
+
+
+def measure(statement: str, repeat: int = 5) -> dict[str, Any]:
+    """
+    Import a statement in fresh interpreters.
+
+    Args:
+        statement: The import statement
+        repeat: Number of interpreters to time it in
+
+    Returns:
+        Dictionary with the fastest time in ms and the top-level modules loaded
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output))
+    return {"ms": min(run["ms"] for run in runs), "modules": runs[0]["modules"]}
+
+
+def check(scale: float = 1.0, repeat: int = 5) -> list[str]:
+    """
+    Measure every entry point and print the results.
+
+    Args:
+        scale: Factor applied to every budget
+        repeat: Number of interpreters to time each import in
+
+    Returns:
+        Descriptions of the budgets exceeded
+    """
+    table = Table(
+        show_header=True,
+        header_style="bold magenta",
+        title="[bold]Import Budget[/bold]",
+    )
+    for column in ("Import", "ms", "Budget", "Forbidden Modules Loaded"):
+        table.add_column(column)
+
+    failures = []
+    for budget in BUDGETS:
+        measured = measure(budget.statement, repeat)
+        limit = budget.budget_ms * scale
+        loaded = [m for m in budget.forbidden if m in measured["modules"]]
+        over = measured["ms"] > limit
+        if over:
+            failures.append(
+                f"{budget.statement}: {measured['ms']:.0f} ms > {limit:.0f} ms"
+            )
+        if loaded:
+            failures.append(f"{budget.statement}: loads {', '.join(loaded)}")
+        table.add_row(
+            budget.statement,
+            f"[{'red' if over else 'green'}]{measured['ms']:.0f}[/]",
+            f"{limit:.0f}",
+            f"[red]{', '.join(loaded)}[/red]" if loaded else "-",
+        )
+    console.print(table)
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to every budget (e.g. 2 on a slow machine)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Interpreters to time each import in"
+    )
+    args = parser.parse_args()
+
+    failures = check(args.scale, args.repeat)
+    for failure in failures:
+        console.print(f"[red]Over budget: {failure}[/red]")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline end-to-end throughput benchmarks.
+
+Drives evaluate_functional_correctness, OpenAITester.run_tests and the
+eval_alloy command line against a fake ``alloy`` executable and a local fake
+OpenAI endpoint, on the bundled problems scaled to the requested sizes. For
+each scenario and size it reports solutions/sec, p50/p95/p99 latency of each
+traced stage and peak RSS.
+
+Usage:
+    python -m benchmarks.run --problems 1000 10000 --workers 8
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json   # exit 1 on regressions
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from rich.table import Table
+
+from alloy_eval.evaluation import BACKENDS
+from alloy_eval.ui_utils import console
+from benchmarks.datasets import install_fake_alloy, scale_problems, write_samples
+from benchmarks.fake_alloy import DEFAULT_MIX
+from benchmarks.scenarios import SCENARIOS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_scenario(
+    config: dict[str, Any], env: dict[str, str], verbose: bool = False
+) -> dict[str, Any]:
+    """
+    Run one scenario in a fresh interpreter and collect its measurements.
+
+    Args:
+        config: The scenario configuration, see benchmarks.scenarios
+        env: Environment of the scenario process (fake analyzer settings)
+        verbose: Show the scenario's own output
+
+    Returns:
+        The measurements written by the scenario
+    """
+    work_dir = Path(config["work_dir"])
+    config_path = work_dir / f"{config['scenario']}.config.json"
+    result_path = work_dir / f"{config['scenario']}.result.json"
+    config_path.write_text(json.dumps(config))
+    output = None if verbose else subprocess.DEVNULL
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.scenarios", config_path, result_path],
+        cwd=ROOT,
+        env=env,
+        stdout=output,
+        stderr=output,
+        check=True,
+    )
+    return json.loads(result_path.read_text())
+
+
+def display(results: list[dict[str, Any]], baseline: dict[tuple, dict]) -> None:
+    """Print throughput and stage latency tables."""
+    table = Table(
+        show_header=True,
+        header_style="bold magenta",
+        title="[bold]Throughput[/bold]",
+    )
+    for column in (
+        "Scenario",
+        "Problems",
+        "Solutions",
+        "Seconds",
+        "Solutions/s",
+        "vs Baseline",
+        "Peak RSS (MiB)",
+    ):
+        table.add_column(column)
+    for result in results:
+        previous = baseline.get((result["scenario"], result["problems"]))
+        change = (
+            f"{result['solutions_per_sec'] / previous['solutions_per_sec'] - 1:+.1%}"
+            if previous
+            else "-"
+        )
+        table.add_row(
+            result["scenario"],
+            str(result["problems"]),
+            str(result["solutions"]),
+            f"{result['seconds']:.2f}",
+            f"{result['solutions_per_sec']:.1f}",
+            change,
+            f"{result['peak_rss_mb']:.0f}",
+        )
+    console.print(table)
+
+    stages = Table(
+        show_header=True,
+        header_style="bold magenta",
+        title="[bold]Stage Latency (ms)[/bold]",
+    )
+    for column in ("Scenario", "Problems", "Stage", "Count", "p50", "p95", "p99"):
+        stages.add_column(column)
+    for result in results:
+        for name, stats in sorted(result["stages"].items()):
+            stages.add_row(
+                result["scenario"],
+                str(result["problems"]),
+                name,
+                str(stats["count"]),
+                *(f"{stats[q]:.1f}" for q in ("p50", "p95", "p99")),
+            )
+    console.print(stages)
+
+
+def regressions(
+    results: list[dict[str, Any]], baseline: dict[tuple, dict], tolerance: float
+) -> list[str]:
+    """Describe scenarios whose throughput dropped by more than tolerance."""
+    found = []
+    for result in results:
+        previous = baseline.get((result["scenario"], result["problems"]))
+        if previous is None:
+            continue
+        ratio = result["solutions_per_sec"] / previous["solutions_per_sec"]
+        if ratio < 1 - tolerance:
+            found.append(
+                f"{result['scenario']} ({result['problems']} problems): "
+                f"{previous['solutions_per_sec']:.1f} -> "
+                f"{result['solutions_per_sec']:.1f} solutions/s"
+            )
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks")
+    parser.add_argument(
+        "--problems",
+        type=int,
+        nargs="+",
+        default=[200],
+        help="Dataset sizes to run, e.g. 1000 10000 100000",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Scenarios to run",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--backend", choices=BACKENDS, default="alloy")
+    parser.add_argument("--no-preflight", action="store_true")
+    parser.add_argument(
+        "--num-solutions", type=int, default=3, help="Solutions per problem (run_tests)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Concurrent requests (run_tests)"
+    )
+    parser.add_argument(
+        "--solution",
+        default="some univ",
+        help="Solution checked against every problem (evaluate, eval_alloy)",
+    )
+    parser.add_argument("--alloy-startup-ms", type=float, default=0.0)
+    parser.add_argument("--alloy-solve-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--alloy-solver-ms",
+        default="",
+        help="Fake analyzer delay per check of given solvers, e.g. "
+        "'sat4j=200,minisat(jni)=20' (others use --alloy-solve-ms)",
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Race the default SAT solvers on each check, learning the fastest",
+    )
+    parser.add_argument(
+        "--alloy-mix",
+        default=DEFAULT_MIX,
+        help="Fake analyzer verdict weights",
+    )
+    parser.add_argument("--openai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--output", help="Write the measurements to this JSON file")
+    parser.add_argument("--baseline", help="Compare with measurements from --output")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Allowed throughput drop against the baseline (fraction)",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])
+        ),
+        "FAKE_ALLOY_STARTUP_MS": str(args.alloy_startup_ms),
+        "FAKE_ALLOY_SOLVE_MS": str(args.alloy_solve_ms),
+        "FAKE_ALLOY_SOLVER_MS": args.alloy_solver_ms,
+        "FAKE_ALLOY_MIX": args.alloy_mix,
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="alloy_eval_bench_") as tmp:
+        alloy_path = install_fake_alloy(tmp)
+        samples_file = write_samples([args.solution], Path(tmp) / "samples.jsonl")
+        for count in args.problems:
+            problems_file = scale_problems(count, Path(tmp) / f"problems_{count}.jsonl")
+            for scenario in args.scenarios:
+                console.print(f"[blue]{scenario}: {count} problems[/blue]")
+                config = {
+                    "scenario": scenario,
+                    "problems": count,
+                    "problems_file": str(problems_file),
+                    "samples_file": str(samples_file),
+                    "alloy_path": str(alloy_path),
+                    "work_dir": tmp,
+                    "workers": args.workers,
+                    "batch_size": args.batch_size,
+                    "backend": args.backend,
+                    "preflight": not args.no_preflight,
+                    "num_solutions": args.num_solutions,
+                    "concurrency": args.concurrency,
+                    "openai_latency_ms": args.openai_latency_ms,
+                    "solution": args.solution,
+                    "portfolio": args.portfolio,
+                    # Each scenario learns its solvers from scratch
+                    "cache_dir": str(Path(tmp) / f"{scenario}_{count}"),
+                }
+                results.append(run_scenario(config, env, args.verbose))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {
+                (r["scenario"], r["problems"]): r for r in json.load(f)["results"]
+            }
+    display(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    found = regressions(results, baseline, args.tolerance)
+    for regression in found:
+        console.print(f"[red]Regression: {regression}[/red]")
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark scenarios, each run end to end in a fresh process.
+
+Every scenario runs in its own interpreter so that its peak RSS and stage
+timings are not mixed with another scenario's. The parent (benchmarks.run)
+starts:
+
+    python -m benchmarks.scenarios CONFIG_JSON RESULT_JSON
+
+and reads the measurements back from RESULT_JSON.
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from alloy_eval.cache import SolverHistory
+from alloy_eval.portfolio import SolverPortfolio
+from alloy_eval.tracing import TRACER, percentile
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def stage_latencies() -> dict[str, dict[str, float]]:
+    """Count and p50/p95/p99 milliseconds of every traced stage."""
+    stages = {}
+    for name, values in TRACER.durations().items():
+        values.sort()
+        stages[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+    return stages
+
+
+def make_portfolio(config: dict[str, Any]) -> SolverPortfolio | None:
+    """The solver portfolio of a scenario, with its own solver history."""
+    if not config["portfolio"]:
+        return None
+    return SolverPortfolio(
+        history=SolverHistory(Path(config["cache_dir"]) / "solvers.sqlite")
+    )
+
+
+def run_evaluate(config: dict[str, Any]) -> int:
+    """One solution against every problem, through evaluate_functional_correctness."""
+    from alloy_eval.evaluation import evaluate_functional_correctness
+
+    results = evaluate_functional_correctness(
+        solution=config["solution"],
+        alloy_path=config["alloy_path"],
+        problems_file=config["problems_file"],
+        workers=config["workers"],
+        preflight=config["preflight"],
+        backend=config["backend"],
+        portfolio=make_portfolio(config),
+    )
+    return len(results)
+
+
+def run_tests(config: dict[str, Any]) -> int:
+    """Generation against the fake OpenAI endpoint, then checking, via run_tests."""
+    from alloy_eval.openai.openai_tester import OpenAITester
+    from benchmarks.fake_openai import FakeOpenAIServer
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    with FakeOpenAIServer(config["openai_latency_ms"]) as server:
+        tester = OpenAITester(
+            problems_file=config["problems_file"],
+            model="fake-model",
+            alloy_path=config["alloy_path"],
+            temperature=0.0,
+            num_solutions=config["num_solutions"],
+            workers=config["workers"],
+            concurrency=config["concurrency"],
+            base_url=server.base_url,
+            batch_size=config["batch_size"],
+            preflight=config["preflight"],
+            backend=config["backend"],
+            portfolio=make_portfolio(config),
+        )
+        tester.run_tests(Path(config["work_dir"]) / "run_tests.json")
+    return tester.solutions_total
+
+
+def run_eval_alloy(config: dict[str, Any]) -> int:
+    """The eval_alloy command line, on a samples file."""
+    from alloy_eval import cli
+
+    argv = [
+        "eval_alloy",
+        config["samples_file"],
+        "--alloy-path",
+        config["alloy_path"],
+        "--problems-file",
+        config["problems_file"],
+        "--workers",
+        str(config["workers"]),
+        "--backend",
+        config["backend"],
+        "--no-cache",
+    ]
+    if not config["preflight"]:
+        argv.append("--no-preflight")
+    if config["portfolio"]:
+        argv += ["--portfolio", "--cache-dir", config["cache_dir"]]
+    sys.argv = argv
+    cli.main()
+    with open(config["samples_file"] + "_results.json") as f:
+        return len(json.load(f)["results"])
+
+
+SCENARIOS: dict[str, Callable[[dict[str, Any]], int]] = {
+    "evaluate": run_evaluate,
+    "run_tests": run_tests,
+    "eval_alloy": run_eval_alloy,
+}
+
+
+def main() -> None:
+    config_path, result_path = sys.argv[1:3]
+    with open(config_path) as f:
+        config = json.load(f)
+
+    start = time.perf_counter()
+    solutions = SCENARIOS[config["scenario"]](config)
+    seconds = time.perf_counter() - start
+
+    with open(result_path, "w") as f:
+        json.dump(
+            {
+                "scenario": config["scenario"],
+                "problems": config["problems"],
+                "solutions": solutions,
+                "seconds": seconds,
+                "solutions_per_sec": solutions / seconds if seconds else 0.0,
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": stage_latencies(),
+            },
+            f,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,15 @@ def read_requirements():
 setup(
     name="alloy_eval",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "tests"]),
     python_requires=">=3.11",
     install_requires=read_requirements(),
+    extras_require={
+        "pool": ["JPype1>=1.4.0"],
+        "native": ["numpy>=1.24.0"],
+        "parquet": ["pyarrow>=14.0.0"],
+        "test": ["pytest>=7.0.0"],
+    },
     description="Alloy specification evaluation benchmark",
     long_description=open("README.md").read(),
     long_description_content_type="markdown",
@@ -20,6 +26,7 @@ setup(
         "console_scripts": [
             "eval_alloy_openai=alloy_eval.openai.openai_cli:main",
             "eval_alloy=alloy_eval.cli:main",
+            "alloy_eval=alloy_eval.__main__:main",
         ],
     },
 )
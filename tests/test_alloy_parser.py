@@ -0,0 +1,52 @@
+"""Preflight checks on the bundled problems."""
+
+from pathlib import Path
+
+import pytest
+
+from alloy_eval.alloy_parser import preflight_check
+from alloy_eval.data_utils import read_problems
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture(scope="module")
+def trash_inv6():
+    problems = read_problems(DATA_DIR / "trash_problems.jsonl")
+    return next(p for p in problems if p.task_id == "inv6")
+
+
+@pytest.mark.parametrize(
+    "solution",
+    [
+        "all f: File | #f.link <= 1",
+        "#File.link <= 3",
+        "all f: File | #f.link >= 0",
+        "all f: File | #f.link >> 1 = 0",
+        "#File.link << 1 = 0",
+        "#File.link >>> 1 = 0",
+    ],
+)
+def test_unsupported_operators_leave_the_solution_to_alloy(trash_inv6, solution):
+    assert preflight_check(trash_inv6, solution) is None
+
+
+def test_canonical_solutions_pass():
+    for path in sorted(DATA_DIR.glob("*.jsonl")):
+        for problem in read_problems(path):
+            if problem.canonical_solution:
+                solution = problem.canonical_solution.rstrip().removesuffix("}")
+                assert preflight_check(problem, solution) is None, problem.task_id
+
+
+@pytest.mark.parametrize(
+    "solution, category",
+    [
+        ("all f: File | f.link", "Type Error"),
+        ("all f: File | lone f.lnk", "Syntax Error"),
+        ("all f: File | (lone f.link", "Syntax Error"),
+    ],
+)
+def test_certain_errors_are_reported(trash_inv6, solution, category):
+    error = preflight_check(trash_inv6, solution)
+    assert error is not None and error.category == category
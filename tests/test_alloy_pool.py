@@ -0,0 +1,73 @@
+"""Worker pool recovery, with a stand-in for the JPype worker process."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from alloy_eval import alloy_pool
+from alloy_eval.alloy_output import CANCELLED
+
+# Speaks the worker protocol; its "jar" is a file holding "ok", or "broken"
+# to exit on startup. Checks of "hang" take 2 s.
+FAKE_WORKER = """
+import json, sys, time
+if open(sys.argv[1]).read().strip() == "broken":
+    sys.exit(1)
+print(json.dumps({"ready": True}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get("content") == "hang":
+        time.sleep(2)
+    print(json.dumps({"ok": True, "error": None, "commands": []}), flush=True)
+"""
+
+
+@pytest.fixture
+def jar(tmp_path, monkeypatch):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    jar = tmp_path / "alloy.jar"
+    jar.write_text("ok")
+    popen = subprocess.Popen
+
+    def fake_popen(args, **kwargs):
+        return popen([sys.executable, str(script), *args[3:]], **kwargs)
+
+    monkeypatch.setattr(alloy_pool.subprocess, "Popen", fake_popen)
+    monkeypatch.setattr(alloy_pool.importlib.util, "find_spec", lambda name: True)
+    return jar
+
+
+def test_timeout_restarts_the_worker(jar):
+    with alloy_pool.AlloyWorkerPool(jar, size=1) as pool:
+        pid = pool.workers[0].process.pid
+        assert pool.run("hang", timeout=0.2)["error"].startswith("Timeout")
+        assert pool.run("check")["error"] is None
+        assert pool.workers[0].process.pid != pid
+
+
+def test_failed_restarts_keep_the_worker_in_the_pool(jar):
+    with alloy_pool.AlloyWorkerPool(jar, size=1) as pool:
+        jar.write_text("broken")
+        assert pool.run("hang", timeout=0.2)["error"].startswith("Timeout")
+        # The dead worker is back in the pool: runs report errors, not block
+        for _ in range(2):
+            assert "restart failed" in pool.run("check")["error"]
+        jar.write_text("ok")
+        assert pool.run("check")["error"] is None
+
+
+def test_cancelled_run_keeps_its_worker(jar):
+    with alloy_pool.AlloyWorkerPool(jar, size=1) as pool:
+        pid = pool.workers[0].process.pid
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        start = time.monotonic()
+        assert pool.run("hang", timeout=5, cancel=cancel)["error"] == CANCELLED
+        assert time.monotonic() - start < 1
+        # The worker rejoins the pool once it has finished the run
+        assert pool.run("check")["error"] is None
+        assert pool.workers[0].process.pid == pid
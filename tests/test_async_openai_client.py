@@ -0,0 +1,113 @@
+"""AsyncOpenAIClient against the local OpenAI-compatible endpoint."""
+
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+
+from alloy_eval.openai.async_openai_client import AsyncOpenAIClient
+from benchmarks.fake_openai import FakeOpenAIServer
+
+PROMPT = "sig File {{}}\nimplement 1 unique predicate body ({})"
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+
+def prompts(count: int) -> list[str]:
+    return [PROMPT.format(k) for k in range(count)]
+
+
+def query_all(client: AsyncOpenAIClient, prompts: list[str]) -> tuple[list, float]:
+    start = time.monotonic()
+    responses = asyncio.run(client.query_many(prompts))
+    return responses, time.monotonic() - start
+
+
+def test_concurrency_limit():
+    with FakeOpenAIServer(latency_ms=100) as server:
+        handler = server.server.RequestHandlerClass
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, highest
+
+        class Counting(handler):
+            def do_POST(self) -> None:
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight)
+                try:
+                    super().do_POST()
+                finally:
+                    with lock:
+                        in_flight[0] -= 1
+
+        server.server.RequestHandlerClass = Counting
+        client = AsyncOpenAIClient("m", 0.2, concurrency=3, base_url=server.base_url)
+        responses, _ = query_all(client, prompts(12))
+
+    assert all(responses)
+    assert in_flight[1] == 3
+
+
+def test_request_rate_limit():
+    with FakeOpenAIServer() as server:
+        client = AsyncOpenAIClient(
+            "m", 0.2, requests_per_minute=600, base_url=server.base_url
+        )
+        client.request_bucket.tokens = 0
+        responses, elapsed = query_all(client, prompts(5))
+
+    assert all(responses)
+    # Five requests at ten per second from an empty bucket
+    assert elapsed >= 0.45
+
+
+def test_token_rate_limit_refunds_unused_tokens():
+    with FakeOpenAIServer() as server:
+        client = AsyncOpenAIClient(
+            "m", 0.2, max_tokens=300, tokens_per_minute=60000, base_url=server.base_url
+        )
+        bucket = client.token_bucket
+        bucket.tokens = 0
+        responses, elapsed = query_all(client, prompts(1))
+
+    assert all(responses)
+    # The request waits for its whole reservation, at 1000 tokens per second
+    assert elapsed >= client.estimate_tokens(prompts(1)[0]) / 1000 - 0.05
+    # but only what the response used stays spent
+    assert bucket.tokens > 250
+
+
+def test_failed_requests_return_none():
+    with FakeOpenAIServer() as server:
+        handler = server.server.RequestHandlerClass
+
+        class Failing(handler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if b"(1)" in body:
+                    self.send_error(400, "Bad request")
+                else:
+                    self.rfile = io.BytesIO(body)
+                    super().do_POST()
+
+        server.server.RequestHandlerClass = Failing
+        client = AsyncOpenAIClient("m", 0.2, base_url=server.base_url)
+        responses, _ = query_all(client, prompts(3))
+
+    assert responses[1] is None
+    assert responses[0] and responses[2]
+
+
+def test_unreachable_endpoint_returns_none():
+    with FakeOpenAIServer() as server:
+        base_url = server.base_url
+    client = AsyncOpenAIClient("m", 0.2, base_url=base_url)
+    responses, _ = query_all(client, prompts(2))
+    assert responses == [None, None]
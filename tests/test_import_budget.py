@@ -0,0 +1,13 @@
+"""The evaluation entry points stay clear of the heavy dependencies."""
+
+import pytest
+
+from benchmarks.import_budget import BUDGETS, measure
+
+
+@pytest.mark.parametrize("budget", BUDGETS, ids=lambda budget: budget.statement)
+def test_entry_point_loads_no_heavy_modules(budget):
+    # Only the modules are checked: times depend too much on the machine,
+    # python -m benchmarks.import_budget checks those
+    loaded = measure(budget.statement, repeat=1)["modules"]
+    assert [m for m in budget.forbidden if m in loaded] == []
@@ -0,0 +1,38 @@
+"""Native backend verdicts on the bundled problems."""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from alloy_eval.data_utils import read_problems
+from alloy_eval.native_backend import native_check
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def problem(file_name: str, task_id: str):
+    return next(p for p in read_problems(DATA_DIR / file_name) if p.task_id == task_id)
+
+
+@pytest.fixture(scope="module")
+def undirected():
+    return problem("graph_problems.jsonl", "undirected")
+
+
+def test_exhaustive_verdicts(undirected):
+    canonical = undirected.canonical_solution.rstrip().removesuffix("}")
+    assert native_check(undirected, canonical) == (True, None)
+    assert native_check(undirected, "no adj") == (False, "Counterexample found")
+
+
+@pytest.mark.parametrize("solution", ["adj", "no adjj", "(no adj", "no adj <= 1"])
+def test_unparsable_solutions_go_to_alloy(undirected, solution):
+    assert native_check(undirected, solution) is None
+
+
+def test_unsupported_operators_go_to_alloy():
+    inv6 = problem("trash_problems.jsonl", "inv6")
+    assert native_check(inv6, "all f: File | #f.link <= 1") is None
+    assert native_check(inv6, "all f: File | #f.link >> 1 = 0") is None
@@ -0,0 +1,60 @@
+"""Checkpoints of run_tests and their resumption."""
+
+import pytest
+
+from alloy_eval.result_stream import ResultStream, checkpoint_path, read_checkpoint
+
+SETTINGS = {"num_solutions": 5, "temperature": 0.2, "problems_file": "/p.jsonl"}
+
+
+def test_checkpoint_is_not_the_results_file():
+    assert checkpoint_path("out/results.jsonl").name == "results.checkpoint.jsonl"
+    assert checkpoint_path("out/results.json").name == "results.checkpoint.jsonl"
+
+
+def test_resume_keeps_completed_problems(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    with ResultStream(path, "m", settings=SETTINGS) as stream:
+        stream.write("a", [{"task_id": "a_sol1", "passed": True}])
+    with ResultStream(path, "m", resume=True, settings=SETTINGS) as stream:
+        assert list(stream.completed) == ["a"]
+        stream.write("b", [])
+    header, completed = read_checkpoint(path)
+    assert header == {"model": "m", **SETTINGS}
+    assert list(completed) == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "model, change",
+    [
+        ("other", {}),
+        ("m", {"num_solutions": 3}),
+        ("m", {"temperature": 1.0}),
+        ("m", {"problems_file": "/q.jsonl"}),
+    ],
+)
+def test_resume_refuses_other_settings(tmp_path, model, change):
+    path = tmp_path / "run.checkpoint.jsonl"
+    with ResultStream(path, "m", settings=SETTINGS) as stream:
+        stream.write("a", [])
+    with pytest.raises(ValueError):
+        ResultStream(path, model, resume=True, settings={**SETTINGS, **change})
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    with ResultStream(path, "m", settings=SETTINGS) as stream:
+        stream.write("a", [])
+    with open(path, "a") as f:
+        f.write('{"task_id": "b", "res')
+    with ResultStream(path, "m", resume=True, settings=SETTINGS) as stream:
+        assert list(stream.completed) == ["a"]
+        stream.write("b", [])
+    assert list(read_checkpoint(path)[1]) == ["a", "b"]
+
+
+def test_corrupt_line_before_the_end_is_refused(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    path.write_text('{"model": "m"}\n{"task_id": "a", "res\n{"task_id": "b"}\n')
+    with pytest.raises(ValueError):
+        read_checkpoint(path)